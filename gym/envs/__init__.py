@@ -205,91 +205,91 @@ register(
 
 register(
     id='DartHopper-v1',
-    entry_point='gym.envs.dart:DartHopperEnv',
+    entry_point='gym.envs.dart.hopper:DartHopperEnv',
     reward_threshold=3800.0,
     max_episode_steps=1000,
 )
 
 register(
     id='DartHalfCheetah-v1',
-    entry_point='gym.envs.dart:DartHalfCheetahEnv',
+    entry_point='gym.envs.dart.half_cheetah:DartHalfCheetahEnv',
     reward_threshold=4800.0,
     max_episode_steps=1000,
 )
 
 register(
     id='DartCartPole-v1',
-    entry_point='gym.envs.dart:DartCartPoleEnv',
+    entry_point='gym.envs.dart.cart_pole:DartCartPoleEnv',
     reward_threshold=950.0,
     max_episode_steps=1000,
 )
 
 register(
     id='DartDoubleInvertedPendulumEnv-v1',
-    entry_point='gym.envs.dart:DartDoubleInvertedPendulumEnv',
+    entry_point='gym.envs.dart.inverted_double_pendulum:DartDoubleInvertedPendulumEnv',
     max_episode_steps=1000,
 )
 
 register(
     id='DartReacher-v1',
-    entry_point='gym.envs.dart:DartReacher2dEnv',
+    entry_point='gym.envs.dart.reacher2d:DartReacher2dEnv',
     reward_threshold=-3.75,
     max_episode_steps=50,
 )
 
 register(
     id='DartReacher3d-v1',
-    entry_point='gym.envs.dart:DartReacherEnv',
+    entry_point='gym.envs.dart.reacher:DartReacherEnv',
     reward_threshold=-200,
     max_episode_steps=500,
 )
 
 register(
     id='DartDog-v1',
-    entry_point='gym.envs.dart:DartDogEnv',
+    entry_point='gym.envs.dart.dog:DartDogEnv',
     max_episode_steps=1000,
 )
 
 register(
     id='DartCartPoleImg-v1',
-    entry_point='gym.envs.dart:DartCartPoleImgEnv',
+    entry_point='gym.envs.dart.cart_pole_img:DartCartPoleImgEnv',
     reward_threshold=950.0,
     max_episode_steps=2000,
 )
 
 register(
     id='DartCartPoleSwingUp-v1',
-    entry_point='gym.envs.dart:DartCartPoleSwingUpEnv',
+    entry_point='gym.envs.dart.cartpole_swingup:DartCartPoleSwingUpEnv',
     max_episode_steps=500,
 )
 
 register(
     id='DartWalker2d-v1',
-    entry_point='gym.envs.dart:DartWalker2dEnv',
+    entry_point='gym.envs.dart.walker2d:DartWalker2dEnv',
     max_episode_steps=1000,
 )
 
 register(
     id='DartWalker3d-v1',
-    entry_point='gym.envs.dart:DartWalker3dEnv',
+    entry_point='gym.envs.dart.walker3d:DartWalker3dEnv',
     max_episode_steps=1000,
 )
 
 register(
     id='DartWalker3dSPD-v1',
-    entry_point='gym.envs.dart:DartWalker3dSPDEnv',
+    entry_point='gym.envs.dart.walker3d_spd:DartWalker3dSPDEnv',
     max_episode_steps=1000,
 )
 
 register(
     id='DartHumanWalker-v1',
-    entry_point='gym.envs.dart:DartHumanWalkerEnv',
+    entry_point='gym.envs.dart.human_walker:DartHumanWalkerEnv',
     max_episode_steps=300,
 )
 
 register(
     id='DartSnake7Link-v1',
-    entry_point='gym.envs.dart:DartSnake7LinkEnv',
+    entry_point='gym.envs.dart.snake_7link:DartSnake7LinkEnv',
     max_episode_steps=1000,
 )
 
@@ -1,21 +1,54 @@
-from gym.envs.dart.dart_env import DartEnv
-# ^^^^^ so that user gets the correct error
-# message if pydart is not installed correctly
+# The Dart environments are imported lazily: the entry points registered in
+# gym/envs/__init__.py name their modules directly, and the classes below are
+# only imported when accessed, so that importing this package does not load
+# pydart2 or OpenGL.
+import importlib
+import sys
+import types
 
-from gym.envs.dart.cart_pole import DartCartPoleEnv
-from gym.envs.dart.hopper import DartHopperEnv
-from gym.envs.dart.cartpole_swingup import DartCartPoleSwingUpEnv
-from gym.envs.dart.reacher import DartReacherEnv
-from gym.envs.dart.cart_pole_img import DartCartPoleImgEnv
-from gym.envs.dart.walker2d import DartWalker2dEnv
-from gym.envs.dart.walker3d import DartWalker3dEnv
-from gym.envs.dart.inverted_double_pendulum import DartDoubleInvertedPendulumEnv
-from gym.envs.dart.dog import DartDogEnv
-from gym.envs.dart.reacher2d import DartReacher2dEnv
+_MODULES = {
+    'DartEnv': 'gym.envs.dart.dart_env',
+    'DartCartPoleEnv': 'gym.envs.dart.cart_pole',
+    'DartHopperEnv': 'gym.envs.dart.hopper',
+    'DartCartPoleSwingUpEnv': 'gym.envs.dart.cartpole_swingup',
+    'DartReacherEnv': 'gym.envs.dart.reacher',
+    'DartCartPoleImgEnv': 'gym.envs.dart.cart_pole_img',
+    'DartWalker2dEnv': 'gym.envs.dart.walker2d',
+    'DartWalker3dEnv': 'gym.envs.dart.walker3d',
+    'DartDoubleInvertedPendulumEnv': 'gym.envs.dart.inverted_double_pendulum',
+    'DartDogEnv': 'gym.envs.dart.dog',
+    'DartReacher2dEnv': 'gym.envs.dart.reacher2d',
+    'DartWalker3dSPDEnv': 'gym.envs.dart.walker3d_spd',
+    'DartHumanWalkerEnv': 'gym.envs.dart.human_walker',
+    'DartSnake7LinkEnv': 'gym.envs.dart.snake_7link',
+    'DartHalfCheetahEnv': 'gym.envs.dart.half_cheetah',
+    'DartBatchEnv': 'gym.envs.dart.batch_env',
+}
 
-from gym.envs.dart.walker3d_spd import DartWalker3dSPDEnv
-from gym.envs.dart.human_walker import DartHumanWalkerEnv
+__all__ = list(_MODULES)
 
-from gym.envs.dart.snake_7link import DartSnake7LinkEnv
 
-from gym.envs.dart.half_cheetah import DartHalfCheetahEnv
\ No newline at end of file
+class _LazyModule(types.ModuleType):
+    # module-level `__getattr__` (PEP 562) needs Python 3.7, so the package
+    # gets a module class that imports the classes on first access instead
+    def __getattr__(self, name):
+        if name not in _MODULES:
+            raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+        value = getattr(importlib.import_module(_MODULES[name]), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+_module = sys.modules[__name__]
+try:
+    _module.__class__ = _LazyModule
+except TypeError:
+    # Python 2 cannot change the class of a module: replace it, keeping the
+    # original alive since the functions above use its globals
+    _lazy = _LazyModule(__name__, __doc__)
+    _lazy.__dict__.update(_module.__dict__)
+    _lazy._original = _module
+    sys.modules[__name__] = _lazy
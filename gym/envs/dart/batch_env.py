@@ -0,0 +1,462 @@
+import numpy as np
+import multiprocessing as mp
+import sys
+from ctypes import c_bool
+
+from gym import error, logger
+from gym.envs.dart.config import CopyConfig, make_config
+from gym.envs.registration import registry
+from gym.error import ClosedEnvironmentError
+from gym.utils import seeding
+from gym.vector.vector_env import VectorEnv
+from gym.vector.utils import (create_shared_memory, create_empty_array,
+                              read_from_shared_memory, batch_space,
+                              CloudpickleWrapper, clear_mpi_env_vars)
+
+__all__ = ['DartBatchEnv']
+
+
+class DartBatchEnv(VectorEnv):
+    """Batched environment that owns `num_envs` independent Dart worlds of the
+    same registered task and steps them in a tight loop.
+
+    Actions are given as a single `(num_envs, act_dim)` array, and the
+    observations, rewards and dones of all the worlds are written row by row
+    into preallocated arrays. Optionally, the worlds can be sharded across
+    `num_workers` processes, in which case these arrays live in shared memory
+    and each worker only exchanges a single message per step with the parent.
+
+    Parameters
+    ----------
+    id : str
+        The environment ID of a registered Dart task (e.g. `DartHopper-v1`).
+
+    num_envs : int
+        Number of independent worlds in the batch.
+
+    num_workers : int (default: 1)
+        Number of processes the worlds are sharded across. If `1`, all the
+        worlds are stepped in the current process.
+
+    copy : bool (default: `True`)
+        If `True`, then the `reset` and `step` methods return a copy of the
+        preallocated buffers.
+
+    context : str, optional
+        Context for multiprocessing (only used if `num_workers > 1`).
+
+    daemon : bool (default: `True`)
+        If `True`, then the worker processes have `daemon` flag turned on.
+
+    copies_per_world : int (default: 1)
+        Number of copies of the robot simulated in each world (for tasks
+        whose env sets `supports_copies`, e.g. `DartHopper-v1`). Each copy is
+        an independent row of the batch, and a single world step advances
+        all of them. `num_envs` must be a multiple of it.
+
+    randomize_dynamics : dict, optional
+        If given, the keyword arguments of `set_dynamics_randomization`,
+        called on each environment after it is created.
+
+    kwargs : dict
+        Keyword arguments passed to the constructor of each environment.
+
+    Example
+    -------
+    >>> env = DartBatchEnv('DartHopper-v1', num_envs=16)
+    >>> observations = env.reset()
+    >>> actions = np.zeros((16, 3))
+    >>> observations, rewards, dones, infos = env.step(actions)
+    >>> observations.shape
+    (16, 11)
+    """
+    def __init__(self, id, num_envs, num_workers=1, copy=True, context=None,
+                 daemon=True, copies_per_world=1, randomize_dynamics=None,
+                 **kwargs):
+        assert num_envs >= 1
+        assert num_envs % copies_per_world == 0
+        num_worlds = num_envs // copies_per_world
+        assert 1 <= num_workers <= num_worlds
+        self.spec = registry.spec(id)
+        self.copy = copy
+        self.num_workers = num_workers
+        self.copies_per_world = copies_per_world
+        self._kwargs = kwargs
+        self._randomize_dynamics = randomize_dynamics
+        max_episode_steps = self.spec.max_episode_steps
+
+        if num_workers == 1:
+            envs = _make_envs(self.spec, num_envs, copies_per_world, kwargs,
+                              randomize_dynamics)
+            observation_space = envs[0].observation_space
+            action_space = envs[0].action_space
+        else:
+            dummy_env = self.spec.make(**kwargs)
+            observation_space = dummy_env.observation_space
+            action_space = dummy_env.action_space
+            # with `WorldConfig.reuse`, the world of the dummy env goes back
+            # to the pool of loaded worlds, which forked workers inherit (see
+            # `DartWorldPool`)
+            dummy_env.close()
+            del dummy_env
+        super(DartBatchEnv, self).__init__(num_envs=num_envs,
+            observation_space=observation_space, action_space=action_space)
+        # `VectorEnv` batches the action space as a `Tuple`; a batch of
+        # actions is a single contiguous array here.
+        self.action_space = batch_space(action_space, n=num_envs)
+
+        # workers get whole worlds
+        self._slices = [(lo * copies_per_world, hi * copies_per_world)
+                        for (lo, hi) in _split(num_worlds, num_workers)]
+        if num_workers == 1:
+            self.observations = create_empty_array(observation_space,
+                n=num_envs, fn=np.zeros)
+            self._actions = create_empty_array(action_space, n=num_envs,
+                fn=np.zeros)
+            self._rewards = np.zeros((num_envs,), dtype=np.float64)
+            self._dones = np.zeros((num_envs,), dtype=np.bool_)
+            self._batch = _DartEnvSlice(envs, self.observations, self._actions,
+                self._rewards, self._dones, max_episode_steps, copies_per_world)
+            self.parent_pipes, self.processes = [], []
+        else:
+            self._batch = None
+            self._start_workers(context, daemon, max_episode_steps)
+
+    def _start_workers(self, context, daemon, max_episode_steps):
+        try:
+            ctx = mp.get_context(context)
+        except AttributeError:
+            logger.warn('Context switching for `multiprocessing` is not '
+                'available in Python 2. Using the default context.')
+            ctx = mp
+
+        buffers = (
+            create_shared_memory(self.single_observation_space,
+                n=self.num_envs, ctx=ctx),
+            create_shared_memory(self.single_action_space,
+                n=self.num_envs, ctx=ctx),
+            ctx.Array('d', self.num_envs),
+            ctx.Array(c_bool, self.num_envs)
+        )
+        (self.observations, self._actions, self._rewards,
+            self._dones) = _read_buffers(buffers, self.single_observation_space,
+            self.single_action_space, self.num_envs)
+
+        self.parent_pipes, self.processes = [], []
+        self.error_queue = ctx.Queue()
+        with clear_mpi_env_vars():
+            for idx, (lo, hi) in enumerate(self._slices):
+                env_fn = _make_envs_fn(self.spec.id, hi - lo,
+                                       self.copies_per_world, self._kwargs,
+                                       self._randomize_dynamics)
+                parent_pipe, child_pipe = ctx.Pipe()
+                process = ctx.Process(target=_worker,
+                    name='Worker<{0}>-{1}'.format(type(self).__name__, idx),
+                    args=(idx, CloudpickleWrapper(env_fn), child_pipe,
+                    parent_pipe, buffers, (lo, hi), self.num_envs,
+                    max_episode_steps, self.copies_per_world, self.error_queue))
+
+                self.parent_pipes.append(parent_pipe)
+                self.processes.append(process)
+
+                process.daemon = daemon
+                process.start()
+                child_pipe.close()
+
+    @property
+    def envs(self):
+        """List of the environments, if they are stepped in this process."""
+        if self._batch is None:
+            raise AttributeError('The environments of a sharded `{0}` live '
+                'in the worker processes.'.format(type(self).__name__))
+        return self._batch.envs
+
+    def seed(self, seeds=None):
+        self._assert_is_running()
+        if seeds is None:
+            seeds = [None for _ in range(self.num_envs)]
+        if isinstance(seeds, int):
+            seeds = [seeds + i for i in range(self.num_envs)]
+        assert len(seeds) == self.num_envs
+
+        if self._batch is not None:
+            self._batch.seed(seeds)
+        else:
+            self._call_workers('seed', [seeds[lo:hi] for (lo, hi) in self._slices])
+
+    def set_dynamics_table(self, table):
+        """Randomize the dynamics of the next episodes of the environments
+        from `table`, of shape `(num_envs, num_episodes, size)`: environment
+        `i` takes the rows of `table[i]` in turn (see
+        `DartEnv.set_dynamics_table`)."""
+        self._assert_is_running()
+        table = np.asarray(table, dtype=np.float64)
+        assert len(table) == self.num_envs
+        if self._batch is not None:
+            self._batch.set_dynamics_table(table)
+        else:
+            self._call_workers('dynamics_table',
+                [table[lo:hi] for (lo, hi) in self._slices])
+
+    def sample_dynamics_table(self, num_episodes, seed=None):
+        """Pregenerate the dynamics parameters of the next `num_episodes`
+        episodes of all the environments, from a single generator seeded with
+        `seed` (so that the table does not depend on `num_workers`), and
+        return the table. The batch must be created with
+        `randomize_dynamics`."""
+        self._assert_is_running()
+        if self._batch is not None:
+            low, high = self._batch.dynamics_bounds()
+        else:
+            low, high = self._call_workers('dynamics_bounds')[0]
+        np_random, _ = seeding.np_random(seed)
+        table = np_random.uniform(low, high,
+            size=(self.num_envs, num_episodes, len(low)))
+        self.set_dynamics_table(table)
+        return table
+
+    def reset_wait(self):
+        self._assert_is_running()
+        if self._batch is not None:
+            self._batch.reset()
+        else:
+            self._call_workers('reset')
+
+        return np.copy(self.observations) if self.copy else self.observations
+
+    def step_async(self, actions):
+        np.copyto(self._actions, np.asarray(actions,
+            dtype=self._actions.dtype).reshape(self._actions.shape))
+
+    def step_wait(self):
+        """
+        Returns
+        -------
+        observations : `np.ndarray` instance
+            A `(num_envs, obs_dim)` array of observations.
+
+        rewards : `np.ndarray` instance (dtype `np.float_`)
+            A vector of rewards from the batch of environments.
+
+        dones : `np.ndarray` instance (dtype `np.bool_`)
+            A vector whose entries indicate whether the episode has ended. The
+            environments whose episode has ended are reset automatically.
+
+        infos : list of dict
+            A list of auxiliary diagnostic informations.
+        """
+        self._assert_is_running()
+        if self._batch is not None:
+            infos = self._batch.step()
+        else:
+            infos = [info for infos_slice in self._call_workers('step')
+                for info in infos_slice]
+
+        return (np.copy(self.observations) if self.copy else self.observations,
+            np.copy(self._rewards), np.copy(self._dones), infos)
+
+    def close_extras(self, timeout=None, terminate=False):
+        if self._batch is not None:
+            [env.close() for env in self._batch.envs]
+            return
+
+        if terminate:
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+        else:
+            for pipe in self.parent_pipes:
+                if (pipe is not None) and (not pipe.closed):
+                    pipe.send(('close', None))
+            for pipe in self.parent_pipes:
+                if (pipe is not None) and (not pipe.closed):
+                    pipe.recv()
+
+        for pipe in self.parent_pipes:
+            if pipe is not None:
+                pipe.close()
+        for process in self.processes:
+            process.join()
+
+    def _call_workers(self, command, data=None):
+        if data is None:
+            data = [None for _ in self.parent_pipes]
+        for pipe, data_slice in zip(self.parent_pipes, data):
+            pipe.send((command, data_slice))
+        results, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
+        self._raise_if_errors(successes)
+        return results
+
+    def _assert_is_running(self):
+        if self.closed:
+            raise ClosedEnvironmentError('Trying to operate on `{0}`, after a '
+                'call to `close()`.'.format(type(self).__name__))
+
+    def _raise_if_errors(self, successes):
+        if all(successes):
+            return
+
+        num_errors = self.num_workers - sum(successes)
+        assert num_errors > 0
+        for _ in range(num_errors):
+            index, exctype, value = self.error_queue.get()
+            logger.error('Received the following error from Worker-{0}: '
+                '{1}: {2}'.format(index, exctype.__name__, value))
+            logger.error('Shutting down Worker-{0}.'.format(index))
+            self.parent_pipes[index].close()
+            self.parent_pipes[index] = None
+
+        logger.error('Raising the last exception back to the main process.')
+        raise exctype(value)
+
+
+class _DartEnvSlice(object):
+    """Steps a list of environments, writing into rows of preallocated arrays.
+    Episodes are truncated after `max_episode_steps`, and environments are
+    reset as soon as their episode ends. Consecutive groups of
+    `copies_per_world` environments share a world and are stepped together."""
+    def __init__(self, envs, observations, actions, rewards, dones,
+                 max_episode_steps=None, copies_per_world=1):
+        self.envs = envs
+        self.copies_per_world = copies_per_world
+        self.observations = observations
+        self.actions = actions
+        self.rewards = rewards
+        self.dones = dones
+        self.max_episode_steps = max_episode_steps
+        self._elapsed_steps = np.zeros((len(envs),), dtype=np.int64)
+        for env, row in zip(envs, observations):
+            if getattr(env, '_obs_plan', None) is not None:
+                # the env writes its observations straight into the batch
+                # (in shared memory, for workers)
+                env.obs_out = row
+
+    def seed(self, seeds):
+        for env, seed in zip(self.envs, seeds):
+            env.seed(seed)
+
+    def dynamics_bounds(self):
+        dynamics = self.envs[0]._get_dynamics()
+        if dynamics is None:
+            raise error.Error('The dynamics of the environments are not '
+                'randomized, see the `randomize_dynamics` argument.')
+        return dynamics.low, dynamics.high
+
+    def set_dynamics_table(self, table):
+        for env, rows in zip(self.envs, table):
+            env.set_dynamics_table(rows)
+
+    def reset(self):
+        for i, env in enumerate(self.envs):
+            self.observations[i] = env.reset()
+        self._elapsed_steps[:] = 0
+        self.dones[:] = False
+
+    def step(self):
+        infos = []
+        n = self.copies_per_world
+        for lo in range(0, len(self.envs), n):
+            if n == 1:
+                transitions = [self.envs[lo].step(self.actions[lo])]
+            else:
+                transitions = self.envs[lo].step_copies(self.envs[lo:lo + n],
+                                                        self.actions[lo:lo + n])
+            for i, transition in enumerate(transitions, lo):
+                infos.append(self._record(i, transition))
+        return infos
+
+    def _record(self, i, transition):
+        env = self.envs[i]
+        observation, self.rewards[i], done, info = transition
+        self._elapsed_steps[i] += 1
+        if (self.max_episode_steps is not None) and \
+                (self._elapsed_steps[i] >= self.max_episode_steps):
+            info['TimeLimit.truncated'] = not done
+            done = True
+        if done:
+            observation = env.reset()
+            self._elapsed_steps[i] = 0
+        self.dones[i] = done
+        self.observations[i] = observation
+        return info
+
+
+def _split(num_envs, num_workers):
+    bounds = np.linspace(0, num_envs, num_workers + 1).astype(np.int64)
+    return [(int(lo), int(hi)) for (lo, hi) in zip(bounds[:-1], bounds[1:])]
+
+
+def _read_buffers(buffers, observation_space, action_space, n):
+    observations_buffer, actions_buffer, rewards_buffer, dones_buffer = buffers
+    observations = read_from_shared_memory(observations_buffer,
+        observation_space, n=n)
+    actions = read_from_shared_memory(actions_buffer, action_space, n=n)
+    rewards = np.frombuffer(rewards_buffer.get_obj(), dtype=np.float64)
+    dones = np.frombuffer(dones_buffer.get_obj(), dtype=np.bool_)
+    return observations, actions, rewards, dones
+
+
+def _make_envs(spec, n, copies_per_world, kwargs, randomize_dynamics=None):
+    if copies_per_world == 1:
+        envs = [spec.make(**kwargs) for _ in range(n)]
+    else:
+        kwargs = dict(kwargs)
+        copies = make_config(CopyConfig, kwargs.pop('copies', None))._replace(
+            num=copies_per_world)
+        envs = []
+        for _ in range(n // copies_per_world):
+            first = spec.make(copies=copies, **kwargs)
+            envs.append(first)
+            envs.extend(spec.make(copies=copies._replace(index=index,
+                                  shared_world=first.dart_world), **kwargs)
+                        for index in range(1, copies_per_world))
+    if randomize_dynamics is not None:
+        for env in envs:
+            env.set_dynamics_randomization(**randomize_dynamics)
+    return envs
+
+
+def _make_envs_fn(id, n, copies_per_world, kwargs, randomize_dynamics=None):
+    def _make_envs_in_worker():
+        return _make_envs(registry.spec(id), n, copies_per_world, kwargs,
+                          randomize_dynamics)
+    return _make_envs_in_worker
+
+
+def _worker(index, env_fn, pipe, parent_pipe, buffers, bounds, num_envs,
+            max_episode_steps, copies_per_world, error_queue):
+    envs = env_fn()
+    lo, hi = bounds
+    observations, actions, rewards, dones = _read_buffers(buffers,
+        envs[0].observation_space, envs[0].action_space, num_envs)
+    batch = _DartEnvSlice(envs, observations[lo:hi], actions[lo:hi],
+        rewards[lo:hi], dones[lo:hi], max_episode_steps, copies_per_world)
+    parent_pipe.close()
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                batch.reset()
+                pipe.send((None, True))
+            elif command == 'step':
+                pipe.send((batch.step(), True))
+            elif command == 'seed':
+                batch.seed(data)
+                pipe.send((None, True))
+            elif command == 'dynamics_bounds':
+                pipe.send((batch.dynamics_bounds(), True))
+            elif command == 'dynamics_table':
+                batch.set_dynamics_table(data)
+                pipe.send((None, True))
+            elif command == 'close':
+                pipe.send((None, True))
+                break
+            else:
+                raise RuntimeError('Received unknown command `{0}`. Must '
+                    'be one of {{`reset`, `step`, `seed`, `dynamics_bounds`, '
+                    '`dynamics_table`, `close`}}.'.format(command))
+    except (KeyboardInterrupt, Exception):
+        error_queue.put((index,) + sys.exc_info()[:2])
+        pipe.send((None, False))
+    finally:
+        [env.close() for env in envs]
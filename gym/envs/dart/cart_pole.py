@@ -1,31 +1,31 @@
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 class DartCartPoleEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    def __init__(self, **kwargs):
         control_bounds = np.array([[1.0],[-1.0]])
         self.action_scale = 100
-        dart_env.DartEnv.__init__(self, 'cartpole.skel', 2, 4, control_bounds, dt=0.02, disableViewer=False)
-        utils.EzPickle.__init__(self)
+        dart_env.DartEnv.__init__(self, 'cartpole.skel', 2, 4, control_bounds, dt=0.02, disableViewer=False, **kwargs)
+        # actions are not clamped
+        self.set_action_map(dofs=slice(0, 1), scale=self.action_scale, clip=False)
+        self.set_observation_spec(ObservationSpec().q().dq())
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
         reward = 1.0
 
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[0] = a[0] * self.action_scale
+        tau = self.action_map(a)
 
         self.do_simulation(tau, self.frame_skip)
         ob = self._get_obs()
 
         notdone = np.isfinite(ob).all() and (np.abs(ob[1]) <= .2)
         done = not notdone
-        return ob, reward, done, {}
+        return self._finish_step(ob, reward, done, {})
 
 
-    def _get_obs(self):
-        return np.concatenate([self.robot_skeleton.q, self.robot_skeleton.dq]).ravel()
-
     def reset_model(self):
         self.dart_world.reset()
         qpos = self.robot_skeleton.q + self.np_random.uniform(low=-.01, high=.01, size=self.robot_skeleton.ndofs)
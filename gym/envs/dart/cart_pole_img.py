@@ -6,7 +6,10 @@ from gym import spaces
 from gym.envs.dart import dart_env
 
 class DartCartPoleImgEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    snapshot_fields = ('cart_pos_x', 'pole_rotate', 'cart_pos_x_old', 'pole_rotate_old',
+                       'cart_spd', 'pole_spd')
+
+    def __init__(self, **kwargs):
         self.x_threshold = 1.4
         self.pole_theta_threshold = 0.268
         self.cart_pos_x = 0.0
@@ -22,8 +25,8 @@ class DartCartPoleImgEnv(dart_env.DartEnv, utils.EzPickle):
         self.action_space = spaces.Discrete(2)
         dart_env.DartEnv.__init__(self, 'cartpole.skel', 2, 4, control_bounds, \
                                   obs_type="image", action_type="discrete", visualize=False, \
-                                  screen_width=self.screen_width, screen_height=self.screen_height)
-        utils.EzPickle.__init__(self)
+                                  screen_width=self.screen_width, screen_height=self.screen_height, **kwargs)
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
         tau = np.zeros(self.robot_skeleton.ndofs)
@@ -49,7 +52,7 @@ class DartCartPoleImgEnv(dart_env.DartEnv, utils.EzPickle):
         if done:
             reward = 0.0
         
-        return ob, reward, done, {}
+        return self._finish_step(ob, reward, done, {})
 
     def render(self, mode='human', close=False):
         if close:
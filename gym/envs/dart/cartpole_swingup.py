@@ -3,17 +3,20 @@ __author__ = 'yuwenhao'
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 class DartCartPoleSwingUpEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0],[-1.0]])
         self.action_scale = 40
-        dart_env.DartEnv.__init__(self, 'cartpole_swingup.skel', 2, 4, self.control_bounds, dt=0.01)
-        utils.EzPickle.__init__(self)
+        dart_env.DartEnv.__init__(self, 'cartpole_swingup.skel', 2, 4, self.control_bounds, dt=0.01, **kwargs)
+        # actions are not clamped
+        self.set_action_map(dofs=slice(0, 1), scale=self.action_scale, clip=False)
+        self.set_observation_spec(ObservationSpec().q().dq())
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[0] = a[0] * self.action_scale
+        tau = self.action_map(a)
 
         self.do_simulation(tau, self.frame_skip)
         ob = self._get_obs()
@@ -29,12 +32,9 @@ class DartCartPoleSwingUpEnv(dart_env.DartEnv, utils.EzPickle):
 
         done = abs(ang) > 8 * np.pi or abs(self.robot_skeleton.dq[1]) > 25 or abs(self.robot_skeleton.q[0]) > 5
 
-        return ob, reward, bool(done), {}
+        return self._finish_step(ob, reward, bool(done), {})
 
 
-    def _get_obs(self):
-        return np.concatenate([self.robot_skeleton.q, self.robot_skeleton.dq]).ravel()
-
     def reset_model(self):
         self.dart_world.reset()
         qpos = self.robot_skeleton.q + self.np_random.uniform(low=-.1, high=.1, size=self.robot_skeleton.ndofs)
@@ -0,0 +1,78 @@
+from timeit import default_timer
+
+from gym import error, logger
+
+__all__ = ['COLLISION_DETECTORS', 'COLLISION_PROFILES', 'set_collision_profile',
+           'benchmark_collision_detectors']
+
+# detector ids of `pydart.World.set_collision_detector`
+COLLISION_DETECTORS = {'dart': 0, 'fcl': 1, 'bullet': 2, 'ode': 3}
+
+# detectors tried in order, falling back on the next one when a detector is
+# missing from the DART build
+COLLISION_PROFILES = {
+    'fast': ('ode', 'bullet', 'dart'),
+    'accurate': ('fcl', 'bullet', 'dart'),
+    'auto': ('ode', 'bullet', 'fcl', 'dart'),
+}
+
+# detector chosen by the `auto` profile, per model
+_auto_choices = {}
+
+
+def _try_detector(world, name):
+    try:
+        world.set_collision_detector(COLLISION_DETECTORS[name])
+    except Exception:
+        # not in this DART build (pydart2 asserts that the detector was set)
+        return False
+    return True
+
+
+def benchmark_collision_detectors(world, names, steps=20):
+    """Mean time of a step of `world` with each available detector in
+    `names`, as a dict. The state of the world is restored after each run."""
+    state = world.clone_state()
+    times = {}
+    for name in names:
+        if not _try_detector(world, name):
+            continue
+        start = default_timer()
+        for _ in range(steps):
+            world.step()
+        times[name] = (default_timer() - start) / steps
+        world.restore_state(state)
+    return times
+
+
+def set_collision_profile(world, profile, key=None, steps=20):
+    """Set the collision detector of `world` for the profile `profile`:
+
+    - `fast`: ODE, else Bullet, else DART,
+    - `accurate`: FCL, else Bullet, else DART,
+    - `auto`: the detector with the fastest step on `world`, measured with
+      a microbenchmark of `steps` steps the first time `key` (e.g. the model
+      files) is seen in the process, and reused afterwards.
+
+    Returns the name of the detector.
+    """
+    if profile not in COLLISION_PROFILES:
+        raise error.Error('Unknown collision profile `{0}`, must be one of '
+            '{1}.'.format(profile, sorted(COLLISION_PROFILES)))
+    names = COLLISION_PROFILES[profile]
+    if profile == 'auto':
+        if key in _auto_choices and _try_detector(world, _auto_choices[key]):
+            return _auto_choices[key]
+        times = benchmark_collision_detectors(world, names, steps=steps)
+        if times:
+            names = (min(times, key=times.get),)
+            logger.info('Collision detector step times: {0}, using '
+                '`{1}`.'.format(times, names[0]))
+    for name in names:
+        if _try_detector(world, name):
+            if profile == 'auto':
+                _auto_choices[key] = name
+            return name
+    raise error.Error('None of the collision detectors {0} is '
+        'available.'.format(names))
+
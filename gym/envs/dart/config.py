@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+__all__ = ['RenderConfig', 'WorldConfig', 'CopyConfig', 'make_config']
+
+
+class RenderConfig(namedtuple('RenderConfig',
+        ['headless', 'backend', 'pipelined_readback'])):
+    """How a `DartEnv` renders.
+
+    `headless` defers the creation of the GL context to the first `render()`
+    (`None` reads the `GYM_DART_HEADLESS` environment variable), `backend`
+    is `'glut'`, or an offscreen backend `'egl'` or `'osmesa'` (`None` reads
+    `GYM_DART_RENDER_BACKEND`, else `'glut'`), and `pipelined_readback`
+    makes offscreen frame captures return the previous frame without
+    stalling (see `OffscreenWindow`)."""
+    __slots__ = ()
+
+RenderConfig.__new__.__defaults__ = (None, None, False)
+
+
+class WorldConfig(namedtuple('WorldConfig',
+        ['reuse', 'legacy_contacts', 'collision_profile'])):
+    """How a `DartEnv` gets and sets up its world.
+
+    `reuse` takes the world from, and gives it back to, the per-process pool
+    of loaded worlds (see `DartWorldPool`), `legacy_contacts` builds one
+    `Contact` object per contact of every step in `collision_result`, and
+    `collision_profile` overrides the collision detector profile of the env
+    class (see `set_collision_profile`)."""
+    __slots__ = ()
+
+WorldConfig.__new__.__defaults__ = (False, False, None)
+
+
+class CopyConfig(namedtuple('CopyConfig',
+        ['num', 'spacing', 'index', 'shared_world'])):
+    """Copies of the robot of a `DartEnv` simulated in one world.
+
+    The robot is replicated `num` times on parallel lanes `spacing` apart
+    (see `replicate_skeleton`), and each copy is driven by its own env: the
+    env of the copy `index=0` owns the world, the others get it as
+    `shared_world` (see `DartEnv.step_copies`)."""
+    __slots__ = ()
+
+CopyConfig.__new__.__defaults__ = (1, 0.5, 0, None)
+
+
+def make_config(cls, config):
+    """`config` as an instance of `cls`, given as an instance, a dict of its
+    fields (e.g. through `gym.make`), or `None` for the defaults."""
+    if config is None:
+        return cls()
+    if isinstance(config, dict):
+        return cls(**config)
+    return config
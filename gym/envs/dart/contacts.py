@@ -0,0 +1,67 @@
+import numpy as np
+
+__all__ = ['ContactSummary']
+
+
+class ContactSummary(object):
+    """Contacts of one step of a world, as arrays.
+
+    DART reports every contact as a row of 10 numbers: the contact point, the
+    contact force and the (skeleton, body node) ids of the two bodies in
+    contact. The summary keeps these rows in a single `(n, 10)` array and
+    answers queries on all the contacts at once, for body nodes given by
+    their indices in their skeleton (precompute them with `bodynode.id`
+    rather than looking body nodes up by name every step).
+
+    Example
+    -------
+    >>> feet = np.array([skel.bodynode('l-foot').id, skel.bodynode('r-foot').id])
+    >>> world.step()
+    >>> world.contacts.bodynode_flags(skel.id, feet, other_skel_id=0)
+    array([ True, False])
+    """
+    def __init__(self, raw=None):
+        self.update(np.zeros((0,)) if raw is None else raw)
+
+    def update(self, raw):
+        """Replace the contacts by the flat array `raw` of DART contacts."""
+        self.raw = np.asarray(raw, dtype=np.float64).reshape(-1, 10)
+        self.points = self.raw[:, 0:3]
+        self.forces = self.raw[:, 3:6]
+        # columns: skel_id1, bodynode_id1, skel_id2, bodynode_id2
+        self.ids = self.raw[:, 6:10].astype(np.int64)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def _sides(self, skel_id, other_skel_id=None):
+        """For each side of the contacts, the mask of the contacts whose body
+        on that side belongs to `skel_id` (and whose other body belongs to
+        `other_skel_id`, if any), and the column of the body node ids."""
+        for side, other in ((0, 2), (2, 0)):
+            rows = self.ids[:, side] == skel_id
+            if other_skel_id is not None:
+                rows &= self.ids[:, other] == other_skel_id
+            yield rows, self.ids[:, side + 1]
+
+    def bodynode_flags(self, skel_id, bodynode_ids, other_skel_id=None):
+        """Whether each of the body nodes `bodynode_ids` of the skeleton
+        `skel_id` is in contact (with the skeleton `other_skel_id`, if any)."""
+        bodynode_ids = np.asarray(bodynode_ids)
+        flags = np.zeros(bodynode_ids.shape, dtype=np.bool_)
+        for rows, ids in self._sides(skel_id, other_skel_id):
+            flags |= np.isin(bodynode_ids, ids[rows])
+        return flags
+
+    def force_per_bodynode(self, skel_id, num_bodynodes, other_skel_id=None):
+        """Sum of the magnitudes of the contact forces on each body node of
+        the skeleton `skel_id`, as an array of size `num_bodynodes`."""
+        magnitudes = np.sqrt(np.square(self.forces).sum(axis=1))
+        total = np.zeros((num_bodynodes,), dtype=np.float64)
+        for rows, ids in self._sides(skel_id, other_skel_id):
+            np.add.at(total, ids[rows], magnitudes[rows])
+        return total
+
+    def total_squared_force(self):
+        """Sum of the squared norms of all the contact forces."""
+        return np.square(self.forces).sum()
@@ -0,0 +1,92 @@
+import numpy as np
+
+__all__ = ['ActionMap']
+
+
+class ActionMap(object):
+    """Maps actions to the generalized forces of a skeleton: clamps the action
+    to its bounds, scales it and writes it into the actuated degrees of
+    freedom of a preallocated torque vector, without temporary arrays. With
+    an `offset`, the same affine map gives target positions for `SPDController`.
+
+    Parameters
+    ----------
+    ndofs : int
+        Number of degrees of freedom of the skeleton.
+
+    bounds : array-like, optional
+        Action bounds, in the `[upper, lower]` layout of `control_bounds`. If
+        `None`, actions are not clamped.
+
+    dofs : slice (default: all the degrees of freedom)
+        Actuated degrees of freedom, e.g. `slice(6, None)` for a skeleton with
+        a free root joint.
+
+    scale : float or array-like (default: 1.0)
+        Scale of each action dimension.
+
+    torque_limits : float or array-like, optional
+        Symmetric limits applied to the scaled torques.
+
+    offset : float or array-like (default: 0.0)
+        Added to each scaled action dimension.
+
+    Example
+    -------
+    >>> action_map = ActionMap(9, [[1.0] * 6, [-1.0] * 6], dofs=slice(3, None),
+    ...                        scale=[100, 100, 20, 100, 100, 20])
+    >>> tau = action_map(action)              # shape (9,), reused every call
+    >>> taus = action_map(actions)            # shape (N, 9) for (N, 6) actions
+    """
+    def __init__(self, ndofs, bounds=None, dofs=None, scale=1.0,
+                 torque_limits=None, offset=0.0):
+        self.ndofs = ndofs
+        self.dofs = slice(0, ndofs) if dofs is None else dofs
+        self.act_dim = len(range(ndofs)[self.dofs])
+        if bounds is None:
+            self.lower = self.upper = None
+        else:
+            self.upper = np.array(bounds[0], dtype=np.float64)
+            self.lower = np.array(bounds[1], dtype=np.float64)
+        self.scale = np.broadcast_to(np.asarray(scale, dtype=np.float64),
+                                     (self.act_dim,)).copy()
+        self.offset = np.broadcast_to(np.asarray(offset, dtype=np.float64),
+                                      (self.act_dim,)).copy()
+        if torque_limits is None:
+            self.torque_limits = None
+        else:
+            self.torque_limits = np.broadcast_to(np.asarray(torque_limits,
+                dtype=np.float64), (self.act_dim,)).copy()
+
+        self.clamped = np.zeros((self.act_dim,), dtype=np.float64)
+        self.tau = np.zeros((ndofs,), dtype=np.float64)
+
+    def clip(self, action, out=None):
+        """Clamp `action` (of shape `(act_dim,)` or `(N, act_dim)`) into `out`.
+        For a single action, `out` defaults to the `clamped` buffer."""
+        action = np.asarray(action, dtype=np.float64)
+        if out is None:
+            out = self.clamped if action.ndim == 1 else np.empty(action.shape)
+        if self.lower is None:
+            np.copyto(out, action)
+        else:
+            np.clip(action, self.lower, self.upper, out=out)
+        return out
+
+    def __call__(self, action, out=None):
+        """Torques for `action` (of shape `(act_dim,)` or `(N, act_dim)`),
+        written into `out`. For a single action, `out` defaults to the `tau`
+        buffer, which is overwritten at the next call. The entries of `out`
+        outside the actuated degrees of freedom are left untouched."""
+        action = np.asarray(action, dtype=np.float64)
+        if out is None:
+            out = self.tau if action.ndim == 1 else \
+                np.zeros(action.shape[:-1] + (self.ndofs,))
+        actuated = out[..., self.dofs]
+        np.multiply(self.clip(action), self.scale, out=actuated)
+        if self.offset.any():
+            actuated += self.offset
+        if self.torque_limits is not None:
+            np.clip(actuated, -self.torque_limits, self.torque_limits,
+                    out=actuated)
+        return out
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+__all__ = ['replicate_skeleton', 'copy_offsets']
+
+# files already written by this process
+_replicated = {}
+
+
+def copy_offsets(count, spacing):
+    """Offsets of `count` copies `spacing` apart, centered on zero."""
+    return (np.arange(count) - (count - 1) / 2.0) * spacing
+
+
+def replicate_skeleton(path, count, spacing=0.5, axis=2, directory=None):
+    """Write a copy of the `.skel` file `path` whose last skeleton (the
+    robot) is replicated `count` times, and return the path of the new file.
+
+    The copies are named `<name>_<i>` and placed on parallel lanes, shifted
+    by `copy_offsets(count, spacing)` along `axis` (the z axis, normal to
+    the plane of planar robots, by default), so that they share the ground
+    but do not touch each other. pydart2 cannot filter collisions between
+    two skeletons, so `spacing` must exceed the width of the robot, and the
+    ground must be wide enough for all the lanes. The file is written to
+    `directory` (defaults to a directory in the temporary directory), so
+    models with relative mesh paths are not supported.
+    """
+    key = (path, count, spacing, axis, directory)
+    if key in _replicated and os.path.exists(_replicated[key]):
+        return _replicated[key]
+    tree = ET.parse(path)
+    world = tree.getroot().find('world')
+    robot = world.findall('skeleton')[-1]
+    index = list(world).index(robot)
+    world.remove(robot)
+
+    name = robot.get('name')
+    for i, offset in enumerate(copy_offsets(count, spacing)):
+        skeleton = ET.fromstring(ET.tostring(robot))
+        skeleton.set('name', '{0}_{1}'.format(name, i))
+        transformation = skeleton.find('transformation')
+        if transformation is None:
+            transformation = ET.Element('transformation')
+            transformation.text = '0 0 0 0 0 0'
+            skeleton.insert(0, transformation)
+        values = [float(value) for value in transformation.text.split()]
+        values[axis] += float(offset)
+        transformation.text = ' '.join(repr(value) for value in values)
+        world.insert(index + i, skeleton)
+
+    if directory is None:
+        directory = os.path.join(tempfile.gettempdir(), 'gym-dart-copies')
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # created concurrently, e.g. by another worker
+            if not os.path.isdir(directory):
+                raise
+    root, ext = os.path.splitext(os.path.basename(path))
+    filename = os.path.join(directory, '{0}-x{1}-{2:g}-{3}{4}'.format(root,
+        count, spacing, axis, ext))
+    # write then rename, so that concurrent workers never read a partial file
+    temporary = '{0}.{1}'.format(filename, os.getpid())
+    tree.write(temporary)
+    os.rename(temporary, filename)
+    _replicated[key] = filename
+    return filename
@@ -1,6 +1,7 @@
 # Contributors: Wenhao Yu (wyu68@gatech.edu) and Dong Xu (donghsu@gatech.edu)
 
 import os
+from copy import deepcopy
 
 from gym import error, spaces
 from gym.utils import seeding
@@ -10,27 +11,64 @@ import gym
 import six
 
 
-from gym.envs.dart.static_window import *
-from gym.envs.dart.dart_world import *
+# PyOpenGL picks its platform when pydart2 first imports it, so offscreen
+# backends have to be selected before that (see offscreen.py)
+if os.environ.get('GYM_DART_RENDER_BACKEND') in ('egl', 'osmesa'):
+    os.environ.setdefault('PYOPENGL_PLATFORM', os.environ['GYM_DART_RENDER_BACKEND'])
 
 try:
     import pydart2 as pydart
     from pydart2.gui.trackball import Trackball
-    pydart.init()
 except ImportError as e:
     raise error.DependencyNotInstalled("{}. (HINT: you need to install pydart2.)".format(e))
 
+# pydart.init() is deferred to the creation of the first DartWorld
+from gym.envs.dart.dart_world import *
+from gym.envs.dart.collision import COLLISION_DETECTORS, set_collision_profile
+from gym.envs.dart.config import RenderConfig, WorldConfig, CopyConfig, make_config
+from gym.envs.dart.control import ActionMap
+from gym.envs.dart.copies import replicate_skeleton
+from gym.envs.dart.kinematics import KinematicCache
+from gym.envs.dart.observation import ObservationSpec
+from gym.envs.dart.perturbation import PerturbationSchedule
+from gym.envs.dart.randomization import DynamicsRandomizer
+from gym.envs.dart.spd import SPDController
+from gym.envs.dart.snapshot import DartEnvState, DartStateBank, copy_fields
+from gym.envs.dart.substeps import SubstepStats
+
 
 class DartEnv(gym.Env):
     """Superclass for all Dart environments.
+
+    Besides the model and the spaces, the constructor takes the choices that
+    have to be made before the world is loaded, grouped by concern: `render`
+    (a `RenderConfig`), `world` (a `WorldConfig`) and `copies` (a
+    `CopyConfig`), each given as an instance or as a dict of its fields.
+    What the env does with its world is set afterwards, by subclasses or by
+    users, with the `set_*` methods: `set_action_map` or `set_spd_control`,
+    `set_observation_spec`, `set_dynamics_randomization`,
+    `set_perturbation`, `set_divergence_check` and `set_reset_bank`.
     """
 
+    # per-env attributes (besides the world) captured by `clone_state`
+    snapshot_fields = ()
+    # whether the env implements `_pre_step`, `_control` and `_post_step`,
+    # and resets with `reset_world`, so that copies of its robot can share a
+    # world (see `CopyConfig`)
+    supports_copies = False
+    # collision detector profile of the env (see `set_collision_profile`),
+    # or `None` to keep the detector of the model file
+    collision_profile = None
+
     def __init__(self, model_paths, frame_skip, observation_size, action_bounds, \
                  dt=0.002, obs_type="parameter", action_type="continuous", visualize=True, disableViewer=False,\
-                 screen_width=80, screen_height=45):
+                 screen_width=80, screen_height=45, render=None, world=None,
+                 copies=None):
         assert obs_type in ('parameter', 'image')
         assert action_type in ("continuous", "discrete")
-        print('pydart initialization OK')
+        render = make_config(RenderConfig, render)
+        world = make_config(WorldConfig, world)
+        copies = make_config(CopyConfig, copies)
 
         self.viewer = None
 
@@ -40,26 +78,47 @@ class DartEnv(gym.Env):
         if isinstance(model_paths, str):
             model_paths = [model_paths]
 
-        # convert everything to fullpath
-        full_paths = []
-        for model_path in model_paths:
-            if model_path.startswith("/"):
-                fullpath = model_path
-            else:
-                fullpath = os.path.join(os.path.dirname(__file__), "assets", model_path)
-            if not path.exists(fullpath):
-                raise IOError("File %s does not exist"%fullpath)
-            full_paths.append(fullpath)
-
-        if full_paths[0][-5:] == '.skel':
-            self.dart_world = DartWorld(dt, full_paths[0])
+        # convert everything to fullpath; with `world.reuse`, take a loaded
+        # world from the per-process pool if an env of the same class was
+        # closed before
+        full_paths = world_pool.resolve(model_paths, os.path.join(os.path.dirname(__file__), "assets"))
+        # with `copies.num > 1`, the robot is replicated in the world (see
+        # `CopyConfig`)
+        if copies.num > 1:
+            if not self.supports_copies:
+                raise error.Error('{0} does not support copies of its '
+                    'robot.'.format(type(self).__name__))
+            full_paths = full_paths[:-1] + (replicate_skeleton(full_paths[-1],
+                copies.num, copies.spacing),)
+        self.num_copies = copies.num
+        self.copy_index = copies.index
+        self._world_key = (type(self), full_paths, dt)
+        self._owns_world = copies.shared_world is None
+        self.reuse_world = world.reuse
+        if copies.shared_world is not None:
+            self.dart_world = copies.shared_world
+        elif world.reuse:
+            self.dart_world = world_pool.acquire(self._world_key, dt, full_paths)
         else:
-            self.dart_world = DartWorld(dt)
-            for fullpath in full_paths:
-                self.dart_world.add_skeleton(fullpath)
-
-
-        self.robot_skeleton = self.dart_world.skeletons[-1] # assume that the skeleton of interest is always the last one
+            self.dart_world = world_pool.load(dt, full_paths)
+        # contacts are read from `dart_world.contacts`; building one `Contact`
+        # object per contact in `dart_world.collision_result` is opt-in
+        self.dart_world.legacy_contacts = world.legacy_contacts
+
+        # assume that the skeleton of interest is always the last one (or
+        # the last `num_copies` ones)
+        skeletons = self.dart_world.skeletons
+        self.robot_skeleton = skeletons[len(skeletons) - copies.num + copies.index]
+
+        if world.collision_profile is not None:
+            self.collision_profile = world.collision_profile
+        if self.collision_profile is not None and self._owns_world:
+            self.collision_detector = set_collision_profile(self.dart_world,
+                self.collision_profile, key=full_paths)
+        else:
+            detector = self.dart_world.collision_detector()
+            self.collision_detector = dict((v, k) for k, v in
+                COLLISION_DETECTORS.items()).get(detector, detector)
 
         for jt in range(0, len(self.robot_skeleton.joints)):
             for dof in range(len(self.robot_skeleton.joints[jt].dofs)):
@@ -70,16 +129,63 @@ class DartEnv(gym.Env):
         self.frame_skip= frame_skip
         self.visualize = visualize  #Show the window or not
         self.disableViewer = disableViewer
-
-        # random perturbation
+        # in headless mode the GL context is only created on the first render()
+        headless = render.headless
+        if headless is None:
+            headless = os.environ.get('GYM_DART_HEADLESS', '0').lower() not in ('', '0', 'false')
+        self.headless = headless
+        # 'glut' (default), or an offscreen backend: 'egl' or 'osmesa'
+        render_backend = render.backend
+        if render_backend is None:
+            render_backend = os.environ.get('GYM_DART_RENDER_BACKEND', 'glut')
+        self.render_backend = render_backend
+        self.pipelined_readback = render.pipelined_readback
+
+        # random perturbation: a `PerturbationSchedule` (see
+        # `set_perturbation`), sampled at every reset from `np_random`, or
+        # built from `perturbation_parameters` if `add_perturbation` is set
         self.add_perturbation = False
-        self.perturbation_parameters = [0.05, 5, 2] # probability, magnitude, bodyid, duration
-        self.perturbation_duration = 40
-        self.perturb_force = np.array([0, 0, 0])
+        self.perturbation_parameters = [0.05, 5, 2, 1] # probability, magnitude, bodyid, duration
+        self.perturbation = None
+
+        # domain randomization: a `DynamicsRandomizer` (see
+        # `set_dynamics_randomization`), sampled at every reset from
+        # `np_random` or from `dynamics_table`
+        self.dynamics = None
+        self.dynamics_table = None
+        self._dynamics_episode = 0
 
         #assert not done
         self.obs_dim = observation_size
         self.act_dim = len(action_bounds[0])
+        self.action_bounds = np.array(action_bounds, dtype=np.float64)
+        self.action_map = None
+        # 'torque': actions are torques, 'spd': actions are target positions
+        # tracked by a stable PD controller (see `set_spd_control`)
+        self.control_mode = 'torque'
+        self.spd = None
+        self.kinematics = None
+        # callables run before every frame of `do_simulation`, e.g. to add
+        # external forces (DART clears them after every frame)
+        self.frame_hooks = []
+        # `SubstepStats` updated over the frames of every step, if any
+        self.substep_stats = None
+        # if set, the state is checked every `divergence_check` frames (see
+        # `set_divergence_check`)
+        self.divergence_check = None
+        self.max_velocity = None
+        self.diverged = False
+        # compiled `observation_spec`, used by the default `_get_obs`
+        self._obs_plan = None
+        # if set, e.g. to a row of a batch of observations, `_get_obs`
+        # writes the observations there
+        self.obs_out = None
+        # if set, a `DartStateBank` of start states: resets restore one of them
+        # instead of calling `reset_model` (see `harvest_reset_states`)
+        self.reset_bank = None
+        self._episode_fields = ()
+        # buffers of `step_many`, grown to the longest action sequence
+        self._rollout_buffers = None
 
         # for discrete instances, action_space should be defined in the subclass
         if action_type == "continuous":
@@ -92,7 +198,8 @@ class DartEnv(gym.Env):
         # in image learning
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self._get_viewer()
+        if not self.headless:
+            self._get_viewer()
         # Give different observation space for different kind of envs
         if self._obs_type == 'parameter':
             high = np.inf*np.ones(self.obs_dim)
@@ -110,7 +217,8 @@ class DartEnv(gym.Env):
 
         self.metadata = {
             'render.modes': ['human', 'rgb_array'],
-            'video.frames_per_second' : int(np.round(1.0 / self.dt))
+            'video.frames_per_second' : int(np.round(1.0 / self.dt)),
+            'collision_detector': self.collision_detector,
         }
 
 
@@ -138,41 +246,354 @@ class DartEnv(gym.Env):
     # -----------------------------
 
     def reset(self):
-        self.perturbation_duration = 0
-        ob = self.reset_model()
+        self.diverged = False
+        dynamics = self._get_dynamics()
+        if dynamics is not None:
+            if self.dynamics_table is not None:
+                sample = self.dynamics_table[self._dynamics_episode % len(self.dynamics_table)]
+                self._dynamics_episode += 1
+            else:
+                sample = dynamics.sample(self.np_random)
+            dynamics.apply(sample)
+        if self.reset_bank is not None and len(self.reset_bank) > 0 and self.num_copies == 1:
+            self.restore_state(self.reset_bank.sample(self.np_random))
+            ob = self._get_obs()
+        else:
+            ob = self.reset_model()
+        # the episode fields of the states harvested by `add_reset_state`
+        self._episode_fields = copy_fields(self, self.snapshot_fields)
+        if self.add_perturbation and self.perturbation is None:
+            probability, magnitude, bodyid, duration = self.perturbation_parameters
+            self.perturbation = PerturbationSchedule([bodyid], probability,
+                                                     magnitude, duration)
+        if self.perturbation is not None:
+            self.perturbation.sample(self.np_random)
         return ob
 
     def set_state(self, qpos, qvel):
         assert qpos.shape == (self.robot_skeleton.ndofs,) and qvel.shape == (self.robot_skeleton.ndofs,)
         self.robot_skeleton.set_positions(qpos)
         self.robot_skeleton.set_velocities(qvel)
+        self.dart_world.state_version += 1
 
     def set_state_vector(self, state):
         self.robot_skeleton.set_positions(state[0:int(len(state)/2)])
         self.robot_skeleton.set_velocities(state[int(len(state)/2):])
+        self.dart_world.state_version += 1
+
+    def cache_kinematics(self, bodynodes=()):
+        """Create `self.kinematics`, a `KinematicCache` of `robot_skeleton`
+        with the centers of mass and transforms of `bodynodes`."""
+        self.kinematics = KinematicCache(self.robot_skeleton, self.dart_world,
+                                         bodynodes)
+        return self.kinematics
 
     @property
     def dt(self):
         return self.dart_world.dt * self.frame_skip
 
-    def do_simulation(self, tau, n_frames):
-        if self.add_perturbation:
-            if self.perturbation_duration == 0:
-                self.perturb_force *= 0
-                if np.random.random() < self.perturbation_parameters[0]:
-                    axis_rand = np.random.randint(0, 2, 1)[0]
-                    direction_rand = np.random.randint(0, 2, 1)[0] * 2 - 1
-                    self.perturb_force[axis_rand] = direction_rand * self.perturbation_parameters[1]
-
-            else:
-                self.perturbation_duration -= 1
-
-        for _ in range(n_frames):
-            if self.add_perturbation:
-                self.robot_skeleton.bodynodes[self.perturbation_parameters[2]].add_ext_force(self.perturb_force)
+    def set_action_map(self, dofs=None, scale=1.0, clip=True, torque_limits=None):
+        """Declare how actions map to the torques of `robot_skeleton`: clamped
+        to the action bounds (if `clip`), scaled by `scale` and written into
+        the degrees of freedom `dofs`. See `ActionMap`."""
+        self.control_mode = 'torque'
+        self.spd = None
+        self.action_map = ActionMap(self.robot_skeleton.ndofs,
+                                    self.action_bounds if clip else None,
+                                    dofs=dofs, scale=scale,
+                                    torque_limits=torque_limits)
+        return self.action_map
+
+    def set_spd_control(self, kp, kd, dofs=None, torque_limits=None, dt=None):
+        """Use actions as target positions of the degrees of freedom `dofs`,
+        tracked by an `SPDController` with time step `dt` (defaults to the
+        time step of the world). Actions are mapped affinely from the action
+        bounds to the joint limits (to the action itself for unlimited DOFs).
+        `kp`, `kd` give the gains of all DOFs or of the actuated ones.
+
+        The targets returned by `action_map` are passed to `do_simulation` in
+        place of the torques, and the SPD torques are recomputed every frame.
+        """
+        skel = self.robot_skeleton
+        ndofs = skel.ndofs
+        dofs = slice(0, ndofs) if dofs is None else dofs
+        lower, upper = np.array(skel.q_lower)[dofs], np.array(skel.q_upper)[dofs]
+        limited = np.isfinite(lower) & np.isfinite(upper)
+        bounds_range = self.action_bounds[0] - self.action_bounds[1]
+        scale = np.where(limited, (upper - lower) / bounds_range, 1.0)
+        offset = np.where(limited, lower - self.action_bounds[1] * scale, 0.0)
+        self.action_map = ActionMap(ndofs, self.action_bounds, dofs=dofs,
+                                    scale=scale, offset=offset)
+
+        gains = []
+        for gain in (kp, kd):
+            gain = np.asarray(gain, dtype=np.float64)
+            if gain.size != ndofs:
+                actuated = gain
+                gain = np.zeros(ndofs)
+                gain[dofs] = actuated
+            gains.append(gain)
+        self.spd = SPDController(gains[0], gains[1],
+                                 self.dart_world.dt if dt is None else dt,
+                                 torque_limits=torque_limits, dofs=dofs)
+        self.control_mode = 'spd'
+        return self.action_map
+
+    def set_dynamics_randomization(self, offsets=None, factors=None):
+        """Randomize the physical parameters of `robot_skeleton` at every
+        reset, with offsets or factors drawn from the ranges `offsets` and
+        `factors` (see `DynamicsRandomizer`). Call it after `set_action_map`
+        to randomize the gains."""
+        if self.dynamics is not None:
+            self.dynamics.restore()
+        self.dynamics = DynamicsRandomizer(self.robot_skeleton, offsets,
+                                           factors, action_map=self.action_map,
+                                           spd=self.spd)
+        return self.dynamics
+
+    def set_dynamics_table(self, table):
+        """Take the samples of the dynamics parameters of the next episodes
+        from the rows of `table`, of shape `(num_episodes, size)` (e.g. one
+        slice of `DynamicsRandomizer.sample_table`), cycling through them.
+        If `table` is `None`, sample them from `np_random` again."""
+        if table is not None:
+            table = np.asarray(table, dtype=np.float64)
+            dynamics = self._get_dynamics()
+            if dynamics is None:
+                raise error.Error('The dynamics of the environment are not '
+                    'randomized, see `set_dynamics_randomization`.')
+            if table.ndim != 2 or table.shape[1] != dynamics.size:
+                raise error.Error('The table of dynamics parameters must have '
+                    'shape (num_episodes, {0}).'.format(dynamics.size))
+        self.dynamics_table = table
+        self._dynamics_episode = 0
+
+    def _get_dynamics(self):
+        return self.dynamics
+
+    def set_perturbation(self, perturbation):
+        """Push the robot with the `PerturbationSchedule` `perturbation`,
+        sampled at every reset from `np_random`, or stop pushing it if
+        `None`."""
+        self.perturbation = perturbation
+        return perturbation
+
+    def set_divergence_check(self, every, max_velocity=1e3):
+        """Check the state every `every` frames (and after the last frame of
+        a step), and stop a step as soon as it is not finite or a velocity
+        exceeds `max_velocity`; the transition is then terminal (see
+        `_finish_step`). If `every` is `None`, stop checking."""
+        self.divergence_check = every
+        self.max_velocity = max_velocity
+
+    def _set_forces(self, tau):
+        """Apply the control for one frame: `tau` are the torques, or the
+        target positions in SPD control mode."""
+        if self.spd is not None:
+            tau = self.spd(self.robot_skeleton, tau)
+        self.robot_skeleton.set_forces(tau)
+
+    def set_observation_spec(self, spec):
+        """Assemble the observations from the `ObservationSpec` `spec`,
+        through the default `_get_obs`."""
+        plan = spec.compile(self.robot_skeleton.ndofs)
+        if plan.size != self.obs_dim:
+            raise error.Error('The observation spec has size {0}, expected '
+                '{1}.'.format(plan.size, self.obs_dim))
+        self.observation_spec = spec
+        self._obs_plan = plan
+
+    def _get_obs(self, out=None):
+        """Observation assembled from `observation_spec` into `out`, else into
+        `obs_out`, else into a new array."""
+        if self._obs_plan is None:
+            raise NotImplementedError
+        if out is None:
+            out = self.obs_out if self.obs_out is not None else np.empty(self._obs_plan.size)
+        if self.kinematics is not None:
+            q, dq = self.kinematics.q, self.kinematics.dq
+        else:
+            q, dq = self.robot_skeleton.q, self.robot_skeleton.dq
+        return self._obs_plan.write(out, q, dq, self)
+
+    def _frame_controls(self, tau):
+        """Torques to hold over the frames of a step (`None` if they change
+        every frame) and per-frame hook (`None` if not needed), for the
+        torques or SPD targets `tau`."""
+        hooks = list(self.frame_hooks)
+        if self.perturbation is not None:
+            pushed, force = self.perturbation.next()
+            if pushed >= 0:
+                bodynode = self.robot_skeleton.bodynodes[pushed]
+                hooks.append(lambda: bodynode.add_ext_force(force))
+        if self.spd is not None:
+            skel, spd = self.robot_skeleton, self.spd
+            # the SPD torques depend on the state: recomputed every frame
+            hooks.append(lambda: skel.set_forces(spd(skel, tau)))
+            tau = None
+
+        if not hooks:
+            return tau, None
+        elif len(hooks) == 1:
+            return tau, hooks[0]
+        def hook():
+            for fn in hooks:
+                fn()
+        return tau, hook
 
-            self.robot_skeleton.set_forces(tau)
-            self.dart_world.step()
+    def do_simulation(self, tau, n_frames):
+        """Advance `n_frames` frames under the torques (or SPD targets)
+        `tau`, calling a per-frame hook only if the env needs one."""
+        tau, hook = self._frame_controls(tau)
+        guard = None if self.divergence_check is None else self._check_divergence
+        self.dart_world.step_frames(n_frames, self.robot_skeleton, tau,
+            hook=hook, stats=self.substep_stats, guard=guard,
+            guard_every=self.divergence_check or 1)
+
+    def step_copies(self, copies, actions):
+        """Step the envs `copies`, which drive the copies of the robot in the
+        world of this env, with one action each, advancing the world once
+        for all of them. Returns the list of their transitions.
+
+        The divergence check and the substep statistics are not applied."""
+        pres = [env._pre_step() for env in copies]
+        controls = []
+        for env, action in zip(copies, actions):
+            tau, hook = env._frame_controls(env._control(action))
+            controls.append((env.robot_skeleton, tau, hook))
+        def hook():
+            for skel, tau, fn in controls:
+                if tau is not None:
+                    skel.set_forces(tau)
+                if fn is not None:
+                    fn()
+        self.dart_world.step_frames(self.frame_skip, hook=hook)
+        return [env._post_step(action, pre)
+                for env, action, pre in zip(copies, actions, pres)]
+
+    def reset_world(self):
+        """Reset the world, or only the robot if its world is shared with
+        copies of it driven by other envs."""
+        if self.num_copies == 1:
+            self.dart_world.reset()
+            return
+        skel = self.robot_skeleton
+        start = sum(2 * s.ndofs for s in self.dart_world.skeletons[:skel.id])
+        x = self.dart_world.initial_state.x[start:start + 2 * skel.ndofs]
+        self.set_state(x[:skel.ndofs], x[skel.ndofs:])
+
+    def track_substeps(self, other_skel_id=None):
+        """Create `self.substep_stats`, a `SubstepStats` of `robot_skeleton`
+        accumulated over the frames of every step."""
+        self.substep_stats = SubstepStats(self.robot_skeleton, other_skel_id)
+        return self.substep_stats
+
+    def _check_divergence(self):
+        """Guard of `do_simulation`: flag the step as `diverged` if the state
+        is not finite or a velocity exceeds `max_velocity`."""
+        x = self.robot_skeleton.x
+        if not (np.isfinite(x).all() and
+                np.abs(x[self.robot_skeleton.ndofs:]).max() < self.max_velocity):
+            self.diverged = True
+        return self.diverged
+
+    def step_many(self, actions):
+        """Run the actions `actions`, of shape `(T, act_dim)`, one step
+        each, and stop at the first terminal step.
+
+        Returns
+        -------
+        observations : `np.ndarray` instance
+            The `(n, obs_dim)` observations of the `n <= T` steps run.
+
+        rewards : `np.ndarray` instance (dtype `np.float_`)
+            The rewards of the steps.
+
+        dones : `np.ndarray` instance (dtype `np.bool_`)
+            Whether each step is terminal (only the last one can be).
+
+        infos : dict
+            The scalar entries of the infos of the steps, as arrays of size
+            `n` (zero for the steps where an entry is missing).
+
+        The arrays are views of buffers reused by the next call. This bypasses
+        the wrappers of the env: episodes are not truncated by `TimeLimit`.
+        """
+        num_steps = len(actions)
+        buffers = self._rollout_buffers
+        if buffers is None or len(buffers[1]) < num_steps:
+            buffers = self._rollout_buffers = (
+                np.zeros((num_steps,) + self.observation_space.shape),
+                np.zeros((num_steps,), dtype=np.float64),
+                np.zeros((num_steps,), dtype=np.bool_))
+        observations, rewards, dones = buffers
+        infos = {}
+        obs_out, n = self.obs_out, 0
+        try:
+            while n < num_steps:
+                if self._obs_plan is not None:
+                    # the observation is written straight into the buffer
+                    self.obs_out = observations[n]
+                ob, rewards[n], dones[n], info = self.step(actions[n])
+                observations[n] = ob
+                for key, value in info.items():
+                    if np.isscalar(value):
+                        if key not in infos:
+                            infos[key] = np.zeros((num_steps,),
+                                                  dtype=np.asarray(value).dtype)
+                        infos[key][n] = value
+                n += 1
+                if dones[n - 1]:
+                    break
+        finally:
+            self.obs_out = obs_out
+        return (observations[:n], rewards[:n], dones[:n],
+                dict((key, column[:n]) for key, column in infos.items()))
+
+    def _finish_step(self, ob, reward, done, info):
+        """Transition returned by `step`. If the simulation diverged during
+        the step, it is terminal, flagged with `info['diverged']`, and its
+        observation and reward are made finite, so that vector environments
+        reset it right away."""
+        if self.diverged:
+            info['diverged'] = True
+            ob = np.nan_to_num(ob)
+            reward = reward if np.isfinite(reward) else 0.0
+            done = True
+        return ob, reward, done, info
+
+    def close(self):
+        """Close the viewer and, with `WorldConfig.reuse`, give the world back
+        to the per-process pool, so that the next env of this class does not
+        parse the model again."""
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+        if getattr(self, 'dart_world', None) is not None and not self._owns_world:
+            # the world belongs to the env driving the first copy
+            self.dart_world = None
+        if getattr(self, 'dart_world', None) is not None:
+            if self.dynamics is not None:
+                # pooled worlds are reused with their nominal parameters
+                self.dynamics.restore()
+            if self.reuse_world:
+                world_pool.release(self._world_key, self.dart_world)
+            self.dart_world = None
+
+    @classmethod
+    def prewarm(cls, count=1, **kwargs):
+        """Load `count` worlds for this env class into the per-process pool,
+        for the envs created with `WorldConfig.reuse`. Call it before forking
+        workers (e.g. `AsyncVectorEnv` with the `fork` context), so that they
+        start from the parent's worlds."""
+        kwargs = dict(kwargs)
+        render = make_config(RenderConfig, kwargs.pop('render', None))
+        world = make_config(WorldConfig, kwargs.pop('world', None))
+        envs = [cls(render=render._replace(headless=True),
+                    world=world._replace(reuse=True), **kwargs)
+                for _ in range(count)]
+        for env in envs:
+            env.close()
 
     def render(self, mode='human', close=False):
         if not self.disableViewer:
@@ -190,8 +611,14 @@ class DartEnv(gym.Env):
             self._get_viewer().runSingleStep()
 
     def getViewer(self, sim, title=None):
-        # glutInit(sys.argv)
-        win = StaticGLUTWindow(sim, title)
+        if self.render_backend == 'glut':
+            # glutInit(sys.argv)
+            from gym.envs.dart.static_window import StaticGLUTWindow
+            win = StaticGLUTWindow(sim, title)
+        else:
+            from gym.envs.dart.offscreen import OffscreenWindow
+            win = OffscreenWindow(sim, title, backend=self.render_backend,
+                                  pipelined=self.pipelined_readback)
         win.scene.add_camera(Trackball(theta=-45.0, phi = 0.0, zoom=0.1), 'gym_camera')
         win.scene.set_camera(win.scene.num_cameras()-1)
 
@@ -213,3 +640,73 @@ class DartEnv(gym.Env):
             self.robot_skeleton.q,
             self.robot_skeleton.dq
         ])
+
+    def clone_state(self):
+        """Clone the state of the world and of the env fields listed in
+        `snapshot_fields`, without the random number generator. Restoring this
+        state will *not* give an identical environment. For complete cloning
+        and restoring of the full state, see `{clone,restore}_full_state()`."""
+        perturbation = None
+        if self.perturbation is not None:
+            perturbation = self.perturbation.get_state()
+        return DartEnvState(self.dart_world.clone_state(), None, perturbation,
+                            copy_fields(self, self.snapshot_fields))
+
+    def restore_state(self, state):
+        """Restore a snapshot taken with `clone_state` or `clone_full_state`,
+        leaving the random number generator untouched."""
+        self.dart_world.restore_state(state.world)
+        if state.perturbation is not None and self.perturbation is not None:
+            self.perturbation.set_state(state.perturbation)
+        for name, value in state.fields:
+            setattr(self, name, deepcopy(value))
+
+    def clone_full_state(self):
+        """Clone the state of the world, the env fields and the random number
+        generator. Restoring this state will give an identical environment."""
+        return self.clone_state()._replace(np_random=self.np_random.get_state())
+
+    def restore_full_state(self, state):
+        """Restore a snapshot taken with `clone_full_state`."""
+        self.restore_state(state)
+        if state.np_random is not None:
+            self.np_random.set_state(state.np_random)
+
+    def make_state_bank(self, capacity=64):
+        """Create an empty `DartStateBank` sized for this environment."""
+        return DartStateBank(len(self.dart_world.states()), capacity=capacity)
+
+    def set_reset_bank(self, bank):
+        """Start the next episodes from states drawn from the `DartStateBank`
+        `bank` with `np_random`, written directly into the world, instead of
+        calling `reset_model`. If `bank` is `None` (or empty), `reset_model`
+        is used again."""
+        self.reset_bank = bank
+        return bank
+
+    def harvest_reset_states(self, num_states, settle_frames=0, bank=None):
+        """Fill a bank of start states (a new one if `bank` is `None`) with
+        `num_states` states given by `reset_model`, each optionally settled
+        for `settle_frames` frames under zero torques, and reset from it."""
+        if bank is None:
+            bank = self.make_state_bank(capacity=num_states)
+        self.reset_bank = None
+        zeros = np.zeros(self.robot_skeleton.ndofs)
+        for _ in range(num_states):
+            self.reset()
+            if settle_frames > 0:
+                self.dart_world.step_frames(settle_frames, self.robot_skeleton,
+                                            zeros)
+            bank.append(self.clone_state()._replace(perturbation=None))
+        return self.set_reset_bank(bank)
+
+    def add_reset_state(self, bank=None):
+        """Add the current state of the world, e.g. of a rollout, to `bank`
+        (defaults to `reset_bank`, created if needed) as a start state, with
+        the env fields it had at the start of the episode."""
+        if bank is None:
+            if self.reset_bank is None:
+                self.reset_bank = self.make_state_bank()
+            bank = self.reset_bank
+        return bank.append(DartEnvState(self.dart_world.clone_state(), None,
+                                        None, self._episode_fields))
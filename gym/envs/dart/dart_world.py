@@ -1,12 +1,126 @@
+import os
+
 import pydart2 as pydart
+from pydart2 import pydart2_api as papi
 import numpy as np
+from collections import defaultdict
+
+from gym import logger
+from gym.envs.dart.contacts import ContactSummary
+from gym.envs.dart.snapshot import DartWorldState, freeze
+
+_pydart_initialized = False
+
+
+def init_pydart():
+    """Initialize pydart2 once per process. Called lazily by `DartWorld`, so
+    that importing the Dart environments does not load DART."""
+    global _pydart_initialized
+    if not _pydart_initialized:
+        pydart.init()
+        _pydart_initialized = True
+        logger.debug('pydart initialization OK')
+
 
 # custom pydart world
 class DartWorld(pydart.World):
     def __init__(self, *args, **kwargs):
+        init_pydart()
+        # contacts of the last step, fetched from DART on first access
+        self._contacts = ContactSummary()
+        self._contacts_stale = False
+        # whether `collision_result` (one `Contact` object per contact) is
+        # built every step; envs that use `contacts` can turn it off
+        self.legacy_contacts = True
+        # incremented whenever the state of the skeletons may have changed,
+        # to invalidate the `KinematicCache`s of the world
+        self.state_version = 0
         pydart.World.__init__(self, *args, **kwargs)
         self.arrows = [] # [from, to]
 
+    def step(self):
+        for skel in self.skeletons:
+            if skel.controller is not None:
+                skel.tau = skel.controller.compute()
+
+        papi.world__step(self.id)
+        self._frame += 1
+        self.state_version += 1
+        self._contacts_stale = True
+        if self.legacy_contacts:
+            self.collision_result.update()
+        if self.recording:
+            self.recording.bake()
+
+    def step_frames(self, n_frames, skel=None, tau=None, hook=None,
+                    stats=None, guard=None, guard_every=1):
+        """Advance `n_frames` frames, holding the torques `tau` of `skel`
+        (DART clears them after every frame). `hook`, if given, is called
+        before every frame, after the torques are set, e.g. to add external
+        forces or to recompute the torques. If `stats` (a `SubstepStats`) is
+        given, it is updated after every frame. If `guard` is given, it is
+        called every `guard_every` frames and after the last frame, and the
+        step stops as soon as it returns `True`. Returns the number of frames
+        advanced.
+
+        DART has no multi-frame step, so this is still one `world__step` call
+        per frame; it only saves the per-frame overhead of `step`."""
+        wid = self.id
+        world_step = papi.world__step
+        set_forces = papi.skeleton__setForces
+        controlled = [s for s in self.skeletons if s.controller is not None]
+        if stats is not None:
+            stats.begin(n_frames)
+        frames = 0
+        while frames < n_frames:
+            for s in controlled:
+                s.tau = s.controller.compute()
+            if tau is not None:
+                set_forces(wid, skel.id, tau)
+            if hook is not None:
+                hook()
+            world_step(wid)
+            self._contacts_stale = True
+            self.state_version += 1
+            if self.recording:
+                self.recording.bake()
+            if stats is not None:
+                stats.record(self)
+            frames += 1
+            if guard is not None and (frames % guard_every == 0 or
+                                      frames == n_frames) and guard():
+                break
+        self._frame += frames
+        if tau is not None:
+            # what `skel.forces()` returns, as after `skel.set_forces`; a
+            # copy, since `tau` is usually a buffer reused by the next step
+            skel._tau = tau.copy()
+        if self.legacy_contacts:
+            # only the contacts of the last frame are kept
+            self.collision_result.update()
+        return frames
+
+    @property
+    def contacts(self):
+        """`ContactSummary` of the last step. The contacts are only copied
+        out of DART when this is first accessed after a step."""
+        if self._contacts_stale:
+            n = papi.collisionresult__getNumContacts(self.id)
+            self._contacts.update(papi.collisionresult__getContacts(self.id, n * 10)
+                                  if n > 0 else ())
+            self._contacts_stale = False
+        return self._contacts
+
+    def render_contacts(self, render_contact_size=0.01,
+                        render_contact_force_scale=-0.005):
+        if self.legacy_contacts:
+            pydart.World.render_contacts(self, render_contact_size,
+                                         render_contact_force_scale)
+            return
+        for row in self.contacts.raw:
+            papi.collisionresult__renderContact(row[:6], render_contact_size,
+                                                render_contact_force_scale)
+
     def on_key_press(self, key):
         pass
 
@@ -17,6 +131,159 @@ class DartWorld(pydart.World):
             ri.set_color(1.0, 0.0, 0.0)
             ri.render_arrow(p0, p1, r_base=0.025, head_width=0.05, head_len=0.1)
 
+    def set_states(self, _x):
+        pydart.World.set_states(self, _x)
+        self.state_version += 1
+
     def reset(self):
         self.arrows = []
-        pydart.World.reset(self)
\ No newline at end of file
+        pydart.World.reset(self)
+        self.state_version += 1
+        self._contacts.update(())
+        self._contacts_stale = False
+
+    def clone_state(self):
+        """Snapshot the time, frame and the state of every skeleton."""
+        return DartWorldState(self.time(), self.frame, freeze(self.states()))
+
+    def restore_state(self, state):
+        """Restore a snapshot taken with `clone_state`."""
+        self.set_states(state.x)
+        papi.world__setTime(self.id, state.time)
+        self._frame = state.frame
+        # the contacts of the last step do not hold for the restored state
+        self._contacts.update(())
+        self._contacts_stale = False
+
+
+# settings of a world and of its skeletons that environments may change after
+# loading it (e.g. friction, collision checks), as `(getter, setter)` names
+# per level, restored by `DartWorldPool.release`
+_WORLD_SETTINGS = (('gravity', 'set_gravity'),)
+_SKELETON_SETTINGS = (('self_collision_check', 'set_self_collision_check'),
+                      ('adjacent_body_check', 'set_adjacent_body_check'),
+                      ('is_mobile', 'set_mobile'))
+_BODYNODE_SETTINGS = (('mass', 'set_mass'),
+                      ('friction_coeff', 'set_friction_coeff'),
+                      ('restitution_coeff', 'set_restitution_coeff'),
+                      ('is_collidable', 'set_collidable'))
+_JOINT_SETTINGS = (('is_position_limit_enforced', 'set_position_limit_enforced'),)
+_DOF_SETTINGS = (('damping_coefficient', 'set_damping_coefficient'),
+                 ('spring_stiffness', 'set_spring_stiffness'),
+                 ('coulomb_friction', 'set_coulomb_friction'))
+
+
+def _setting_levels(world):
+    # the objects of each level of `world`, with their settings
+    yield [world], _WORLD_SETTINGS
+    for skel in world.skeletons:
+        yield [skel], _SKELETON_SETTINGS
+        yield skel.bodynodes, _BODYNODE_SETTINGS
+        yield skel.joints, _JOINT_SETTINGS
+        yield skel.dofs, _DOF_SETTINGS
+
+
+def read_settings(world):
+    """The settings of `world` and of its skeletons (gravity, collision
+    checks, masses, friction, damping, ...), to be restored with
+    `write_settings`."""
+    return [[[getattr(obj, getter)() for (getter, _) in settings]
+             for obj in objects] for (objects, settings) in _setting_levels(world)]
+
+
+def write_settings(world, values):
+    """Restore the settings of `world` read with `read_settings`."""
+    for (objects, settings), rows in zip(_setting_levels(world), values):
+        for obj, row in zip(objects, rows):
+            for (_, setter), value in zip(settings, row):
+                getattr(obj, setter)(value)
+
+
+class DartWorldPool(object):
+    """Per-process pool of loaded worlds, for reuse.
+
+    Parsing a `.skel` file and its meshes dominates the construction of an
+    environment, and pydart2 cannot copy a world. Environments created with
+    `WorldConfig(reuse=True)` put their world back in this pool when they
+    are closed, and take a pooled world when one is available: only closed
+    environments save a parse, environments alive at the same time each
+    load their own world.
+
+    Released worlds are put back in the state and with the settings they
+    had when they were loaded (see `read_settings`), and the constraints
+    added to them are removed, so that the next environment can set them up
+    again. Worlds are keyed by the class of the owning environment, the
+    model files and the time step.
+
+    The pool survives `fork`: pre-warming it (see `DartEnv.prewarm`) before
+    starting the workers of a vector environment lets every worker reuse a
+    copy of the parent's worlds instead of parsing its own.
+    """
+    def __init__(self):
+        self._worlds = defaultdict(list)
+        self._full_paths = {}
+
+    def resolve(self, model_paths, assets_dir):
+        """Full paths of `model_paths`, relative to `assets_dir` unless
+        absolute. Results are cached to avoid hitting the filesystem."""
+        key = (tuple(model_paths), assets_dir)
+        if key not in self._full_paths:
+            full_paths = []
+            for model_path in model_paths:
+                if model_path.startswith("/"):
+                    fullpath = model_path
+                else:
+                    fullpath = os.path.join(assets_dir, model_path)
+                if not os.path.exists(fullpath):
+                    raise IOError("File %s does not exist"%fullpath)
+                full_paths.append(fullpath)
+            self._full_paths[key] = tuple(full_paths)
+        return self._full_paths[key]
+
+    def load(self, dt, full_paths):
+        """Load a new world from `full_paths`, recording its initial state
+        and settings."""
+        world = load_world(dt, full_paths)
+        world.initial_state = world.clone_state()
+        world.initial_settings = read_settings(world)
+        return world
+
+    def acquire(self, key, dt, full_paths):
+        """Return a pooled world for `key`, or a new world loaded from
+        `full_paths` if there is none."""
+        if self._worlds[key]:
+            return self._worlds[key].pop()
+        return self.load(dt, full_paths)
+
+    def release(self, key, world):
+        """Reset `world` to its initial state and settings, without the
+        constraints added to it, and put it back in the pool."""
+        world.remove_all_constraints()
+        write_settings(world, world.initial_settings)
+        world.reset()
+        world.restore_state(world.initial_state)
+        self._worlds[key].append(world)
+
+    def size(self, key=None):
+        if key is None:
+            return sum(len(worlds) for worlds in self._worlds.values())
+        return len(self._worlds[key])
+
+    def clear(self):
+        for worlds in self._worlds.values():
+            for world in worlds:
+                world.destroy()
+        self._worlds.clear()
+
+
+world_pool = DartWorldPool()
+
+
+def load_world(dt, full_paths):
+    """Load a world from a `.skel` file, or from a list of skeleton files."""
+    if full_paths[0][-5:] == '.skel':
+        return DartWorld(dt, full_paths[0])
+    world = DartWorld(dt)
+    for fullpath in full_paths:
+        world.add_skeleton(fullpath)
+    return world
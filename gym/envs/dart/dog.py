@@ -4,27 +4,23 @@ __author__ = 'yuwenhao'
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 
 class DartDogEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0]*16,[-1.0]*16])
         self.action_scale = 200
         obs_dim = 43
 
-        dart_env.DartEnv.__init__(self, 'dog.skel', 4, obs_dim, self.control_bounds, disableViewer=False)
+        dart_env.DartEnv.__init__(self, 'dog.skel', 4, obs_dim, self.control_bounds, disableViewer=False, **kwargs)
+        self.set_action_map(dofs=slice(6, None), scale=self.action_scale)
+        self.set_observation_spec(ObservationSpec().q(1).dq(clip=10))
 
-        utils.EzPickle.__init__(self)
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[6:] = clamped_control * self.action_scale
+        tau = self.action_map(a)
 
         posbefore = self.robot_skeleton.bodynodes[0].com()[0]
         self.do_simulation(tau, self.frame_skip)
@@ -42,15 +38,7 @@ class DartDogEnv(dart_env.DartEnv, utils.EzPickle):
                     (height > .7) and (height < 1.8) and (side_deviation < .4))
         ob = self._get_obs()
 
-        return ob, reward, done, {}
-
-    def _get_obs(self):
-        state =  np.concatenate([
-            self.robot_skeleton.q[1:],
-            np.clip(self.robot_skeleton.dq,-10,10)
-        ])
-
-        return state
+        return self._finish_step(ob, reward, done, {})
 
     def reset_model(self):
         self.dart_world.reset()
@@ -0,0 +1,78 @@
+import numpy as np
+
+__all__ = ['FluidDrag']
+
+
+class FluidDrag(object):
+    """Viscous drag of a fluid on thin plates, e.g. the links of a swimmer.
+
+    Every body node is a plate whose normal is one axis of its frame. The
+    fluid resists the motion of the plate along its normal, with a force at
+    the center of mass
+
+        F = -coefficient (v . n) n
+
+    where `v` is the linear velocity of the center of mass, in the frame of
+    the body node (the last three entries of `com_spatial_velocity`, as in
+    the original swimmer envs), and `n` the normal in world frame. The
+    velocities and normals of all the body nodes are read
+    into preallocated arrays and the forces are computed for all of them at
+    once; `compute` only works on these arrays.
+
+    Parameters
+    ----------
+    bodynodes : list of `pydart.BodyNode`
+        The plates.
+
+    coefficient : float or array-like (default: 50.0)
+        Drag coefficient, shared or one per body node.
+
+    normal_axis : int (default: 2)
+        Axis (0, 1, 2 for x, y, z) of the frame of the body nodes normal to
+        the plates.
+
+    Example
+    -------
+    >>> drag = FluidDrag(skel.bodynodes)
+    >>> for _ in range(frame_skip):
+    ...     drag.apply()
+    ...     skel.set_forces(tau)
+    ...     world.step()
+    """
+    def __init__(self, bodynodes, coefficient=50.0, normal_axis=2):
+        self.bodynodes = list(bodynodes)
+        n = len(self.bodynodes)
+        self.coefficient = np.broadcast_to(np.asarray(coefficient,
+            dtype=np.float64), (n,)).copy()
+        self.normal_axis = normal_axis
+        self.velocities = np.zeros((n, 3), dtype=np.float64)
+        self.normals = np.zeros((n, 3), dtype=np.float64)
+        self.forces = np.zeros((n, 3), dtype=np.float64)
+        self._speeds = np.zeros((n,), dtype=np.float64)
+
+    def read(self):
+        """Read the velocities and normals of the body nodes from DART."""
+        for i, bodynode in enumerate(self.bodynodes):
+            self.velocities[i] = bodynode.com_spatial_velocity()[3:]
+            self.normals[i] = bodynode.world_transform()[:3, self.normal_axis]
+
+    def compute(self, velocities=None, normals=None, out=None):
+        """Drag forces, as an `(n, 3)` array written into `out` (defaults to
+        the `forces` buffer), for the velocities and normals of the body
+        nodes (defaults to the last ones `read`)."""
+        velocities = self.velocities if velocities is None else velocities
+        normals = self.normals if normals is None else normals
+        out = self.forces if out is None else out
+        speeds = np.einsum('ij,ij->i', velocities, normals, out=self._speeds)
+        speeds *= -self.coefficient
+        return np.multiply(normals, speeds[:, None], out=out)
+
+    def apply(self):
+        """Add the drag forces of the current state to the body nodes, for
+        the next step of the world."""
+        self.read()
+        forces = self.compute()
+        # DART clears external forces after every frame
+        for bodynode, force in zip(self.bodynodes, forces):
+            bodynode.add_ext_force(force)
+        return forces
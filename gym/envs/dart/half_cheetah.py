@@ -1,9 +1,13 @@
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 class DartHalfCheetahEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    snapshot_fields = ('t', 'cur_step', 'posbefore', 'height_threshold_low', 'fall_on_ground')
+    collision_profile = 'fast'
+
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0]*6,[-1.0]*6])
         self.action_scale = np.array([120, 90, 60, 120, 60, 30]) * 1.0
         obs_dim = 17
@@ -14,27 +18,19 @@ class DartHalfCheetahEnv(dart_env.DartEnv, utils.EzPickle):
 
         self.total_dist = []
 
-        dart_env.DartEnv.__init__(self, ['half_cheetah.skel'], 5, obs_dim, self.control_bounds, disableViewer=True, dt=0.01)
+        dart_env.DartEnv.__init__(self, ['half_cheetah.skel'], 5, obs_dim, self.control_bounds, disableViewer=True, dt=0.01, **kwargs)
+        self.set_action_map(dofs=slice(3, None), scale=self.action_scale)
+        self.set_observation_spec(ObservationSpec().q(1).dq())
 
         self.initial_local_coms = [np.copy(bn.local_com()) for bn in self.robot_skeleton.bodynodes]
 
-        self.dart_world.set_collision_detector(3)
-
         self.robot_skeleton=self.dart_world.skeletons[-1]
 
-        utils.EzPickle.__init__(self)
+        utils.EzPickle.__init__(self, **kwargs)
 
     def advance(self, a):
         self.posbefore = self.robot_skeleton.q[0]
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[3:] = clamped_control * self.action_scale
+        tau = self.action_map(a)
         self.do_simulation(tau, self.frame_skip)
 
     def terminated(self):
@@ -74,15 +70,7 @@ class DartHalfCheetahEnv(dart_env.DartEnv, utils.EzPickle):
 
         envinfo = {}
 
-        return ob, reward, done, envinfo
-
-    def _get_obs(self):
-        state =  np.concatenate([
-            self.robot_skeleton.q[1:],
-            self.robot_skeleton.dq,
-        ])
-
-        return state
+        return self._finish_step(ob, reward, done, envinfo)
 
     def reset_model(self):
         self.dart_world.reset()
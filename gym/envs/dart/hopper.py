@@ -1,43 +1,40 @@
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 
 class DartHopperEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    supports_copies = True
+    collision_profile = 'fast'
+
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0, 1.0, 1.0],[-1.0, -1.0, -1.0]])
         self.action_scale = 200
         obs_dim = 11
 
-        dart_env.DartEnv.__init__(self, 'hopper_capsule.skel', 4, obs_dim, self.control_bounds, disableViewer=True)
+        dart_env.DartEnv.__init__(self, 'hopper_capsule.skel', 4, obs_dim, self.control_bounds, disableViewer=True, **kwargs)
+        self.set_action_map(dofs=slice(3, None), scale=self.action_scale)
+        self.set_observation_spec(ObservationSpec().com(self.robot_skeleton.bodynodes[2]).q(2).dq(clip=10))
 
-        try:
-            self.dart_world.set_collision_detector(3)
-        except Exception as e:
-            print('Does not have ODE collision detector, reverted to bullet collision detector')
-            self.dart_world.set_collision_detector(2)
-        
+        utils.EzPickle.__init__(self, **kwargs)
 
-        utils.EzPickle.__init__(self)
 
+    def _control(self, a):
+        return self.action_map(a)
 
     def advance(self, a):
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[3:] = clamped_control * self.action_scale
-
-        self.do_simulation(tau, self.frame_skip)
+        self.do_simulation(self._control(a), self.frame_skip)
 
     def step(self, a):
-        pre_state = [self.state_vector()]
-
-        posbefore = self.robot_skeleton.q[0]
+        posbefore = self._pre_step()
         self.advance(a)
+        return self._post_step(a, posbefore)
+
+    def _pre_step(self):
+        return self.robot_skeleton.q[0]
+
+    def _post_step(self, a, posbefore):
         posafter,ang = self.robot_skeleton.q[0,2]
         height = self.robot_skeleton.bodynodes[2].com()[1]
 
@@ -62,19 +59,10 @@ class DartHopperEnv(dart_env.DartEnv, utils.EzPickle):
                     (height > .7) and (height < 1.8) and (abs(ang) < .2))
         ob = self._get_obs()
 
-        return ob, reward, done, {}
-
-    def _get_obs(self):
-        state =  np.concatenate([
-            self.robot_skeleton.q[1:],
-            np.clip(self.robot_skeleton.dq,-10,10)
-        ])
-        state[0] = self.robot_skeleton.bodynodes[2].com()[1]
-
-        return state
+        return self._finish_step(ob, reward, done, {})
 
     def reset_model(self):
-        self.dart_world.reset()
+        self.reset_world()
         qpos = self.robot_skeleton.q + self.np_random.uniform(low=-.005, high=.005, size=self.robot_skeleton.ndofs)
         qvel = self.robot_skeleton.dq + self.np_random.uniform(low=-.005, high=.005, size=self.robot_skeleton.ndofs)
         self.set_state(qpos, qvel)
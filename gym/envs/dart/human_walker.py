@@ -3,6 +3,7 @@ __author__ = 'yuwenhao'
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 import joblib
 import os
 
@@ -13,7 +14,15 @@ import pydart2 as pydart
 # human model with human-like joint limit
 # Refer to https://arxiv.org/abs/1709.08685 for more details
 class DartHumanWalkerEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    snapshot_fields = ('t', 'contact_info', 'init_pos', 'init_height')
+    # infos batched into arrays by vector environments with `batch_infos=True`
+    info_schema = {'broke_sim': (np.bool_, ()), 'vel_rew': (np.float64, ()),
+                   'action_pen': (np.float64, ()),
+                   'deviation_pen': (np.float64, ()),
+                   'done_return': (np.bool_, ()), 'dyn_model_id': (np.int64, ()),
+                   'state_index': (np.int64, ()), 'diverged': (np.bool_, ())}
+
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0] * 23, [-1.0] * 23])
         self.action_scale = np.array([120, 120, 120, 100, 60, 60, 120, 120, 120, 100, 60, 60, 100, 100, 100, 80,80,80, 50, 80,80,80, 50])*1.5
         obs_dim = 57
@@ -27,7 +36,8 @@ class DartHumanWalkerEnv(dart_env.DartEnv, utils.EzPickle):
             obs_dim += len(self.contact_info)
 
         dart_env.DartEnv.__init__(self, 'kima/kima_human_edited.skel', 15, obs_dim, self.control_bounds,
-                                      disableViewer=True, dt=0.002)
+                                      disableViewer=True, dt=0.002, **kwargs)
+        self.set_action_map(dofs=slice(6, None), scale=self.action_scale)
 
         # add human joint limit
         # Dart with modified joint limit is required: https://github.com/jyf588/dart/tree/human-joint-constraints
@@ -51,59 +61,47 @@ class DartHumanWalkerEnv(dart_env.DartEnv, utils.EzPickle):
             rightlegConstraint.add_to_world(world)
 
         self.robot_skeleton.set_self_collision_check(False)
+        self.feet = np.array([self.robot_skeleton.bodynode('l-foot').id,
+                              self.robot_skeleton.bodynode('r-foot').id])
+        # cached body nodes: 0 is the pelvis, 1 the head
+        self.cache_kinematics([self.robot_skeleton.bodynodes[1], 'head'])
+        spec = ObservationSpec().q(1).dq(clip=10)
+        if self.include_additional_info:
+            spec.field('contact_info', len(self.contact_info))
+        self.set_observation_spec(spec)
 
         self.sim_dt = self.dt / self.frame_skip
 
-        utils.EzPickle.__init__(self)
-
+        utils.EzPickle.__init__(self, **kwargs)
 
-    def do_simulation(self, tau, n_frames):
-        for _ in range(n_frames):
-            self.robot_skeleton.set_forces(tau)
-            self.dart_world.step()
 
     def advance(self, a):
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[6:] = clamped_control * self.action_scale
+        tau = self.action_map(a)
 
         self.do_simulation(tau, self.frame_skip)
 
     def step(self, a):
-        posbefore = self.robot_skeleton.bodynodes[1].com()[0]
+        kinematics = self.kinematics
+        posbefore = kinematics.com(0)[0]
         self.advance(np.copy(a))
-        posafter = self.robot_skeleton.bodynodes[1].com()[0]
-        height = self.robot_skeleton.bodynode('head').com()[1]
-        side_deviation = self.robot_skeleton.bodynode('head').com()[2]
-        angle = self.robot_skeleton.q[3]
+        posafter = kinematics.com(0)[0]
+        height = kinematics.com(1)[1]
+        side_deviation = kinematics.com(1)[2]
+        angle = kinematics.q[3]
 
         upward = np.array([0, 1, 0])
-        upward_world = self.robot_skeleton.bodynode('head').to_world(np.array([0, 1, 0])) - self.robot_skeleton.bodynode('head').to_world(np.array([0, 0, 0]))
-        upward_world /= np.linalg.norm(upward_world)
-        ang_cos_uwd = np.dot(upward, upward_world)
+        upward_world = kinematics.axis(1, 1)
+        ang_cos_uwd = np.dot(upward, upward_world) / np.linalg.norm(upward_world)
         ang_cos_uwd = np.arccos(ang_cos_uwd)
 
         forward = np.array([1, 0, 0])
-        forward_world = self.robot_skeleton.bodynode('head').to_world(np.array([1, 0, 0])) - self.robot_skeleton.bodynode('head').to_world(np.array([0, 0, 0]))
-        forward_world /= np.linalg.norm(forward_world)
-        ang_cos_fwd = np.dot(forward, forward_world)
+        forward_world = kinematics.axis(1, 0)
+        ang_cos_fwd = np.dot(forward, forward_world) / np.linalg.norm(forward_world)
         ang_cos_fwd = np.arccos(ang_cos_fwd)
 
-        contacts = self.dart_world.collision_result.contacts
-        total_force_mag = 0
-        self.contact_info = np.array([0, 0])
-        for contact in contacts:
-            total_force_mag += np.square(contact.force).sum()
-            if contact.skel_id1 + contact.skel_id2 == 1:
-                if contact.bodynode1 == self.robot_skeleton.bodynode('l-foot') or contact.bodynode2 == self.robot_skeleton.bodynode('l-foot'):
-                    self.contact_info[0] = 1
-                if contact.bodynode1 == self.robot_skeleton.bodynode('r-foot') or contact.bodynode2 == self.robot_skeleton.bodynode('r-foot'):
-                    self.contact_info[1] = 1
+        # feet in contact with the ground
+        self.contact_info = self.dart_world.contacts.bodynode_flags(
+            self.robot_skeleton.id, self.feet, other_skel_id=0).astype(int)
 
 
         alive_bonus = 2.0
@@ -118,35 +116,25 @@ class DartHumanWalkerEnv(dart_env.DartEnv, utils.EzPickle):
 
         self.t += self.dt
 
-        s = self.state_vector()
+        s = kinematics.state_vector()
 
         done = not (np.isfinite(s).all() and (np.abs(s[2:]) < 100).all() and
                     (height-self.init_height > -0.2) and (height-self.init_height < 1.0) and (abs(ang_cos_uwd) < 2.0) and (abs(ang_cos_fwd) < 2.0)
-                    and np.abs(angle) < 1.3 and np.abs(self.robot_skeleton.q[5]) < 0.4 and np.abs(side_deviation) < 0.9)
+                    and np.abs(angle) < 1.3 and np.abs(kinematics.q[5]) < 0.4 and np.abs(side_deviation) < 0.9)
 
         if done:
             reward = 0
 
         ob = self._get_obs()
 
-        broke_sim = False
+        broke_sim = self.diverged
         if not (np.isfinite(s).all() and (np.abs(s[2:]) < 100).all()):
             broke_sim = True
 
-        return ob, reward, done, {'broke_sim': broke_sim, 'vel_rew': vel_rew, 'action_pen': action_pen,
-                                  'deviation_pen': deviation_pen, 'done_return': done,
-                                  'dyn_model_id': 0, 'state_index': 0}
-
-    def _get_obs(self):
-        state = np.concatenate([
-            self.robot_skeleton.q[1:],
-            np.clip(self.robot_skeleton.dq, -10, 10),
-        ])
-
-        if self.include_additional_info:
-            state = np.concatenate([state, self.contact_info])
-
-        return state
+        info = {'broke_sim': broke_sim, 'vel_rew': vel_rew, 'action_pen': action_pen,
+                'deviation_pen': deviation_pen, 'done_return': done,
+                'dyn_model_id': 0, 'state_index': 0}
+        return self._finish_step(ob, reward, done, info)
 
     def reset_model(self):
         self.dart_world.reset()
@@ -156,11 +144,11 @@ class DartHumanWalkerEnv(dart_env.DartEnv, utils.EzPickle):
         self.set_state(qpos, qvel)
         self.t = 0
 
-        self.init_pos = self.robot_skeleton.q[0]
+        self.init_pos = self.kinematics.q[0]
 
         self.contact_info = np.array([0, 0])
 
-        self.init_height = self.robot_skeleton.bodynode('head').C[1]
+        self.init_height = self.kinematics.com(1)[1]
 
         return self._get_obs()
 
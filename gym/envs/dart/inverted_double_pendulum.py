@@ -6,20 +6,21 @@ from gym.envs.dart import dart_env
 
 # swing up and balance of double inverted pendulum
 class DartDoubleInvertedPendulumEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    def __init__(self, **kwargs):
         control_bounds = np.array([[1.0],[-1.0]])
         self.action_scale = 40
         dart_env.DartEnv.__init__(
-            self, 'inverted_double_pendulum.skel', 2, 8, control_bounds, dt=0.01)
-        utils.EzPickle.__init__(self)
+            self, 'inverted_double_pendulum.skel', 2, 8, control_bounds, dt=0.01, **kwargs)
+        # actions are not clamped
+        self.set_action_map(dofs=slice(0, 1), scale=self.action_scale, clip=False)
+        utils.EzPickle.__init__(self, **kwargs)
 
         self.init_qpos = np.array(self.robot_skeleton.q).copy()
         self.init_qvel = np.array(self.robot_skeleton.dq).copy()
 
     def step(self, a):
 
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[0] = a[0] * self.action_scale
+        tau = self.action_map(a)
 
         self.do_simulation(tau, self.frame_skip)
         ob = self._get_obs()
@@ -39,7 +40,7 @@ class DartDoubleInvertedPendulumEnv(dart_env.DartEnv, utils.EzPickle):
         reward = alive_bonus - dist_penalty - vel_penalty
 
         done = bool(height <= 1)
-        return ob, reward, done, {}
+        return self._finish_step(ob, reward, done, {})
 
 
     def _get_obs(self):
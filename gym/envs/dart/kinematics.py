@@ -0,0 +1,93 @@
+import numpy as np
+
+__all__ = ['KinematicCache']
+
+
+class KinematicCache(object):
+    """Kinematic state of a skeleton, read from DART at most once per step.
+
+    The positions, velocities, and the centers of mass and world transforms
+    of selected body nodes are copied into preallocated arrays on the first
+    access after the state of the world changed (a step, a reset or
+    `set_state`), and then served from these arrays. Body nodes are resolved
+    once, so that reward and observation code does not look them up by name.
+
+    Parameters
+    ----------
+    skel : `pydart.Skeleton`
+        The skeleton to read the state of.
+
+    world : `DartWorld`
+        The world of the skeleton, whose `state_version` tells when the
+        cached state is out of date.
+
+    bodynodes : list of str or `pydart.BodyNode`
+        Body nodes whose center of mass and world transform are cached, by
+        name or handle. They are then referred to by their index in this list.
+
+    Example
+    -------
+    >>> kinematics = KinematicCache(skel, world, ['pelvis', 'head'])
+    >>> height = kinematics.com(1)[1]
+    >>> up = kinematics.axis(1, 1)      # y axis of the head, in world frame
+    """
+    def __init__(self, skel, world, bodynodes=()):
+        self.skel = skel
+        self.world = world
+        self.bodynodes = [skel.bodynode(bodynode) if isinstance(bodynode, str)
+                          else bodynode for bodynode in bodynodes]
+        self.q_lower = np.array(skel.q_lower, dtype=np.float64)
+        self.q_upper = np.array(skel.q_upper, dtype=np.float64)
+        self._q = np.zeros((skel.ndofs,), dtype=np.float64)
+        self._dq = np.zeros((skel.ndofs,), dtype=np.float64)
+        self._coms = np.zeros((len(self.bodynodes), 3), dtype=np.float64)
+        self._transforms = np.zeros((len(self.bodynodes), 4, 4), dtype=np.float64)
+        self._version = None
+
+    def _refresh(self):
+        if self._version == self.world.state_version:
+            return
+        self._q[:] = self.skel.q
+        self._dq[:] = self.skel.dq
+        for i, bodynode in enumerate(self.bodynodes):
+            self._coms[i] = bodynode.com()
+            self._transforms[i] = bodynode.world_transform()
+        self._version = self.world.state_version
+
+    def invalidate(self):
+        self._version = None
+
+    @property
+    def q(self):
+        """Positions (read-only, overwritten when the state changes)."""
+        self._refresh()
+        return self._q
+
+    @property
+    def dq(self):
+        """Velocities (read-only, overwritten when the state changes)."""
+        self._refresh()
+        return self._dq
+
+    @property
+    def coms(self):
+        """Centers of mass of the cached body nodes, as a `(n, 3)` array."""
+        self._refresh()
+        return self._coms
+
+    @property
+    def transforms(self):
+        """World transforms of the cached body nodes, as a `(n, 4, 4)` array."""
+        self._refresh()
+        return self._transforms
+
+    def com(self, index):
+        return self.coms[index]
+
+    def axis(self, index, axis):
+        """The `axis`-th axis (0, 1, 2 for x, y, z) of the body node `index`
+        in world frame, i.e. `to_world(e_axis) - to_world(0)`."""
+        return self.transforms[index, :3, axis]
+
+    def state_vector(self):
+        return np.concatenate([self.q, self.dq])
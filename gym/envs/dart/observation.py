@@ -0,0 +1,89 @@
+import numpy as np
+
+__all__ = ['ObservationSpec', 'ObservationPlan']
+
+
+class ObservationSpec(object):
+    """Declarative layout of the observation of a Dart environment.
+
+    Terms are appended in order with the methods below (which can be
+    chained), and `compile` turns them into an `ObservationPlan` that writes
+    the observation into a preallocated array.
+
+    Example
+    -------
+    >>> # q[1:] with the height of the torso in place of q[1], clipped dq
+    >>> spec = ObservationSpec().com(torso, axis=1).q(2).dq(clip=10)
+    """
+    def __init__(self):
+        self.terms = []
+
+    def q(self, start=0, stop=None, clip=None):
+        """Positions `q[start:stop]`, optionally clipped to `[-clip, clip]`."""
+        self.terms.append(('q', slice(start, stop), clip))
+        return self
+
+    def dq(self, start=0, stop=None, clip=None):
+        """Velocities `dq[start:stop]`, optionally clipped to `[-clip, clip]`."""
+        self.terms.append(('dq', slice(start, stop), clip))
+        return self
+
+    def com(self, bodynode, axis=1):
+        """Coordinate `axis` of the center of mass of `bodynode` (its height
+        by default)."""
+        self.terms.append(('com', (bodynode, axis), None))
+        return self
+
+    def contact_flags(self, bodynode_ids, other_skel_id=None):
+        """Whether each of the body nodes `bodynode_ids` of the robot is in
+        contact (with the skeleton `other_skel_id`, if any), as 0 or 1."""
+        self.terms.append(('contacts', (np.asarray(bodynode_ids), other_skel_id), None))
+        return self
+
+    def field(self, name, size):
+        """The `size` values of the environment attribute `name`."""
+        self.terms.append(('field', (name, size), None))
+        return self
+
+    def compile(self, ndofs):
+        return ObservationPlan(self.terms, ndofs)
+
+
+class ObservationPlan(object):
+    """Compiled `ObservationSpec`: a list of `(kind, destination, source,
+    clip)` operations, each writing one contiguous block of the output."""
+    def __init__(self, terms, ndofs):
+        self.ops = []
+        offset = 0
+        for kind, arg, clip in terms:
+            if kind in ('q', 'dq'):
+                size = len(range(ndofs)[arg])
+            elif kind == 'com':
+                size = 1
+            elif kind == 'contacts':
+                size = len(arg[0])
+            else:
+                size = arg[1]
+            self.ops.append((kind, slice(offset, offset + size), arg, clip))
+            offset += size
+        self.size = offset
+
+    def write(self, out, q, dq, env=None):
+        """Write the observation for the positions `q` and velocities `dq`
+        into `out` (of size `size`, e.g. a row of a batch of observations).
+        `env` provides the body nodes, contacts and fields."""
+        for kind, dst, arg, clip in self.ops:
+            if kind in ('q', 'dq'):
+                src = (q if kind == 'q' else dq)[arg]
+                if clip is None:
+                    out[dst] = src
+                else:
+                    np.clip(src, -clip, clip, out=out[dst])
+            elif kind == 'com':
+                out[dst] = arg[0].com()[arg[1]]
+            elif kind == 'contacts':
+                out[dst] = env.dart_world.contacts.bodynode_flags(
+                    env.robot_skeleton.id, arg[0], other_skel_id=arg[1])
+            else:
+                out[dst] = getattr(env, arg[0])
+        return out
@@ -0,0 +1,216 @@
+# Offscreen rendering for Dart environments, without a window system.
+#
+# PyOpenGL binds its platform (GLX, EGL or OSMesa) when `OpenGL.GL` is first
+# imported, which happens as soon as pydart2 is imported. Set the environment
+# variable GYM_DART_RENDER_BACKEND=egl (or osmesa) before importing gym, or
+# PYOPENGL_PLATFORM to the same value, to use these backends.
+
+import ctypes
+import os
+
+import numpy as np
+
+from gym import error
+
+BACKENDS = ('egl', 'osmesa')
+
+
+class _EGLContext(object):
+    """Surfaceless EGL context; rendering goes to framebuffer objects."""
+    def __init__(self, width, height):
+        from OpenGL import EGL
+        self._egl = EGL
+        self.display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if self.display == EGL.EGL_NO_DISPLAY:
+            raise error.Error('Cannot open an EGL display.')
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self.display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise error.Error('Cannot initialize EGL.')
+        attributes = (EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+                      EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8,
+                      EGL.EGL_DEPTH_SIZE, 24,
+                      EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                      EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                      EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        num_configs = EGL.EGLint()
+        EGL.eglChooseConfig(self.display, attributes, ctypes.pointer(config), 1,
+                            ctypes.pointer(num_configs))
+        if num_configs.value < 1:
+            raise error.Error('No EGL config supports offscreen OpenGL rendering.')
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self.context = EGL.eglCreateContext(self.display, config, EGL.EGL_NO_CONTEXT, None)
+        if not self.context:
+            raise error.Error('Cannot create an EGL context.')
+
+    def make_current(self):
+        EGL = self._egl
+        if not EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE,
+                                  EGL.EGL_NO_SURFACE, self.context):
+            raise error.Error('Cannot make the EGL context current.')
+
+    def free(self):
+        EGL = self._egl
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE,
+                           EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglTerminate(self.display)
+
+
+class _OSMesaContext(object):
+    """Software OSMesa context; rendering goes to framebuffer objects."""
+    def __init__(self, width, height):
+        from OpenGL import GL, arrays, osmesa
+        self._osmesa = osmesa
+        self._gl_float = GL.GL_FLOAT
+        self.context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.context:
+            raise error.Error('Cannot create an OSMesa context.')
+        self.width, self.height = width, height
+        self._buffer = arrays.GLfloatArray.zeros((height, width, 4))
+
+    def make_current(self):
+        if not self._osmesa.OSMesaMakeCurrent(self.context, self._buffer,
+                self._gl_float, self.width, self.height):
+            raise error.Error('Cannot make the OSMesa context current.')
+
+    def free(self):
+        self._osmesa.OSMesaDestroyContext(self.context)
+
+
+_CONTEXTS = {'egl': _EGLContext, 'osmesa': _OSMesaContext}
+
+
+class OffscreenWindow(object):
+    """Drop-in replacement for `StaticGLUTWindow` that renders into a
+    framebuffer object of an EGL or OSMesa context.
+
+    Frames are read back through two pixel buffer objects. With
+    `pipelined=True`, `getFrame` starts the asynchronous readback of the frame
+    it just drew and returns the previous one, so that the transfer of frame k
+    overlaps with the simulation and drawing of frame k+1 (the first call
+    reads synchronously). With `pipelined=False`, the frame just drawn is
+    returned. `getGrayscale` (image observations) is never pipelined.
+
+    Parameters
+    ----------
+    sim : `DartWorld`
+        The world to render.
+
+    title : str, optional
+        Unused, for compatibility with `StaticGLUTWindow`.
+
+    backend : str (default: `'egl'`)
+        One of `'egl'` or `'osmesa'`.
+
+    pipelined : bool (default: `False`)
+        Whether `getFrame` returns the previous frame (see above).
+    """
+    def __init__(self, sim, title=None, backend='egl', pipelined=False):
+        from pydart2.gui.opengl.scene import OpenGLScene
+        if backend not in BACKENDS:
+            raise error.Error('Unknown offscreen backend `{0}`, must be one '
+                'of {1}.'.format(backend, BACKENDS))
+        if os.environ.get('PYOPENGL_PLATFORM') != backend:
+            raise error.Error('The `{0}` backend needs PyOpenGL to be loaded '
+                'for it. (HINT: set GYM_DART_RENDER_BACKEND={0} or '
+                'PYOPENGL_PLATFORM={0} before importing gym.)'.format(backend))
+        self.sim = sim
+        self.title = title if title is not None else 'Offscreen'
+        self.backend = backend
+        self.pipelined = pipelined
+        self.window_size = (1280, 720)
+        self.scene = OpenGLScene(*self.window_size)
+        self._context = None
+        self._frame_index = 0
+
+    def run(self, _width=None, _height=None, _show_window=False):
+        if _width is not None and _height is not None:
+            self.window_size = (_width, _height)
+        width, height = self.window_size
+        self._context = _CONTEXTS[self.backend](width, height)
+        self._context.make_current()
+        self._create_buffers(width, height)
+        self.scene.init()
+        self.scene.resize(width, height)
+
+    def _create_buffers(self, width, height):
+        from OpenGL import GL
+        self._fbo = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self._fbo)
+        self._color, self._depth = GL.glGenRenderbuffers(2)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self._color)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, width, height)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0,
+                                     GL.GL_RENDERBUFFER, self._color)
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self._depth)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_DEPTH_COMPONENT24, width, height)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_DEPTH_ATTACHMENT,
+                                     GL.GL_RENDERBUFFER, self._depth)
+        if GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER) != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise error.Error('The offscreen framebuffer is incomplete.')
+
+        self._pbos = GL.glGenBuffers(2)
+        for pbo in self._pbos:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, width * height * 4, None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self._pixels = np.zeros((height, width, 4), dtype=np.uint8)
+
+    def drawGL(self):
+        from OpenGL import GL
+        self._context.make_current()
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self._fbo)
+        self.scene.render(self.sim)
+        GL.glFlush()
+
+    def runSingleStep(self):
+        self.drawGL()
+
+    def _read_pixels(self, width, height, pipelined=False):
+        """Queue the readback of the current framebuffer into one pixel buffer
+        object, and copy the content of a pixel buffer object into
+        `self._pixels`: the other one if pipelined (i.e. the previous frame),
+        the same one otherwise."""
+        from OpenGL import GL
+        nbytes = width * height * 4
+        write_pbo = self._pbos[self._frame_index % 2]
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, write_pbo)
+        GL.glReadPixels(0, 0, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        ctypes.c_void_p(0))
+        if pipelined and self._frame_index > 0:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, self._pbos[(self._frame_index + 1) % 2])
+        self._frame_index += 1
+
+        pointer = GL.glMapBuffer(GL.GL_PIXEL_PACK_BUFFER, GL.GL_READ_ONLY)
+        pixels = self._pixels.reshape(-1)[:nbytes]
+        ctypes.memmove(pixels.ctypes.data, pointer, nbytes)
+        GL.glUnmapBuffer(GL.GL_PIXEL_PACK_BUFFER)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        return pixels
+
+    def getGrayscale(self, _width, _height):
+        # same layout as StaticGLUTWindow.getGrayscale; observations are never
+        # pipelined, they must show the current state
+        self.runSingleStep()
+        rgba = self._read_pixels(_width, _height).reshape(_height * _width, 4)
+        rgba = rgba.astype(np.uint32)
+        img = (rgba[:, 0] * 299 + rgba[:, 1] * 587 + rgba[:, 2] * 114) // 1000
+        return img.astype(np.uint8).reshape(_width, _height)
+
+    def getFrame(self):
+        self.runSingleStep()
+        width, height = self.window_size
+        img = self._read_pixels(width, height, self.pipelined).reshape(height, width, 4)
+        return img[::-1, :, 0:3].copy()
+
+    def close(self):
+        if self._context is None:
+            return
+        from OpenGL import GL
+        self._context.make_current()
+        GL.glDeleteBuffers(2, self._pbos)
+        GL.glDeleteRenderbuffers(2, [self._color, self._depth])
+        GL.glDeleteFramebuffers(1, [self._fbo])
+        self._context.free()
+        self._context = None
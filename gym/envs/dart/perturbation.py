@@ -0,0 +1,112 @@
+import numpy as np
+
+__all__ = ['PerturbationSchedule']
+
+
+class PerturbationSchedule(object):
+    """Random pushes on the body nodes of a robot, sampled for a whole
+    episode at reset from the random generator of the environment.
+
+    At every step with no push in progress, a push starts with probability
+    `probability`, on a body node drawn from `bodynodes`, with a force of norm
+    `magnitude` along a random direction, and lasts `duration` steps. The
+    schedule is stored as two arrays, the index of the pushed body node
+    (`-1` for none) and the force for every step, so that stepping only reads
+    one entry. It is extended by `horizon` steps whenever an episode outlasts
+    it.
+
+    Parameters
+    ----------
+    bodynodes : list of int
+        Indices of the body nodes that can be pushed.
+
+    probability : float (default: 0.05)
+        Probability that a push starts at a step.
+
+    magnitude : float (default: 5.0)
+        Norm of the pushing force.
+
+    duration : int (default: 1)
+        Number of steps a push lasts.
+
+    axes : tuple of int, optional (default: `(0, 1)`)
+        Pushes are along one of these world axes, in either direction. If
+        `None`, pushes are along uniformly random 3D directions.
+
+    horizon : int (default: 1000)
+        Number of steps sampled at a time.
+    """
+    def __init__(self, bodynodes, probability=0.05, magnitude=5.0, duration=1,
+                 axes=(0, 1), horizon=1000):
+        self.bodynodes = np.asarray(bodynodes, dtype=np.int64)
+        self.probability = probability
+        self.magnitude = magnitude
+        self.duration = duration
+        self.axes = None if axes is None else np.asarray(axes, dtype=np.int64)
+        self.horizon = horizon
+        self.np_random = None
+        self.t = 0
+        self.bodies = np.zeros((0,), dtype=np.int64)
+        self.forces = np.zeros((0, 3), dtype=np.float64)
+        self._active_until = 0
+
+    def sample(self, np_random):
+        """Sample the schedule of a new episode from `np_random`."""
+        self.np_random = np_random
+        self.t = 0
+        self._active_until = 0
+        self.bodies = np.zeros((0,), dtype=np.int64)
+        self.forces = np.zeros((0, 3), dtype=np.float64)
+        self._extend()
+
+    def _extend(self):
+        offset, n = len(self.bodies), self.horizon
+        bodies = np.full((n,), -1, dtype=np.int64)
+        forces = np.zeros((n, 3), dtype=np.float64)
+        if self._active_until > offset:
+            # remainder of a push started in the previous block
+            carried = min(self._active_until - offset, n)
+            bodies[:carried], forces[:carried] = self.bodies[-1], self.forces[-1]
+
+        starts = offset + np.flatnonzero(self.np_random.uniform(size=n) < self.probability)
+        kept = []
+        for start in starts:
+            # pushes do not overlap
+            if start >= self._active_until:
+                kept.append(start - offset)
+                self._active_until = start + self.duration
+        num = len(kept)
+        targets = self.bodynodes[self.np_random.randint(len(self.bodynodes), size=num)]
+        if self.axes is None:
+            directions = self.np_random.normal(size=(num, 3))
+            directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        else:
+            directions = np.zeros((num, 3))
+            axes = self.axes[self.np_random.randint(len(self.axes), size=num)]
+            directions[np.arange(num), axes] = self.np_random.randint(0, 2, size=num) * 2 - 1
+        for start, target, direction in zip(kept, targets, directions):
+            bodies[start:start + self.duration] = target
+            forces[start:start + self.duration] = direction * self.magnitude
+
+        # arrays are never modified in place, so that snapshots can share them
+        self.bodies = np.concatenate([self.bodies, bodies])
+        self.forces = np.concatenate([self.forces, forces])
+        self.bodies.flags.writeable = False
+        self.forces.flags.writeable = False
+
+    def next(self):
+        """Index of the pushed body node (`-1` for none) and force for the
+        current step, and move to the next step."""
+        if self.np_random is None:
+            return -1, None
+        if self.t >= len(self.bodies):
+            self._extend()
+        t = self.t
+        self.t += 1
+        return self.bodies[t], self.forces[t]
+
+    def get_state(self):
+        return (self.t, self.bodies, self.forces, self._active_until)
+
+    def set_state(self, state):
+        self.t, self.bodies, self.forces, self._active_until = state
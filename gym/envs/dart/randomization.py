@@ -0,0 +1,166 @@
+import numpy as np
+
+from gym import error
+
+__all__ = ['DynamicsRandomizer']
+
+
+class DynamicsRandomizer(object):
+    """Domain randomization of the physical parameters of a skeleton.
+
+    The nominal parameters are read from DART once, into one flat vector laid
+    out as the concatenation of the randomized parameters, in the order:
+
+    - `mass`: mass of every body node,
+    - `friction`: friction coefficient of every body node,
+    - `damping`: damping coefficient of every degree of freedom,
+    - `gain`: factor on the gains of the actuated degrees of freedom (the
+      scale of the `ActionMap`, or `kp` and `kd` of the `SPDController`),
+      with nominal value 1.
+
+    Each randomized parameter is drawn uniformly either as an offset added to
+    its nominal value, or as a factor multiplying it. Parameter vectors are
+    sampled in bulk (e.g. a table for all the episodes of all the workers of
+    a vector environment), and written back to DART with `apply`.
+
+    Parameters
+    ----------
+    skel : `pydart.Skeleton`
+        The skeleton whose parameters are randomized.
+
+    offsets : dict, optional
+        Maps parameter names to `(low, high)` ranges of offsets. The bounds
+        are scalars, or arrays with one entry per body node (resp. degree of
+        freedom, actuated degree of freedom).
+
+    factors : dict, optional
+        Maps parameter names to `(low, high)` ranges of factors.
+
+    action_map : `ActionMap`, optional
+        Action map of the environment, required to randomize `gain`.
+
+    spd : `SPDController`, optional
+        SPD controller of the environment. If given, `gain` scales its gains
+        rather than the scale of `action_map`, which then maps actions to
+        target positions.
+
+    Example
+    -------
+    >>> dynamics = DynamicsRandomizer(skel, offsets={'friction': (-0.5, 0.5)},
+    ...                               factors={'mass': (0.8, 1.2)})
+    >>> dynamics.apply(dynamics.sample(np_random))
+    >>> dynamics.restore()
+    """
+    names = ('mass', 'friction', 'damping', 'gain')
+    # parameters are clipped to these values, so that masses stay positive
+    minimum = {'mass': 1e-3, 'friction': 0.0, 'damping': 0.0, 'gain': 0.0}
+
+    def __init__(self, skel, offsets=None, factors=None, action_map=None,
+                 spd=None):
+        offsets = {} if offsets is None else offsets
+        factors = {} if factors is None else factors
+        for name in list(offsets) + list(factors):
+            if name not in self.names:
+                raise error.Error('Unknown dynamics parameter `{0}`, must be '
+                    'one of {1}.'.format(name, self.names))
+            if name in offsets and name in factors:
+                raise error.Error('The dynamics parameter `{0}` is given both '
+                    'an offset and a factor.'.format(name))
+        if ('gain' in offsets or 'gain' in factors) and action_map is None:
+            raise error.Error('Randomizing `gain` requires an action map.')
+
+        self.skel = skel
+        self.action_map = action_map
+        self.spd = spd
+        if spd is not None:
+            self._gains = (spd.kp.copy(), spd.kd.copy())
+        elif action_map is not None:
+            self._gains = action_map.scale.copy()
+
+        self.layout = []
+        nominal, low, high, relative, minimum = [], [], [], [], []
+        offset = 0
+        for name in self.names:
+            if name in offsets:
+                bounds, is_factor = offsets[name], False
+            elif name in factors:
+                bounds, is_factor = factors[name], True
+            else:
+                continue
+            values = self._read(name)
+            size = len(values)
+            self.layout.append((name, slice(offset, offset + size)))
+            offset += size
+            nominal.append(values)
+            low.append(np.broadcast_to(np.asarray(bounds[0], dtype=np.float64), (size,)))
+            high.append(np.broadcast_to(np.asarray(bounds[1], dtype=np.float64), (size,)))
+            relative.append(np.full((size,), is_factor, dtype=np.bool_))
+            minimum.append(np.full((size,), self.minimum[name]))
+        self.size = offset
+
+        def concatenate(arrays, dtype=np.float64):
+            return np.concatenate(arrays) if arrays else np.zeros((0,), dtype=dtype)
+        self.nominal = concatenate(nominal)
+        self.low = concatenate(low)
+        self.high = concatenate(high)
+        self.relative = concatenate(relative, dtype=np.bool_)
+        self._minimum = concatenate(minimum)
+        # the sample at which the parameters equal their nominal values
+        self.identity = self.relative.astype(np.float64)
+
+    def _read(self, name):
+        if name == 'mass':
+            return np.array([bodynode.mass() for bodynode in self.skel.bodynodes], dtype=np.float64)
+        elif name == 'friction':
+            return np.array([bodynode.friction_coeff() for bodynode in self.skel.bodynodes], dtype=np.float64)
+        elif name == 'damping':
+            return np.array([dof.damping_coefficient() for dof in self.skel.dofs], dtype=np.float64)
+        return np.ones((self.action_map.act_dim,), dtype=np.float64)
+
+    def sample(self, np_random, shape=()):
+        """Draw samples of shape `shape + (size,)`: offsets or factors of the
+        randomized parameters, to be passed to `apply` or `values`."""
+        if isinstance(shape, int):
+            shape = (shape,)
+        return np_random.uniform(self.low, self.high, size=tuple(shape) + (self.size,))
+
+    def sample_table(self, np_random, num_envs, num_episodes):
+        """Samples for `num_episodes` episodes of `num_envs` environments, as
+        a `(num_envs, num_episodes, size)` array."""
+        return self.sample(np_random, (num_envs, num_episodes))
+
+    def values(self, sample):
+        """Parameters (of the same shape as `sample`) for the samples."""
+        sample = np.asarray(sample, dtype=np.float64)
+        values = np.where(self.relative, self.nominal * sample, self.nominal + sample)
+        return np.maximum(values, self._minimum, out=values)
+
+    def apply(self, sample):
+        """Write the parameters for the sample `sample` to DART."""
+        values = self.values(sample)
+        for name, indices in self.layout:
+            self._write(name, values[indices])
+        return values
+
+    def restore(self):
+        """Write the nominal parameters back to DART."""
+        return self.apply(self.identity)
+
+    def _write(self, name, values):
+        # pydart2 only exposes per-body node and per-dof setters
+        if name == 'mass':
+            for bodynode, value in zip(self.skel.bodynodes, values):
+                bodynode.set_mass(value)
+        elif name == 'friction':
+            for bodynode, value in zip(self.skel.bodynodes, values):
+                bodynode.set_friction_coeff(value)
+        elif name == 'damping':
+            for dof, value in zip(self.skel.dofs, values):
+                dof.set_damping_coefficient(value)
+        elif self.spd is not None:
+            kp, kd = self._gains[0].copy(), self._gains[1].copy()
+            kp[self.spd.dofs] *= values
+            kd[self.spd.dofs] *= values
+            self.spd.set_gains(kp, kd)
+        else:
+            np.multiply(self._gains, values, out=self.action_map.scale)
@@ -5,21 +5,18 @@ from gym import utils
 from gym.envs.dart import dart_env
 
 class DartReacherEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    snapshot_fields = ('target',)
+
+    def __init__(self, **kwargs):
         self.target = np.array([0.8, -0.6, 0.6])
         self.action_scale = np.array([10, 10, 10, 10, 10])
         self.control_bounds = np.array([[1.0, 1.0, 1.0, 1.0, 1.0],[-1.0, -1.0, -1.0, -1.0, -1.0]])
-        dart_env.DartEnv.__init__(self, 'reacher.skel', 4, 21, self.control_bounds)
-        utils.EzPickle.__init__(self)
+        dart_env.DartEnv.__init__(self, 'reacher.skel', 4, 21, self.control_bounds, **kwargs)
+        self.set_action_map(scale=self.action_scale)
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-        tau = np.multiply(clamped_control, self.action_scale)
+        tau = self.action_map(a)
 
         fingertip = np.array([0.0, -0.25, 0.0])
         vec = self.robot_skeleton.bodynodes[2].to_world(fingertip) - self.target
@@ -36,7 +33,7 @@ class DartReacherEnv(dart_env.DartEnv, utils.EzPickle):
         done = not (np.isfinite(s).all() and (-reward_dist > 0.1))
 
 
-        return ob, reward, done, {}
+        return self._finish_step(ob, reward, done, {})
 
     def _get_obs(self):
         theta = self.robot_skeleton.q
@@ -1,73 +1,52 @@
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.fluid import FluidDrag
+from gym.envs.dart.observation import ObservationSpec
 
 
 class DartSnake7LinkEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    snapshot_fields = ('accumulated_rew', 'num_steps', 'prev_a')
+    collision_profile = 'fast'
+    # ranges for domain randomization, enabled with
+    # `env.set_dynamics_randomization(**DartSnake7LinkEnv.dynamics_ranges)`
+    dynamics_ranges = dict(offsets={'mass': (-1.5, 1.5), 'friction': (-0.5, 0.5)})
+
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0, 1.0, 1.0, 1.0, 1.0, 1.0],[-1.0, -1.0, -1.0, -1.0, -1.0, -1.0]])
         self.action_scale = 200
         self.include_action_in_obs = False
-        self.randomize_dynamics = False
         obs_dim = 17
 
         if self.include_action_in_obs:
             obs_dim += len(self.control_bounds[0])
             self.prev_a = np.zeros(len(self.control_bounds[0]))
 
-        dart_env.DartEnv.__init__(self, 'snake_7link.skel', 4, obs_dim, self.control_bounds, disableViewer=True)
-
-        if self.randomize_dynamics:
-            self.bodynode_original_masses = []
-            self.bodynode_original_frictions = []
-            for bn in self.robot_skeleton.bodynodes:
-                self.bodynode_original_masses.append(bn.mass())
-                self.bodynode_original_frictions.append(bn.friction_coeff())
+        dart_env.DartEnv.__init__(self, 'snake_7link.skel', 4, obs_dim, self.control_bounds, disableViewer=True, **kwargs)
+        self.set_action_map(dofs=slice(3, None), scale=self.action_scale)
+        spec = ObservationSpec().q(1).dq()
+        if self.include_action_in_obs:
+            spec.field('prev_a', len(self.prev_a))
+        self.set_observation_spec(spec)
 
-        self.dart_world.set_collision_detector(3)
+        self.drag = FluidDrag(self.robot_skeleton.bodynodes, coefficient=50.0)
+        self.frame_hooks.append(self.drag.apply)
 
         for i in range(0, len(self.robot_skeleton.bodynodes)):
             self.robot_skeleton.bodynodes[i].set_friction_coeff(0)
         self.robot_skeleton.bodynodes[-1].set_friction_coeff(0)
 
-        utils.EzPickle.__init__(self)
-
-    def do_simulation(self, tau, n_frames):
-        for _ in range(n_frames):
-            for bn in self.robot_skeleton.bodynodes:
-                bn_vel = bn.com_spatial_velocity()
-                norm_dir = bn.to_world([0, 0, 1]) - bn.to_world([0, 0, 0])
-                vel_pos = bn_vel[3:] + np.cross(bn_vel[0:3], norm_dir) * 0.05
-                vel_neg = bn_vel[3:] - np.cross(bn_vel[0:3], norm_dir) * 0.05
-                fluid_force = [0.0, 0.0, 0.0]
-                if np.dot(vel_pos, norm_dir) > 0.0:
-                    fluid_force = -50.0 * np.dot(vel_pos, norm_dir) * norm_dir
-                if np.dot(vel_neg, norm_dir) < 0.0:
-                    fluid_force = -50.0 * np.dot(vel_neg, norm_dir) * norm_dir
-                bn.add_ext_force(fluid_force)
-
-            self.robot_skeleton.set_forces(tau)
-            self.dart_world.step()
+        utils.EzPickle.__init__(self, **kwargs)
 
     def advance(self, a):
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
+        tau = self.action_map(a)
 
         if self.include_action_in_obs:
-            self.prev_a = np.copy(clamped_control)
-
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[3:] = clamped_control * self.action_scale
+            self.prev_a = np.copy(self.action_map.clamped)
 
         self.do_simulation(tau, self.frame_skip)
 
     def step(self, a):
-        pre_state = [self.state_vector()]
-
         posbefore = self.robot_skeleton.q[0]
         self.advance(a)
         posafter = self.robot_skeleton.q[0]
@@ -84,18 +63,7 @@ class DartSnake7LinkEnv(dart_env.DartEnv, utils.EzPickle):
         done = not (np.isfinite(s).all() and (np.abs(s[2:]) < 100).all() and abs(deviation) < 1.5)
         ob = self._get_obs()
 
-        return ob, reward, done, {}
-
-    def _get_obs(self):
-        state =  np.concatenate([
-            self.robot_skeleton.q[1:],
-            self.robot_skeleton.dq,
-        ])
-
-        if self.include_action_in_obs:
-            state = np.concatenate([state, self.prev_a])
-
-        return state
+        return self._finish_step(ob, reward, done, {})
 
 
     def reset_model(self):
@@ -112,13 +80,6 @@ class DartSnake7LinkEnv(dart_env.DartEnv, utils.EzPickle):
         self.accumulated_rew = 0.0
         self.num_steps = 0.0
 
-        if self.randomize_dynamics:
-            for i in range(len(self.robot_skeleton.bodynodes)):
-                self.robot_skeleton.bodynodes[i].set_mass(
-                    self.bodynode_original_masses[i] + np.random.uniform(-1.5, 1.5))
-                self.robot_skeleton.bodynodes[i].set_friction_coeff(
-                    self.bodynode_original_frictions[i] + np.random.uniform(-0.5, 0.5))
-
         return state
 
     def viewer_setup(self):
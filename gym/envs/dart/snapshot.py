@@ -0,0 +1,126 @@
+from collections import namedtuple
+from copy import deepcopy
+
+import numpy as np
+
+__all__ = ['DartWorldState', 'DartEnvState', 'DartStateBank']
+
+
+class DartWorldState(namedtuple('DartWorldState', ['time', 'frame', 'x'])):
+    """Immutable snapshot of a `DartWorld`: the simulation time, the frame
+    counter and the concatenated positions and velocities of all skeletons
+    (in the layout of `pydart.World.states`)."""
+    __slots__ = ()
+
+
+class DartEnvState(namedtuple('DartEnvState',
+        ['world', 'np_random', 'perturbation', 'fields'])):
+    """Immutable snapshot of a `DartEnv`.
+
+    `world` is a `DartWorldState`, `np_random` the state of the environment's
+    random number generator (`None` if the snapshot was taken without it),
+    `perturbation` the state of the `PerturbationSchedule` (if any) and
+    `fields` a tuple of `(name, value)` pairs for the attributes listed in
+    `snapshot_fields`."""
+    __slots__ = ()
+
+
+def freeze(array):
+    """Return a read-only copy of `array`."""
+    array = np.array(array, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+def copy_fields(obj, names):
+    return tuple((name, deepcopy(getattr(obj, name)))
+                 for name in names if hasattr(obj, name))
+
+
+class DartStateBank(object):
+    """Bank of many snapshots of the same world, stored as contiguous arrays.
+
+    The world states are packed row by row into a single `(n, state_dim)`
+    array, so a bank of thousands of states costs little more than the raw
+    positions and velocities. Both `DartWorldState` and `DartEnvState`
+    snapshots can be stored; the bank gives back the same type.
+
+    Parameters
+    ----------
+    state_dim : int
+        Size of `DartWorldState.x` for the world the snapshots are taken from.
+
+    capacity : int (default: 64)
+        Initial number of rows. The bank grows automatically when full.
+
+    Example
+    -------
+    >>> bank = DartStateBank(state_dim=len(env.dart_world.states()))
+    >>> root = bank.append(env.clone_full_state())
+    >>> for _ in range(1000):
+    ...     env.restore_full_state(bank[root])
+    ...     rollout(env)
+    """
+    def __init__(self, state_dim, capacity=64):
+        self.state_dim = state_dim
+        self.times = np.zeros((capacity,), dtype=np.float64)
+        self.frames = np.zeros((capacity,), dtype=np.int64)
+        self.states = np.zeros((capacity, state_dim), dtype=np.float64)
+        self._extras = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, state):
+        """Add a snapshot to the bank and return its index."""
+        world_state = state.world if isinstance(state, DartEnvState) else state
+        if len(world_state.x) != self.state_dim:
+            raise ValueError('Expected a world state of size {0}, got '
+                '{1}.'.format(self.state_dim, len(world_state.x)))
+        if self._size == len(self.times):
+            self._grow(2 * len(self.times))
+
+        index = self._size
+        self.times[index] = world_state.time
+        self.frames[index] = world_state.frame
+        self.states[index] = world_state.x
+        self._extras.append(state._replace(world=None)
+            if isinstance(state, DartEnvState) else None)
+        self._size += 1
+        return index
+
+    def extend(self, states):
+        return [self.append(state) for state in states]
+
+    def clear(self):
+        self._extras = []
+        self._size = 0
+
+    def __getitem__(self, index):
+        if not (-self._size <= index < self._size):
+            raise IndexError('Index {0} out of range for a bank of {1} '
+                'states.'.format(index, self._size))
+        index = index % self._size
+        x = self.states[index].view()
+        x.flags.writeable = False
+        world_state = DartWorldState(float(self.times[index]),
+                                     int(self.frames[index]), x)
+        extra = self._extras[index]
+        if extra is None:
+            return world_state
+        return extra._replace(world=world_state)
+
+    def sample(self, np_random):
+        """Return a snapshot drawn uniformly with the random generator
+        `np_random` (e.g. the `np_random` of an environment)."""
+        if self._size == 0:
+            raise IndexError('Cannot sample from an empty bank.')
+        return self[np_random.randint(self._size)]
+
+    def _grow(self, capacity):
+        self.times = np.resize(self.times, (capacity,))
+        self.frames = np.resize(self.frames, (capacity,))
+        states = np.zeros((capacity, self.state_dim), dtype=np.float64)
+        states[:self._size] = self.states[:self._size]
+        self.states = states
@@ -0,0 +1,118 @@
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+
+__all__ = ['SPDController']
+
+
+class SPDController(object):
+    """Stable proportional-derivative controller [Tan et al. 2011].
+
+    The torques are computed from the mass matrix, the Coriolis and gravity
+    forces and the constraint forces, for a time step `dt`:
+
+        p = -Kp (q + dq dt - target_q)
+        d = -Kd dq
+        (M + Kd dt) qddot = -c + p + d + constraint_forces
+        tau = p + d - Kd qddot dt
+
+    The gains are diagonal and stored as vectors, the linear system is solved
+    with a Cholesky factorization (`M + Kd dt` is symmetric positive
+    definite) and all the intermediate arrays are preallocated.
+
+    Parameters
+    ----------
+    kp : array-like
+        Proportional gains, one for each degree of freedom.
+
+    kd : array-like
+        Derivative gains, one for each degree of freedom.
+
+    dt : float
+        Time step of the controller.
+
+    torque_limits : float or array-like, optional
+        Symmetric limits of the torques of the actuated degrees of freedom.
+
+    dofs : slice (default: all the degrees of freedom)
+        Actuated degrees of freedom. The torques of the other ones are zero.
+
+    Example
+    -------
+    >>> spd = SPDController(kp, kd, dt=0.002, dofs=slice(6, None))
+    >>> for _ in range(frame_skip):
+    ...     skel.set_forces(spd(skel, target_q))
+    ...     world.step()
+    """
+    def __init__(self, kp, kd, dt, torque_limits=None, dofs=None):
+        self.kp = np.array(kp, dtype=np.float64)
+        self.kd = np.array(kd, dtype=np.float64)
+        self.ndofs = ndofs = len(self.kp)
+        assert self.kd.shape == (ndofs,)
+        self.dt = dt
+        self.dofs = slice(0, ndofs) if dofs is None else dofs
+        self.passive = np.ones((ndofs,), dtype=np.bool_)
+        self.passive[self.dofs] = False
+        if torque_limits is None:
+            self.torque_limits = None
+        else:
+            self.torque_limits = np.broadcast_to(np.asarray(torque_limits,
+                dtype=np.float64), self.kp[self.dofs].shape).copy()
+
+        self._kd_dt = self.kd * dt
+        self._diagonal = np.diag_indices(ndofs)
+        self._A = np.zeros((ndofs, ndofs), dtype=np.float64)
+        self._p = np.zeros((ndofs,), dtype=np.float64)
+        self._d = np.zeros((ndofs,), dtype=np.float64)
+        self._rhs = np.zeros((ndofs,), dtype=np.float64)
+        self.tau = np.zeros((ndofs,), dtype=np.float64)
+
+    def set_gains(self, kp, kd):
+        """Replace the gains, e.g. to randomize them between episodes."""
+        self.kp[:] = kp
+        self.kd[:] = kd
+        np.multiply(self.kd, self.dt, out=self._kd_dt)
+
+    def compute(self, target_q, q, dq, M, c, constraint_forces, out=None):
+        """Torques driving the state `(q, dq)` to `target_q`, written into
+        `out` (defaults to the `tau` buffer, overwritten at the next call)."""
+        p, d, rhs, A = self._p, self._d, self._rhs, self._A
+        np.multiply(dq, self.dt, out=p)
+        p += q
+        p -= target_q
+        p *= -self.kp
+        np.multiply(dq, -self.kd, out=d)
+        np.subtract(p, c, out=rhs)
+        rhs += d
+        rhs += constraint_forces
+
+        np.copyto(A, M)
+        A[self._diagonal] += self._kd_dt
+        try:
+            qddot = cho_solve(cho_factor(A, overwrite_a=True, check_finite=False),
+                              rhs, overwrite_b=True, check_finite=False)
+        except LinAlgError:
+            # not positive definite, e.g. a degenerate mass matrix
+            np.copyto(A, M)
+            A[self._diagonal] += self._kd_dt
+            qddot = np.linalg.solve(A, rhs)
+
+        tau = self.tau if out is None else out
+        np.multiply(qddot, -self._kd_dt, out=tau)
+        tau += p
+        tau += d
+        tau[self.passive] = 0.0
+        return self.clip(tau)
+
+    def clip(self, tau):
+        """Clip in place the actuated torques of `tau`, of shape `(ndofs,)` or
+        `(N, ndofs)`, to the torque limits."""
+        if self.torque_limits is not None:
+            actuated = tau[..., self.dofs]
+            np.clip(actuated, -self.torque_limits, self.torque_limits,
+                    out=actuated)
+        return tau
+
+    def __call__(self, skel, target_q, out=None):
+        """Torques driving the skeleton `skel` to `target_q`."""
+        return self.compute(target_q, skel.q, skel.dq, skel.M, skel.c,
+                            skel.constraint_forces(), out=out)
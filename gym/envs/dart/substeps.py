@@ -0,0 +1,68 @@
+import numpy as np
+
+__all__ = ['SubstepStats']
+
+
+class SubstepStats(object):
+    """Statistics of a skeleton accumulated over the frames of one step.
+
+    `DartWorld.step_frames` calls `begin` before the first frame and `record`
+    after every frame. The center of mass of the skeleton is stored for every
+    frame, and the contact forces and the number of frames in contact are
+    summed for every body node, so that rewards and termination checks can
+    see contacts that do not last until the end of the step.
+
+    Parameters
+    ----------
+    skel : `pydart.Skeleton`
+        The skeleton to track.
+
+    other_skel_id : int, optional
+        If given, only the contacts with this skeleton (e.g. the ground) are
+        counted.
+
+    Example
+    -------
+    >>> stats = SubstepStats(skel, other_skel_id=0)
+    >>> world.step_frames(frame_skip, skel, tau, stats=stats)
+    >>> stats.contact_frames[feet]      # frames each foot was in contact
+    """
+    def __init__(self, skel, other_skel_id=None):
+        self.skel = skel
+        self.other_skel_id = other_skel_id
+        num_bodynodes = len(skel.bodynodes)
+        self._ids = np.arange(num_bodynodes)
+        self._coms = np.zeros((0, 3), dtype=np.float64)
+        self.contact_force = np.zeros((num_bodynodes,), dtype=np.float64)
+        self.contact_frames = np.zeros((num_bodynodes,), dtype=np.int64)
+        self.num_frames = 0
+
+    def begin(self, n_frames):
+        """Clear the statistics, for a step of `n_frames` frames."""
+        if len(self._coms) < n_frames:
+            self._coms = np.zeros((n_frames, 3), dtype=np.float64)
+        self.contact_force[:] = 0.0
+        self.contact_frames[:] = 0
+        self.num_frames = 0
+
+    def record(self, world):
+        """Accumulate the state of the skeleton after a frame of `world`."""
+        skel, contacts = self.skel, world.contacts
+        self._coms[self.num_frames] = skel.com()
+        self.contact_force += contacts.force_per_bodynode(skel.id,
+            len(self.contact_force), other_skel_id=self.other_skel_id)
+        self.contact_frames += contacts.bodynode_flags(skel.id, self._ids,
+            other_skel_id=self.other_skel_id)
+        self.num_frames += 1
+
+    @property
+    def coms(self):
+        """Centers of mass of the skeleton after each frame of the step."""
+        return self._coms[:self.num_frames]
+
+    def mean_com(self):
+        return self.coms.mean(axis=0)
+
+    def mean_contact_force(self):
+        """Contact force on each body node, averaged over the frames."""
+        return self.contact_force / max(self.num_frames, 1)
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+import gym
+from gym import error, spaces
+from gym.envs.dart.batch_env import DartBatchEnv
+from gym.envs.dart.observation import ObservationSpec
+from gym.envs.dart.randomization import DynamicsRandomizer
+from gym.envs.dart.tests.utils import FakeSkeleton
+from gym.envs.registration import registry
+from gym.utils import seeding
+
+
+class StandInEnv(gym.Env):
+    """Cheap stand-in for a Dart environment: a point mass on a line, pushed
+    by the actions, done once it passes `|x| = 1`. Like `DartEnv`, it writes
+    its observations into `obs_out` and takes its dynamics from a table."""
+    def __init__(self):
+        self.observation_space = spaces.Box(-np.inf, np.inf, shape=(2,), dtype=np.float64)
+        self.action_space = spaces.Box(-1.0, 1.0, shape=(1,), dtype=np.float64)
+        self.robot_skeleton = FakeSkeleton(['mass'], ndofs=1)
+        self.dynamics = None
+        self.dynamics_table = None
+        self._dynamics_episode = 0
+        self._obs_plan = ObservationSpec().q().dq().compile(1)
+        self.obs_out = None
+        self.resets = 0
+        self.closed = False
+        self.seed()
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def set_dynamics_randomization(self, offsets=None, factors=None):
+        self.dynamics = DynamicsRandomizer(self.robot_skeleton, offsets,
+                                           factors)
+        return self.dynamics
+
+    def _get_dynamics(self):
+        return self.dynamics
+
+    def set_dynamics_table(self, table):
+        self.dynamics_table = table
+        self._dynamics_episode = 0
+
+    def reset(self):
+        if self.dynamics_table is not None:
+            self.dynamics.apply(self.dynamics_table[self._dynamics_episode])
+            self._dynamics_episode += 1
+        self.resets += 1
+        skel = self.robot_skeleton
+        skel.q = self.np_random.uniform(low=-0.1, high=0.1, size=1)
+        skel.dq = np.zeros(1)
+        return self._get_obs()
+
+    def step(self, a):
+        skel = self.robot_skeleton
+        skel.dq = skel.dq + a / skel.masses()[0]
+        skel.q = skel.q + skel.dq
+        return (self._get_obs(), -abs(float(a[0])), bool(abs(skel.q[0]) > 1.0),
+                {'x': skel.q[0]})
+
+    def _get_obs(self):
+        out = self.obs_out if self.obs_out is not None else np.empty(2)
+        skel = self.robot_skeleton
+        return self._obs_plan.write(out, skel.q, skel.dq)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def spec_id():
+    registry.register(id='DartStandIn-v0', entry_point=StandInEnv,
+                      max_episode_steps=3)
+    yield 'DartStandIn-v0'
+    del registry.env_specs['DartStandIn-v0']
+
+
+def test_batch_env_rows(spec_id):
+    env = DartBatchEnv(spec_id, num_envs=3)
+    env.seed(0)
+    observations = env.reset()
+    assert observations.shape == (3, 2)
+    assert np.all(np.abs(observations[:, 0]) <= 0.1)
+    assert np.all(observations[:, 1] == 0.0)
+    # each env writes straight into its row of the batch
+    for i, e in enumerate(env.envs):
+        assert np.shares_memory(e.obs_out, env.observations[i:i + 1])
+
+    observations, rewards, dones, infos = env.step([[0.5], [0.0], [-0.5]])
+    assert np.allclose(observations[:, 1], [0.5, 0.0, -0.5])
+    assert np.allclose(rewards, [-0.5, 0.0, -0.5])
+    assert not np.any(dones)
+    assert np.allclose([info['x'] for info in infos], observations[:, 0])
+    # copies of the buffers
+    assert not np.shares_memory(observations, env.observations)
+    observations[:] = 7.0
+    assert np.all(env.observations != 7.0)
+    env.close()
+    assert all(e.closed for e in env.envs)
+
+
+def test_batch_env_workers(spec_id):
+    actions = np.array([[0.2], [-0.4], [0.6], [0.0], [0.5]])
+    envs = [DartBatchEnv(spec_id, num_envs=5, num_workers=num_workers)
+            for num_workers in (1, 2)]
+    try:
+        # the worlds are sharded as [0, 1] and [2, 3, 4]
+        assert envs[1]._slices == [(0, 2), (2, 5)]
+        results = []
+        for env in envs:
+            env.seed(5)
+            transitions = [(env.reset(), None, None, None)]
+            for _ in range(4):
+                transitions.append(env.step(actions))
+            results.append(transitions)
+        for single, sharded in zip(*results):
+            assert np.all(single[0] == sharded[0])
+            for a, b in zip(single[1:3], sharded[1:3]):
+                assert np.all(a == b)
+            assert single[3] == sharded[3]
+    finally:
+        for env in envs:
+            env.close()
+
+
+def test_batch_env_auto_reset(spec_id):
+    env = DartBatchEnv(spec_id, num_envs=2)
+    env.seed(1)
+    env.reset()
+    observations, rewards, dones, infos = env.step([[2.0], [0.0]])
+    assert np.all(dones == [True, False])
+    # the info is the one of the terminal step, the observation the one of
+    # the next episode
+    assert infos[0]['x'] > 1.0
+    assert 'TimeLimit.truncated' not in infos[0]
+    assert abs(observations[0, 0]) <= 0.1 and observations[0, 1] == 0.0
+    assert [e.resets for e in env.envs] == [2, 1]
+    env.close()
+
+
+def test_batch_env_time_limit(spec_id):
+    env = DartBatchEnv(spec_id, num_envs=2)
+    env.reset()
+    for _ in range(2):
+        _, _, dones, infos = env.step([[0.0], [0.0]])
+        assert not np.any(dones)
+    # the episodes reach `max_episode_steps`, the second one also ends
+    observations, _, dones, infos = env.step([[0.0], [2.0]])
+    assert np.all(dones)
+    assert infos[0]['TimeLimit.truncated'] is True
+    assert infos[1]['TimeLimit.truncated'] is False
+    assert [e.resets for e in env.envs] == [2, 2]
+    assert np.all(observations[:, 1] == 0.0)
+
+    # the step counters restart with the new episodes
+    _, _, dones, infos = env.step([[0.0], [0.0]])
+    assert not np.any(dones)
+    assert not any('TimeLimit.truncated' in info for info in infos)
+    env.close()
+
+
+def test_batch_env_sample_dynamics_table(spec_id):
+    randomize_dynamics = {'factors': {'mass': (0.5, 1.5)}}
+    env = DartBatchEnv(spec_id, num_envs=3,
+                       randomize_dynamics=randomize_dynamics)
+    table = env.sample_dynamics_table(2, seed=3)
+    assert table.shape == (3, 2, 1)
+    assert np.all((table >= 0.5) & (table < 1.5))
+    for episode in range(2):
+        env.reset()
+        masses = [e.robot_skeleton.masses()[0] for e in env.envs]
+        assert np.allclose(masses, table[:, episode, 0])
+
+    # the table does not depend on how the worlds are sharded
+    sharded = DartBatchEnv(spec_id, num_envs=3, num_workers=2,
+                           randomize_dynamics=randomize_dynamics)
+    assert np.all(sharded.sample_dynamics_table(2, seed=3) == table)
+    sharded.close()
+    env.close()
+
+    env = DartBatchEnv(spec_id, num_envs=3)
+    with pytest.raises(error.Error):
+        env.sample_dynamics_table(2, seed=3)
+    env.close()
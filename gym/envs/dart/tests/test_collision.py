@@ -0,0 +1,32 @@
+import pytest
+
+from gym import error
+from gym.envs.dart import collision
+from gym.envs.dart.collision import set_collision_profile
+from gym.envs.dart.tests.utils import FakeWorld
+
+
+def test_fixed_profiles_fall_back():
+    world = FakeWorld({'bullet': 0.0, 'fcl': 0.0})
+    assert set_collision_profile(world, 'fast') == 'bullet'
+    assert world.detector == 2
+    assert set_collision_profile(world, 'accurate') == 'fcl'
+    assert world.steps == 0
+
+    with pytest.raises(error.Error):
+        set_collision_profile(FakeWorld({}), 'fast')
+    with pytest.raises(error.Error):
+        set_collision_profile(world, 'fastest')
+
+
+def test_auto_profile_is_benchmarked_once_per_key():
+    world = FakeWorld({'ode': 0.002, 'bullet': 0.0, 'fcl': 0.001})
+    assert set_collision_profile(world, 'auto', key='model.skel', steps=3) == 'bullet'
+    assert world.detector == 2
+    assert world.steps == 9 and world.restored == 3
+
+    other = FakeWorld({'ode': 0.002, 'bullet': 0.0, 'fcl': 0.001})
+    assert set_collision_profile(other, 'auto', key='model.skel') == 'bullet'
+    assert other.steps == 0
+    collision._auto_choices.clear()
+
@@ -0,0 +1,13 @@
+from gym.envs.dart.config import CopyConfig, RenderConfig, WorldConfig, make_config
+
+
+def test_make_config():
+    assert make_config(RenderConfig, None) == RenderConfig(None, None, False)
+    assert make_config(WorldConfig, None) == WorldConfig(False, False, None)
+    assert make_config(CopyConfig, None) == CopyConfig(1, 0.5, 0, None)
+    # dicts, e.g. given to `gym.make`, fill the other fields with defaults
+    config = make_config(CopyConfig, {'num': 4, 'spacing': 1.0})
+    assert config == CopyConfig(num=4, spacing=1.0)
+    assert config.index == 0 and config.shared_world is None
+    world = WorldConfig(reuse=True)
+    assert make_config(WorldConfig, world) is world
@@ -0,0 +1,38 @@
+import numpy as np
+
+from gym.envs.dart.contacts import ContactSummary
+
+
+def make_raw(*contacts):
+    # (point, force, skel_id1, bodynode_id1, skel_id2, bodynode_id2)
+    return np.concatenate([np.concatenate([point, force, ids])
+                           for point, force, ids in contacts])
+
+
+def test_contact_summary():
+    raw = make_raw(([0, 0, 0], [0, 3, 4], [0, 0, 1, 5]),   # ground - l-foot
+                   ([1, 0, 0], [0, 0, 2], [1, 2, 1, 3]),   # self-contact
+                   ([2, 0, 0], [1, 0, 0], [1, 6, 0, 0]))   # r-foot - ground
+    contacts = ContactSummary(raw)
+    assert len(contacts) == 3
+    assert contacts.points.shape == contacts.forces.shape == (3, 3)
+
+    feet = np.array([5, 6])
+    assert list(contacts.bodynode_flags(1, feet)) == [True, True]
+    assert list(contacts.bodynode_flags(1, [2, 3, 4])) == [True, True, False]
+    assert list(contacts.bodynode_flags(1, [2, 3, 5], other_skel_id=0)) == \
+        [False, False, True]
+
+    forces = contacts.force_per_bodynode(1, 7)
+    assert np.allclose(forces, [0, 0, 2, 2, 0, 5, 1])
+    assert np.allclose(contacts.force_per_bodynode(1, 7, other_skel_id=0),
+                       [0, 0, 0, 0, 0, 5, 1])
+    assert contacts.total_squared_force() == 30.0
+
+
+def test_empty_contact_summary():
+    contacts = ContactSummary()
+    assert len(contacts) == 0
+    assert not contacts.bodynode_flags(1, [0, 1]).any()
+    assert np.all(contacts.force_per_bodynode(1, 3) == 0)
+    assert contacts.total_squared_force() == 0.0
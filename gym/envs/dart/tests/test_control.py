@@ -0,0 +1,65 @@
+import numpy as np
+
+from gym.envs.dart.control import ActionMap
+
+
+def legacy_torques(a, ndofs, control_bounds, action_scale, start):
+    # element-wise clamping, as done by the environments before `ActionMap`
+    clamped_control = np.array(a)
+    for i in range(len(clamped_control)):
+        if clamped_control[i] > control_bounds[0][i]:
+            clamped_control[i] = control_bounds[0][i]
+        if clamped_control[i] < control_bounds[1][i]:
+            clamped_control[i] = control_bounds[1][i]
+    tau = np.zeros(ndofs)
+    tau[start:] = clamped_control * action_scale
+    return tau
+
+
+def test_action_map_matches_legacy():
+    control_bounds = np.array([[1.0] * 6, [-1.0] * 6])
+    action_scale = np.array([100, 100, 20, 100, 100, 20])
+    action_map = ActionMap(9, control_bounds, dofs=slice(3, None),
+                           scale=action_scale)
+    rng = np.random.RandomState(0)
+    for _ in range(10):
+        a = rng.uniform(-2.0, 2.0, size=(6,))
+        tau = action_map(a)
+        assert tau is action_map.tau
+        assert np.allclose(tau, legacy_torques(a, 9, control_bounds,
+                                               action_scale, 3))
+        assert np.allclose(action_map.clamped, np.clip(a, -1.0, 1.0))
+
+
+def test_action_map_batch():
+    action_map = ActionMap(5, [[1.0] * 3, [-1.0] * 3], dofs=slice(2, None),
+                           scale=10.0)
+    actions = np.array([[2.0, 0.5, -3.0], [0.1, -0.2, 0.3]])
+    taus = action_map(actions)
+    assert taus.shape == (2, 5)
+    assert np.allclose(taus, [[0.0, 0.0, 10.0, 5.0, -10.0],
+                              [0.0, 0.0, 1.0, -2.0, 3.0]])
+
+    out = np.full((2, 5), 7.0)
+    assert action_map(actions, out=out) is out
+    assert np.allclose(out[:, :2], 7.0)
+    assert np.allclose(out[:, 2:], taus[:, 2:])
+
+
+def test_action_map_no_clip_and_torque_limits():
+    action_map = ActionMap(2, dofs=slice(0, 1), scale=40)
+    assert np.allclose(action_map([2.0]), [80.0, 0.0])
+
+    action_map = ActionMap(3, [[1.0] * 3, [-1.0] * 3], scale=100.0,
+                           torque_limits=[50.0, 200.0, 10.0])
+    assert np.allclose(action_map([1.0, -1.0, 0.05]), [50.0, -100.0, 5.0])
+
+
+def test_action_map_offset():
+    # map [-1, 1] affinely onto joint limits, as for SPD targets
+    lower, upper = np.array([-0.5, 0.0]), np.array([1.5, 2.0])
+    scale = (upper - lower) / 2.0
+    action_map = ActionMap(3, [[1.0] * 2, [-1.0] * 2], dofs=slice(1, None),
+                           scale=scale, offset=lower + scale)
+    assert np.allclose(action_map([-1.0, 3.0]), [0.0, -0.5, 2.0])
+    assert np.allclose(action_map([0.0, 0.0]), [0.0, 0.5, 1.0])
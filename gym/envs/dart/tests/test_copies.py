@@ -0,0 +1,34 @@
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from gym.envs.dart.copies import copy_offsets, replicate_skeleton
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets')
+
+
+def test_copy_offsets():
+    assert np.allclose(copy_offsets(1, 0.5), [0.0])
+    assert np.allclose(copy_offsets(4, 0.5), [-0.75, -0.25, 0.25, 0.75])
+
+
+def test_replicate_skeleton(tmpdir):
+    path = os.path.join(ASSETS, 'hopper_capsule.skel')
+    filename = replicate_skeleton(path, 3, spacing=0.5,
+                                  directory=str(tmpdir))
+    assert os.path.dirname(filename) == str(tmpdir)
+    assert replicate_skeleton(path, 3, spacing=0.5,
+                              directory=str(tmpdir)) == filename
+
+    skeletons = ET.parse(filename).getroot().find('world').findall('skeleton')
+    assert [skeleton.get('name') for skeleton in skeletons] == [
+        'ground skeleton', 'hopper_0', 'hopper_1', 'hopper_2']
+    offsets = [float(skeleton.find('transformation').text.split()[2])
+               for skeleton in skeletons[1:]]
+    assert np.allclose(offsets, [-0.5, 0.0, 0.5])
+    # the copies are complete
+    original = ET.parse(path).getroot().find('world').findall('skeleton')[-1]
+    for skeleton in skeletons[1:]:
+        assert len(skeleton.findall('body')) == len(original.findall('body'))
+        assert len(skeleton.findall('joint')) == len(original.findall('joint'))
@@ -0,0 +1,266 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pydart2')
+
+from gym.envs.dart import dart_world
+from gym.envs.dart.config import RenderConfig, WorldConfig
+from gym.envs.dart.dart_env import DartEnv
+from gym.envs.dart.observation import ObservationSpec
+from gym.envs.dart.tests.utils import FakeSkeleton, FakeWorld
+
+
+class StandInEnv(DartEnv):
+    """Dart environment of a point mass on a line (the world is a
+    `FakeWorld`), done once it passes `x = 1`, with a random target drawn
+    at every reset."""
+    snapshot_fields = ('target',)
+    supports_copies = True
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('render', RenderConfig(headless=True))
+        DartEnv.__init__(self, 'cartpole.skel', 2, 2, np.array([[1.0], [-1.0]]),
+                         dt=0.1, **kwargs)
+        self.set_action_map()
+        self.set_observation_spec(ObservationSpec().q().dq())
+
+    def step(self, a):
+        self.do_simulation(self.action_map(a), self.frame_skip)
+        x = self.robot_skeleton.q[0]
+        info = {'x': x}
+        if x < 0.0:
+            info['behind'] = True
+        return self._finish_step(self._get_obs(), -abs(a[0]), x > 1.0, info)
+
+    def reset_model(self):
+        self.model_resets = getattr(self, 'model_resets', 0) + 1
+        self.reset_world()
+        self.target = self.np_random.uniform(low=-1.0, high=1.0)
+        q = self.np_random.uniform(low=-0.1, high=0.1, size=1)
+        self.set_state(q, np.zeros(1))
+        return self._get_obs()
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Worlds loaded by `DartWorldPool.load`, which are `FakeWorld`s with
+    one skeleton of one degree of freedom per skeleton of the model."""
+    loads = []
+    def load_world(dt, full_paths):
+        world = ET.parse(full_paths[0]).getroot().find('world')
+        skeletons = [FakeSkeleton(ndofs=1) for _ in world.findall('skeleton')]
+        for i, skel in enumerate(skeletons):
+            skel.id = i
+        loads.append(FakeWorld(skeletons=skeletons, dt=dt))
+        return loads[-1]
+    monkeypatch.setattr(dart_world, 'load_world', load_world)
+    yield loads
+    dart_world.world_pool.clear()
+
+
+def test_divergence_on_last_frame(loads):
+    env = StandInEnv()
+    env.set_divergence_check(4, max_velocity=10.0)
+    env.reset()
+    # the step (2 frames) ends before the first check (every 4 frames)
+    env.robot_skeleton.set_velocities([9.5])
+    ob, reward, done, info = env.step(np.array([1.0]))
+    assert done and info['diverged']
+    assert env.dart_world.frame == 2
+    env.reset()
+    assert not env.diverged
+
+
+def test_spd_control(loads):
+    env = StandInEnv()
+    assert env.control_mode == 'torque' and env.spd is None
+    env.set_spd_control([5.0], [0.5], torque_limits=[2.0])
+    assert env.control_mode == 'spd'
+    assert np.all(env.spd.kp == [5.0]) and np.all(env.spd.kd == [0.5])
+    # actions are mapped from the action bounds to the joint limits
+    assert np.all(env.action_map(np.array([0.5])) == [0.5])
+    env.set_action_map()
+    assert env.control_mode == 'torque' and env.spd is None
+
+
+def test_step_many_stops_at_done(loads):
+    env = StandInEnv()
+    env.reset()
+    env.set_state(np.zeros(1), np.zeros(1))
+    observations, rewards, dones, infos = env.step_many(np.full((5, 1), 0.1))
+    # x = 0.3, 1.0 then 2.1 after the third step, which is terminal
+    assert len(observations) == len(rewards) == len(dones) == 3
+    assert np.allclose(observations[:, 0], [0.3, 1.0, 2.1])
+    assert np.allclose(observations[:, 1], [0.2, 0.4, 0.6])
+    assert np.allclose(rewards, -0.1)
+    assert np.all(dones == [False, False, True])
+    assert np.allclose(infos['x'], [0.3, 1.0, 2.1])
+    assert env.dart_world.frame == 6
+
+
+def test_step_many_buffers(loads):
+    env = StandInEnv()
+    env.reset()
+    observations = env.step_many(np.zeros((4, 1)))[0]
+    buffers = env._rollout_buffers
+    assert len(buffers[0]) == 4
+    assert np.shares_memory(observations, buffers[0])
+    # shorter sequences reuse the buffers
+    observations, rewards, dones, _ = env.step_many(np.zeros((2, 1)))
+    assert env._rollout_buffers is buffers
+    assert np.shares_memory(observations, buffers[0])
+    assert np.shares_memory(rewards, buffers[1])
+    assert np.shares_memory(dones, buffers[2])
+    # longer ones grow them
+    observations = env.step_many(np.zeros((6, 1)))[0]
+    assert len(observations) == 6 and len(env._rollout_buffers[0]) == 6
+    assert not np.shares_memory(observations, buffers[0])
+
+
+def test_step_many_restores_obs_out(loads):
+    env = StandInEnv()
+    env.reset()
+    obs_out = env.obs_out = np.zeros(2)
+    step = env.step
+    def failing_step(a):
+        if env.dart_world.frame >= 4:
+            raise RuntimeError('simulation failed')
+        return step(a)
+    env.step = failing_step
+    with pytest.raises(RuntimeError):
+        env.step_many(np.zeros((5, 1)))
+    assert env.obs_out is obs_out
+    # the observations of the steps run were written into the buffer, not
+    # into `obs_out`
+    assert np.all(obs_out == 0.0)
+
+
+def test_step_many_fills_missing_infos(loads):
+    env = StandInEnv()
+    env.reset()
+    env.set_state(np.array([-0.5]), np.zeros(1))
+    _, _, _, infos = env.step_many(np.full((3, 1), 0.1))
+    # `behind` is only in the infos of the steps with x < 0
+    assert sorted(infos) == ['behind', 'x']
+    assert infos['behind'].dtype == np.bool_
+    assert np.all(infos['behind'] == [True, False, False])
+
+
+def test_harvest_reset_states(loads):
+    env = StandInEnv()
+    env.seed(0)
+    bank = env.harvest_reset_states(3, settle_frames=2)
+    assert env.reset_bank is bank and len(bank) == 3
+    assert env.model_resets == 3
+    for i in range(3):
+        # settled under zero torques
+        assert bank[i].world.frame == 2
+        assert bank[i].perturbation is None
+    assert len(set(float(bank[i].world.x[2]) for i in range(3))) == 3
+
+    # with a bank, resets restore one of its states instead of calling
+    # `reset_model`
+    starts = [float(bank[i].world.x[2]) for i in range(3)]
+    targets = [dict(bank[i].fields)['target'] for i in range(3)]
+    for _ in range(5):
+        ob = env.reset()
+        assert env.model_resets == 3
+        i = starts.index(ob[0])
+        assert env.dart_world.frame == 2
+        assert env.target == targets[i]
+        assert np.all(ob == env._get_obs())
+
+
+def test_reset_restores_bank_state(loads):
+    env = StandInEnv()
+    env.reset()
+    target = env.target
+    env.step(np.array([0.5]))
+    # the state of a rollout, with the fields of the start of its episode
+    assert env.add_reset_state() == 0
+    state = env.reset_bank[0]
+    env.target = 2.0
+    env.step(np.array([-0.5]))
+
+    env.seed(1)
+    ob = env.reset()
+    assert env.model_resets == 1
+    assert env.target == target
+    assert np.all(env.dart_world.states() == state.world.x)
+    # the velocity after the step
+    assert ob[1] == 1.0
+
+
+def test_reset_bank_fallbacks(loads):
+    env = StandInEnv()
+    env.reset()
+    bank = env.make_state_bank()
+    assert env.set_reset_bank(bank) is bank
+    # empty bank
+    env.reset()
+    assert env.model_resets == 2
+    bank.append(env.clone_state())
+    env.reset()
+    assert env.model_resets == 2
+    env.set_reset_bank(None)
+    env.reset()
+    assert env.model_resets == 3
+
+    # copies of the robot sharing a world are reset by `reset_model`
+    env = StandInEnv(copies={'num': 2})
+    assert len(env.dart_world.skeletons) == 3
+    env.reset()
+    env.add_reset_state()
+    env.reset()
+    assert env.model_resets == 2
+
+
+def test_prewarm_and_close(loads):
+    pool = dart_world.world_pool
+    StandInEnv.prewarm(2)
+    assert len(loads) == 2
+    envs = [StandInEnv(world=WorldConfig(reuse=True)) for _ in range(3)]
+    # the first two take the pre-warmed worlds
+    assert len(loads) == 3
+    assert set(env.dart_world for env in envs) == set(loads)
+    key = envs[0]._world_key
+    assert key[0] is StandInEnv and key[2] == 0.1
+    assert pool.size(key) == 0
+
+    envs[0].step(np.array([1.0]))
+    world = envs[0].dart_world
+    envs[0].close()
+    assert envs[0].dart_world is None and pool.size(key) == 1
+    assert world.frame == 0
+    # other keys get their own worlds
+    class OtherEnv(StandInEnv):
+        pass
+    other = OtherEnv(world={'reuse': True})
+    assert other.dart_world is loads[3]
+    assert StandInEnv(world={'reuse': True}).dart_world is world
+
+    # by default, envs neither take nor give back pooled worlds
+    envs[1].close()
+    env = StandInEnv()
+    assert env.dart_world is loads[4]
+    env.close()
+    assert pool.size(key) == 1 and env.dart_world is None
+
+
+def test_close_restores_dynamics(loads):
+    env = StandInEnv(world={'reuse': True})
+    env.set_dynamics_randomization(factors={'mass': (0.5, 0.9)})
+    skel = env.robot_skeleton
+    nominal = skel.masses()
+    env.reset()
+    assert all(m < n for m, n in zip(skel.masses(), nominal))
+    env.close()
+    # the world goes back to the pool with its nominal parameters
+    assert skel.masses() == nominal
+
+    env = StandInEnv(world={'reuse': True})
+    assert env.robot_skeleton is skel
+    env.set_dynamics_randomization(factors={'mass': (0.5, 0.9)})
+    assert np.all(env.dynamics.nominal == nominal)
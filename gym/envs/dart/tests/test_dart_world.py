@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pydart2')
+
+from gym.envs.dart import dart_world
+from gym.envs.dart.dart_world import DartWorld, DartWorldPool
+from gym.envs.dart.tests.utils import FakeSkeleton, FakeWorld
+
+
+class FakeApi(object):
+    """The functions of `pydart2_api` called by `DartWorld.step_frames`,
+    counting the frames instead of stepping a DART world."""
+    def __init__(self):
+        self.steps = 0
+
+    def world__step(self, wid):
+        self.steps += 1
+
+    def skeleton__setForces(self, wid, skel_id, tau):
+        pass
+
+
+@pytest.fixture
+def world(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(dart_world, 'papi', api)
+    # a `DartWorld` without a DART world behind it
+    world = DartWorld.__new__(DartWorld)
+    world.id, world.skeletons, world.recording = 0, [], None
+    world._frame, world.state_version = 0, 0
+    world._contacts_stale, world.legacy_contacts = False, False
+    return world
+
+
+def test_step_frames_guard(world):
+    checked = []
+    def guard():
+        checked.append(dart_world.papi.steps)
+        return False
+    assert world.step_frames(7, guard=guard, guard_every=3) == 7
+    # every 3 frames, and after the last one
+    assert checked == [3, 6, 7]
+    assert world.frame == 7 and world.state_version == 7
+
+    del checked[:]
+    assert world.step_frames(6, guard=guard, guard_every=3) == 6
+    assert checked == [10, 13]
+
+    assert world.step_frames(5, guard=lambda: True, guard_every=2) == 2
+    assert world.frame == 15
+
+
+def test_step_frames_keeps_forces(world):
+    skel = FakeSkeleton(ndofs=2)
+    tau = np.ones(2)
+    world.step_frames(2, skel, tau)
+    # the action map reuses its output buffer for the next step
+    tau[:] = 5.0
+    assert np.all(skel._tau == 1.0)
+
+
+def test_world_pool(monkeypatch, tmpdir):
+    loads = []
+    def load_world(dt, full_paths):
+        loads.append(FakeWorld(skeletons=[FakeSkeleton(ndofs=1)], dt=dt))
+        return loads[-1]
+    monkeypatch.setattr(dart_world, 'load_world', load_world)
+    pool = DartWorldPool()
+
+    tmpdir.join('robot.skel').write('')
+    paths = pool.resolve(['robot.skel'], str(tmpdir))
+    assert paths == (str(tmpdir.join('robot.skel')),)
+    assert pool.resolve([paths[0]], '/elsewhere') == paths
+    with pytest.raises(IOError):
+        pool.resolve(['missing.skel'], str(tmpdir))
+
+    key, other = (object, paths, 0.002), (object, paths, 0.001)
+    world = pool.acquire(key, 0.002, paths)
+    assert loads == [world] and pool.size() == 0
+    initial = world.initial_state
+    world.step_frames(3, world.skeletons[0], np.ones(1))
+    assert world.frame == 3
+    # set up by the env that owns the world
+    skel = world.skeletons[0]
+    skel.set_self_collision_check(True)
+    skel.bodynodes[0].set_friction_coeff(0.0)
+    skel.bodynodes[1].set_collidable(False)
+    skel.dofs[0].set_damping_coefficient(2.0)
+    world.set_gravity([0.0, 0.0, 0.0])
+    world.constraints.append('joint limit')
+
+    pool.release(key, world)
+    assert pool.size(key) == 1 and pool.size(other) == 0
+    # released worlds are back in their initial state, with their initial
+    # settings and without the constraints added to them
+    assert world.resets == 1
+    assert world.frame == initial.frame
+    assert np.all(world.states() == initial.x)
+    assert not skel.self_collision_check()
+    assert skel.bodynodes[0].friction_coeff() == 1.0
+    assert skel.bodynodes[1].is_collidable()
+    assert skel.dofs[0].damping_coefficient() == 0.0
+    assert np.all(world.gravity() == [0.0, -9.81, 0.0])
+    assert world.constraints == []
+
+    # and reused for the same key only
+    assert pool.acquire(other, 0.001, paths) is loads[1]
+    assert pool.acquire(key, 0.002, paths) is world
+    assert len(loads) == 2 and pool.size() == 0
+    assert pool.acquire(key, 0.002, paths) is loads[2]
+    # `load` bypasses the pool
+    pool.release(key, world)
+    assert pool.load(0.002, paths) is loads[3] and pool.size(key) == 1
+
+    pool.clear()
+    assert world.destroyed and pool.size() == 0
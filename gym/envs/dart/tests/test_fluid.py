@@ -0,0 +1,65 @@
+import numpy as np
+
+from gym.envs.dart.fluid import FluidDrag
+from gym.envs.dart.tests.utils import FakeBodyNode
+
+
+def legacy_drag(spatial_velocity, normal):
+    # per-body node drag, as computed by the snake before `FluidDrag`
+    vel_pos = spatial_velocity[3:] + np.cross(spatial_velocity[0:3], normal) * 0.05
+    vel_neg = spatial_velocity[3:] - np.cross(spatial_velocity[0:3], normal) * 0.05
+    fluid_force = [0.0, 0.0, 0.0]
+    if np.dot(vel_pos, normal) > 0.0:
+        fluid_force = -50.0 * np.dot(vel_pos, normal) * normal
+    if np.dot(vel_neg, normal) < 0.0:
+        fluid_force = -50.0 * np.dot(vel_neg, normal) * normal
+    return fluid_force
+
+
+def random_rotation(rng):
+    q, r = np.linalg.qr(rng.normal(size=(3, 3)))
+    return q * np.sign(np.diag(r))
+
+
+def test_fluid_drag_matches_legacy():
+    rng = np.random.RandomState(0)
+    spatial_velocities = rng.normal(size=(7, 6))
+    bodynodes = [FakeBodyNode(rotation=random_rotation(rng),
+                              spatial_velocity=velocity)
+                 for velocity in spatial_velocities]
+    drag = FluidDrag(bodynodes)
+    forces = drag.apply()
+    assert forces is drag.forces
+    for bodynode, velocity, force in zip(bodynodes, spatial_velocities, forces):
+        normal = bodynode.transform[:3, 2]
+        assert np.allclose(force, legacy_drag(velocity, normal))
+        assert len(bodynode.forces) == 1
+        assert np.allclose(bodynode.forces[0], force)
+
+
+def test_fluid_drag_compute():
+    drag = FluidDrag([None, None], coefficient=[1.0, 2.0], normal_axis=1)
+    normals = np.array([[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]])
+    velocities = np.array([[3.0, -2.0, 1.0], [0.5, 4.0, 0.0]])
+    out = np.empty((2, 3))
+    assert drag.compute(velocities, normals, out=out) is out
+    assert np.allclose(out, [[0.0, 2.0, 0.0], [-1.0, 0.0, 0.0]])
+
+
+def test_fluid_drag_reads_spatial_velocity():
+    # the linear velocity of `com_spatial_velocity` differs from
+    # `com_linear_velocity`; the drag must use the former, as the snake did
+    rotation = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    rotation = rotation.dot(np.array([[1.0, 0.0, 0.0], [0.0, 0.0, -1.0],
+                                      [0.0, 1.0, 0.0]]))
+    bodynode = FakeBodyNode(rotation=rotation,
+                            spatial_velocity=[0.0, 0.0, 0.0, 1.0, 2.0, 3.0])
+    assert not np.allclose(bodynode.com_linear_velocity(),
+                           bodynode.com_spatial_velocity()[3:])
+    drag = FluidDrag([bodynode])
+    drag.read()
+    assert np.allclose(drag.velocities[0], [1.0, 2.0, 3.0])
+    force = drag.apply()[0]
+    normal = rotation[:, 2]
+    assert np.allclose(force, -50.0 * np.dot([1.0, 2.0, 3.0], normal) * normal)
+    assert np.allclose(force, legacy_drag(bodynode.spatial_velocity, normal))
@@ -0,0 +1,30 @@
+import numpy as np
+
+from gym.envs.dart.kinematics import KinematicCache
+from gym.envs.dart.tests.utils import FakeSkeleton, FakeWorld
+
+
+def test_kinematic_cache():
+    skel, world = FakeSkeleton(), FakeWorld()
+    kinematics = KinematicCache(skel, world, [skel.bodynodes[0], 'head'])
+    head = skel.bodynodes[1]
+    assert kinematics.bodynodes[1] is head
+
+    assert np.allclose(kinematics.com(1), [0.5, 0.5, 0.5])
+    skel.q = np.array([1.0, 2.0, 3.0])
+    head.transform[:3, :3] = [[0, -1, 0], [1, 0, 0], [0, 0, 1]]
+    # the state did not change for the world: served from the cache
+    assert np.allclose(kinematics.q, 0.0)
+    assert head.calls == 1
+
+    world.state_version += 1
+    assert np.allclose(kinematics.q, [1.0, 2.0, 3.0])
+    assert np.allclose(kinematics.state_vector(), [1, 2, 3, 0, 0, 0])
+    assert np.allclose(kinematics.axis(1, 1), [-1, 0, 0])
+    assert np.allclose(kinematics.axis(1, 0), [0, 1, 0])
+    kinematics.com(0), kinematics.coms, kinematics.dq
+    assert head.calls == 2
+
+    kinematics.invalidate()
+    kinematics.q
+    assert head.calls == 3
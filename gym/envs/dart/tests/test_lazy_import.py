@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+from gym import envs
+
+
+def test_import_does_not_load_pydart():
+    code = ('import sys, gym, gym.envs.dart; '
+            'assert gym.envs.dart.DartBatchEnv; '
+            'assert "pydart2" not in sys.modules; '
+            'assert "OpenGL" not in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_package_attributes_without_pep_562():
+    # module-level `__getattr__` is ignored before Python 3.7
+    import gym.envs.dart
+    assert '__getattr__' not in vars(gym.envs.dart)
+    assert 'DartBatchEnv' in dir(gym.envs.dart)
+    code = ('import sys; from gym.envs.dart import DartBatchEnv; '
+            'import gym.envs.dart; '
+            'assert gym.envs.dart.DartBatchEnv is DartBatchEnv; '
+            'assert "pydart2" not in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code])
+    with pytest.raises(AttributeError):
+        gym.envs.dart.DartMissingEnv
+
+
+@pytest.mark.parametrize('spec', [spec for spec in envs.registry.all()
+                                  if spec.id.startswith('Dart')],
+                         ids=lambda spec: spec.id)
+def test_entry_point_names_module(spec):
+    # entry points must not go through the package __init__
+    module, _, name = spec.entry_point.partition(':')
+    assert module != 'gym.envs.dart'
+    import gym.envs.dart
+    assert gym.envs.dart._MODULES[name] == module
@@ -0,0 +1,35 @@
+import numpy as np
+
+from gym.envs.dart.observation import ObservationSpec
+from gym.envs.dart.tests.utils import FakeBodyNode
+
+
+class FakeEnv(object):
+    contact_info = np.array([0, 1])
+
+
+def test_observation_plan():
+    torso = FakeBodyNode('torso', local_com=[0.1, 1.25, -0.3])
+    q = np.array([0.5, 2.0, -3.0, 4.0])
+    dq = np.array([20.0, -1.0, -30.0, 0.5])
+    spec = ObservationSpec().com(torso).q(2).dq(clip=10) \
+        .field('contact_info', 2)
+    plan = spec.compile(4)
+    assert plan.size == 9
+
+    expected = np.concatenate([q[1:], np.clip(dq, -10, 10), [0, 1]])
+    expected[0] = 1.25
+    obs = plan.write(np.empty(plan.size), q, dq, FakeEnv())
+    assert np.allclose(obs, expected)
+
+    # straight into a row of a float32 batch
+    batch = np.zeros((3, plan.size), dtype=np.float32)
+    plan.write(batch[1], q, dq, FakeEnv())
+    assert np.allclose(batch[1], expected)
+    assert np.all(batch[[0, 2]] == 0)
+
+
+def test_observation_plan_q_dq():
+    q, dq = np.arange(3.0), -np.arange(3.0)
+    plan = ObservationSpec().q().dq().compile(3)
+    assert np.allclose(plan.write(np.empty(6), q, dq), np.concatenate([q, dq]))
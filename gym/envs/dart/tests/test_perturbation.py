@@ -0,0 +1,54 @@
+import numpy as np
+
+from gym.envs.dart.perturbation import PerturbationSchedule
+from gym.utils import seeding
+
+
+def run(schedule, seed, steps):
+    np_random, _ = seeding.np_random(seed)
+    schedule.sample(np_random)
+    pushes = [schedule.next() for _ in range(steps)]
+    return (np.array([body for body, _ in pushes]),
+            np.array([force for _, force in pushes]))
+
+
+def test_schedule_is_seeded():
+    schedule = PerturbationSchedule([2, 3], probability=0.2, duration=4,
+                                    horizon=50)
+    bodies, forces = run(schedule, 0, 120)
+    other_bodies, other_forces = run(schedule, 0, 120)
+    assert np.all(bodies == other_bodies) and np.all(forces == other_forces)
+    assert not np.all(run(schedule, 1, 120)[0] == bodies)
+
+
+def test_schedule_pushes():
+    schedule = PerturbationSchedule([2, 3], probability=0.2, magnitude=5.0,
+                                    duration=4, horizon=50)
+    # longer than the horizon: the schedule is extended twice
+    bodies, forces = run(schedule, 0, 120)
+    pushed = bodies >= 0
+    assert pushed.any() and set(bodies[pushed]) <= {2, 3}
+    assert np.allclose(np.linalg.norm(forces[pushed], axis=1), 5.0)
+    assert np.all(forces[~pushed] == 0)
+    # axis-aligned, and every push lasts `duration` steps
+    assert np.all(np.sum(forces[pushed] != 0, axis=1) == 1)
+    assert np.all(forces[pushed][:, 2] == 0)
+    starts = np.flatnonzero(pushed & ~np.concatenate([[False], pushed[:-1]]))
+    for start in starts[:-1]:
+        assert np.all(bodies[start:start + 4] == bodies[start])
+
+
+def test_schedule_3d_and_state():
+    schedule = PerturbationSchedule([0], probability=0.5, magnitude=2.0,
+                                    axes=None)
+    bodies, forces = run(schedule, 3, 10)
+    assert np.allclose(np.linalg.norm(forces[bodies >= 0], axis=1), 2.0)
+
+    state = schedule.get_state()
+    later = [schedule.next()[0] for _ in range(20)]
+    schedule.set_state(state)
+    assert [schedule.next()[0] for _ in range(20)] == later
+
+
+def test_unsampled_schedule():
+    assert PerturbationSchedule([0]).next() == (-1, None)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from gym import error
+from gym.envs.dart.control import ActionMap
+from gym.envs.dart.randomization import DynamicsRandomizer
+from gym.envs.dart.spd import SPDController
+from gym.envs.dart.tests.utils import FakeBodyNode, FakeSkeleton
+
+
+def make_skeleton():
+    return FakeSkeleton([FakeBodyNode('pelvis', mass=2.0, friction=1.0),
+                         FakeBodyNode('thigh', mass=1.0, friction=0.5)])
+
+
+def test_randomizer_layout_and_values():
+    skel = make_skeleton()
+    dynamics = DynamicsRandomizer(skel, offsets={'friction': (-0.5, 0.5)},
+                                  factors={'mass': (0.5, [1.5, 2.0])})
+    assert dynamics.size == 4
+    assert [name for name, _ in dynamics.layout] == ['mass', 'friction']
+    assert np.allclose(dynamics.nominal, [2.0, 1.0, 1.0, 0.5])
+    assert np.allclose(dynamics.high, [1.5, 2.0, 0.5, 0.5])
+
+    # factors multiply, offsets add, and parameters stay valid
+    values = dynamics.apply([0.5, 2.0, 0.25, -1.0])
+    assert np.allclose(values, [1.0, 2.0, 1.25, 0.0])
+    assert skel.masses() == [1.0, 2.0]
+    assert skel.bodynodes[0].friction_coeff() == 1.25
+    dynamics.restore()
+    assert skel.masses() == [2.0, 1.0]
+    assert skel.bodynodes[1].friction_coeff() == 0.5
+
+
+def test_randomizer_sample_table():
+    dynamics = DynamicsRandomizer(make_skeleton(),
+                                  offsets={'damping': (-0.1, 0.1)})
+    table = dynamics.sample_table(np.random.RandomState(0), 4, 10)
+    assert table.shape == (4, 10, 3)
+    assert np.all((table >= -0.1) & (table < 0.1))
+    other = dynamics.sample_table(np.random.RandomState(0), 4, 10)
+    assert np.all(table == other)
+    # samples are mapped to parameters in bulk
+    assert dynamics.values(table).shape == (4, 10, 3)
+    assert np.all(dynamics.values(table) >= 0.0)
+
+
+def test_randomizer_gains():
+    action_map = ActionMap(3, dofs=slice(1, None), scale=[10.0, 20.0])
+    dynamics = DynamicsRandomizer(make_skeleton(), factors={'gain': (0.5, 1.5)},
+                                  action_map=action_map)
+    dynamics.apply([0.5, 2.0])
+    assert np.allclose(action_map.scale, [5.0, 40.0])
+    dynamics.restore()
+    assert np.allclose(action_map.scale, [10.0, 20.0])
+
+    spd = SPDController([0.0, 10.0, 20.0], [0.0, 1.0, 2.0], dt=0.1,
+                        dofs=slice(1, None))
+    dynamics = DynamicsRandomizer(make_skeleton(), offsets={'gain': (-0.5, 0.5)},
+                                  action_map=action_map, spd=spd)
+    dynamics.apply([0.5, -0.5])
+    assert np.allclose(spd.kp, [0.0, 15.0, 10.0])
+    assert np.allclose(spd.kd, [0.0, 1.5, 1.0])
+    assert np.allclose(spd._kd_dt, [0.0, 0.15, 0.1])
+    assert np.allclose(action_map.scale, [10.0, 20.0])
+
+
+def test_randomizer_errors():
+    with pytest.raises(error.Error):
+        DynamicsRandomizer(make_skeleton(), offsets={'inertia': (0, 1)})
+    with pytest.raises(error.Error):
+        DynamicsRandomizer(make_skeleton(), offsets={'mass': (0, 1)},
+                           factors={'mass': (1, 2)})
+    with pytest.raises(error.Error):
+        DynamicsRandomizer(make_skeleton(), factors={'gain': (0.5, 1.5)})
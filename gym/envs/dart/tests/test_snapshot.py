@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from gym.envs.dart.snapshot import DartEnvState, DartStateBank, DartWorldState, freeze
+
+
+def world_state(i, state_dim=3):
+    return DartWorldState(0.1 * i, i, freeze(np.arange(state_dim) + 10.0 * i))
+
+
+def test_state_bank_append():
+    bank = DartStateBank(3)
+    assert len(bank) == 0
+    assert bank.append(world_state(1)) == 0
+    env_state = DartEnvState(world_state(2), None, None, (('target', [1.0]),))
+    assert bank.append(env_state) == 1
+    assert len(bank) == 2
+
+    state = bank[0]
+    assert isinstance(state, DartWorldState)
+    assert state.time == 0.1 and state.frame == 1
+    assert np.all(state.x == [10.0, 11.0, 12.0])
+    assert not state.x.flags.writeable
+    # env snapshots come back with their fields
+    state = bank[-1]
+    assert isinstance(state, DartEnvState)
+    assert state.fields == (('target', [1.0]),)
+    assert state.world.frame == 2 and np.all(state.world.x == [20.0, 21.0, 22.0])
+
+    with pytest.raises(ValueError):
+        bank.append(world_state(3, state_dim=4))
+    with pytest.raises(IndexError):
+        bank[2]
+
+
+def test_state_bank_grows():
+    bank = DartStateBank(3, capacity=2)
+    assert bank.extend([world_state(i) for i in range(5)]) == [0, 1, 2, 3, 4]
+    assert len(bank) == 5 and len(bank.states) >= 5
+    # the states stored before growing are kept
+    for i in range(5):
+        assert bank[i].time == 0.1 * i and bank[i].frame == i
+        assert np.all(bank[i].x == np.arange(3) + 10.0 * i)
+
+    bank.clear()
+    assert len(bank) == 0
+    assert bank.append(world_state(7)) == 0
+    assert bank[0].frame == 7
+
+
+def test_state_bank_sample():
+    bank = DartStateBank(3)
+    with pytest.raises(IndexError):
+        bank.sample(np.random.RandomState(0))
+    bank.extend([world_state(i) for i in range(4)])
+    frames = [bank.sample(np.random.RandomState(seed)).frame for seed in range(20)]
+    assert set(frames) == set(range(4))
+    # drawn from the given generator
+    assert frames == [bank.sample(np.random.RandomState(seed)).frame
+                      for seed in range(20)]
@@ -0,0 +1,55 @@
+import numpy as np
+
+from gym.envs.dart.spd import SPDController
+
+
+def legacy_spd(target_q, q, dq, M, c, constraint_forces, kp, kd, dt,
+               torque_limit):
+    # explicit inverse and dense gains, as in the original SPD walker
+    Kp, Kd = np.diagflat(kp), np.diagflat(kd)
+    invM = np.linalg.inv(M + Kd * dt)
+    p = -Kp.dot(q + dq * dt - target_q)
+    d = -Kd.dot(dq)
+    qddot = invM.dot(-c + p + d + constraint_forces)
+    tau = p + d - Kd.dot(qddot) * dt
+    tau[0:6] = 0
+    for i in range(len(torque_limit)):
+        if abs(tau[i+6]) > torque_limit[i]:
+            tau[i+6] = np.sign(tau[i+6]) * torque_limit[i]
+    return tau
+
+
+def random_dynamics(rng, ndofs):
+    L = rng.normal(size=(ndofs, ndofs))
+    M = L.dot(L.T) + ndofs * np.eye(ndofs)
+    return (rng.normal(size=ndofs), rng.normal(size=ndofs),
+            rng.normal(size=ndofs), M, rng.normal(size=ndofs),
+            rng.normal(size=ndofs))
+
+
+def test_spd_matches_legacy():
+    rng = np.random.RandomState(0)
+    kp = np.array([0.0] * 6 + [100.0] * 15)
+    kp[0:3] = 300
+    kp[7:9] = 30
+    kd = kp / 10.0
+    torque_limit = np.array([200.0] * 15)
+    torque_limit[[-1, -2, -7, -8]] = 20
+    spd = SPDController(kp, kd, 0.008, torque_limits=torque_limit,
+                        dofs=slice(6, None))
+    for _ in range(5):
+        args = random_dynamics(rng, 21)
+        tau = spd.compute(*args)
+        assert tau is spd.tau
+        assert np.allclose(tau, legacy_spd(*(args + (kp, kd, 0.008,
+                                                     torque_limit))))
+        assert np.all(tau[:6] == 0.0)
+        assert np.all(np.abs(tau[6:]) <= torque_limit)
+
+
+def test_spd_clip_batch():
+    spd = SPDController(np.ones(4), np.ones(4), 0.01,
+                        torque_limits=[1.0, 2.0], dofs=slice(2, None))
+    taus = np.array([[5.0, 5.0, 5.0, -5.0], [0.5, 0.5, 0.5, -0.5]])
+    spd.clip(taus)
+    assert np.allclose(taus, [[5.0, 5.0, 1.0, -2.0], [0.5, 0.5, 0.5, -0.5]])
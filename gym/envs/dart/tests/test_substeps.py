@@ -0,0 +1,28 @@
+import numpy as np
+
+from gym.envs.dart.substeps import SubstepStats
+from gym.envs.dart.tests.utils import FakeSkeleton, FakeWorld, contact
+
+
+def test_substep_stats():
+    skel, world = FakeSkeleton(['pelvis', 'thigh', 'foot']), FakeWorld()
+    stats = SubstepStats(skel, other_skel_id=0)
+    frames = [
+        [contact(0, 0, 1, 2, [0.0, 3.0, 4.0])],
+        [contact(1, 2, 0, 0, [0.0, 1.0, 0.0]), contact(1, 0, 2, 0, [9.0, 0.0, 0.0])],
+        [],
+    ]
+    for _ in range(2):
+        stats.begin(len(frames))
+        for i, raw in enumerate(frames):
+            skel.com_position = np.array([i, 1.0, 0.0])
+            world.contacts.update(raw)
+            stats.record(world)
+
+        assert stats.num_frames == 3
+        assert np.allclose(stats.coms[:, 0], [0.0, 1.0, 2.0])
+        assert np.allclose(stats.mean_com(), [1.0, 1.0, 0.0])
+        # the contact of body node 0 is with skeleton 2, not the ground
+        assert np.allclose(stats.contact_force, [0.0, 0.0, 6.0])
+        assert np.all(stats.contact_frames == [0, 0, 2])
+        assert np.allclose(stats.mean_contact_force(), [0.0, 0.0, 2.0])
@@ -0,0 +1,251 @@
+import time
+
+import numpy as np
+
+from gym.envs.dart import collision
+from gym.envs.dart.contacts import ContactSummary
+from gym.envs.dart.snapshot import DartWorldState, freeze
+
+
+class FakeBodyNode(object):
+    """Body node with the parts of the pydart2 API read by the Dart helpers.
+    `spatial_velocity` (angular then linear) is in the frame of the body
+    node, and `local_com` is its center of mass in that frame."""
+    def __init__(self, name='body', mass=1.0, friction=1.0, rotation=None,
+                 spatial_velocity=None, local_com=(0.5, 0.5, 0.5)):
+        self.name = name
+        self._mass, self._friction = mass, friction
+        self._restitution, self._collidable = 0.0, True
+        self.transform = np.eye(4)
+        if rotation is not None:
+            self.transform[:3, :3] = rotation
+        self.spatial_velocity = (np.zeros(6) if spatial_velocity is None
+                                 else np.asarray(spatial_velocity, dtype=np.float64))
+        self.local_com = np.asarray(local_com, dtype=np.float64)
+        self.forces = []
+        self.calls = 0
+
+    def com(self):
+        self.calls += 1
+        return self.transform[:3, :3].dot(self.local_com) + self.transform[:3, 3]
+
+    def com_spatial_velocity(self):
+        return self.spatial_velocity.copy()
+
+    def com_linear_velocity(self):
+        # in world frame, so different from the linear part of the above
+        return self.transform[:3, :3].dot(self.spatial_velocity[3:])
+
+    def world_transform(self):
+        return self.transform.copy()
+
+    def add_ext_force(self, force):
+        self.forces.append(np.array(force))
+
+    def mass(self):
+        return self._mass
+
+    def set_mass(self, mass):
+        self._mass = mass
+
+    def friction_coeff(self):
+        return self._friction
+
+    def set_friction_coeff(self, friction):
+        self._friction = friction
+
+    def restitution_coeff(self):
+        return self._restitution
+
+    def set_restitution_coeff(self, restitution):
+        self._restitution = restitution
+
+    def is_collidable(self):
+        return self._collidable
+
+    def set_collidable(self, collidable):
+        self._collidable = collidable
+
+
+class FakeDof(object):
+    def __init__(self, damping):
+        self._damping = damping
+        self._stiffness, self._coulomb = 0.0, 0.0
+
+    def damping_coefficient(self):
+        return self._damping
+
+    def set_damping_coefficient(self, damping):
+        self._damping = damping
+
+    def spring_stiffness(self):
+        return self._stiffness
+
+    def set_spring_stiffness(self, stiffness):
+        self._stiffness = stiffness
+
+    def coulomb_friction(self):
+        return self._coulomb
+
+    def set_coulomb_friction(self, friction):
+        self._coulomb = friction
+
+
+class FakeSkeleton(object):
+    """Skeleton of the body nodes `bodynodes` (`FakeBodyNode`s or names),
+    with `ndofs` unlimited degrees of freedom of damping `0.1 * i`."""
+    id = 1
+
+    def __init__(self, bodynodes=('pelvis', 'head'), ndofs=3):
+        self.bodynodes = [FakeBodyNode(bodynode) if isinstance(bodynode, str)
+                          else bodynode for bodynode in bodynodes]
+        self.ndofs = ndofs
+        self.dofs = [FakeDof(0.1 * i) for i in range(ndofs)]
+        self.joints = []
+        self.q, self.dq = np.zeros(ndofs), np.zeros(ndofs)
+        self.q_lower, self.q_upper = -np.ones(ndofs), np.ones(ndofs)
+        self.forces = np.zeros(ndofs)
+        self.com_position = np.zeros(3)
+        self._self_collision, self._adjacent, self._mobile = False, False, True
+
+    @property
+    def x(self):
+        return np.concatenate([self.q, self.dq])
+
+    def set_positions(self, q):
+        self.q = np.array(q, dtype=np.float64)
+
+    def set_velocities(self, dq):
+        self.dq = np.array(dq, dtype=np.float64)
+
+    def set_forces(self, tau):
+        self.forces = np.array(tau, dtype=np.float64)
+
+    def bodynode(self, name):
+        return [bn for bn in self.bodynodes if bn.name == name][0]
+
+    def masses(self):
+        return [bodynode.mass() for bodynode in self.bodynodes]
+
+    def com(self):
+        return self.com_position.copy()
+
+    def self_collision_check(self):
+        return self._self_collision
+
+    def set_self_collision_check(self, check):
+        self._self_collision = check
+
+    def adjacent_body_check(self):
+        return self._adjacent
+
+    def set_adjacent_body_check(self, check):
+        self._adjacent = check
+
+    def is_mobile(self):
+        return self._mobile
+
+    def set_mobile(self, mobile):
+        self._mobile = mobile
+
+
+class FakeWorld(object):
+    """World of the skeletons `skeletons`, with the contacts of its last
+    step, and whose DART build only has the collision detectors of
+    `step_times`, stepping in the given times.
+
+    `step_frames` integrates unit point masses: every frame, the forces of a
+    skeleton are added to its velocities, then its velocities to its
+    positions, and the forces are cleared, as in DART."""
+    def __init__(self, step_times=None, skeletons=(), dt=0.002):
+        self.dt = dt
+        self.skeletons = list(skeletons)
+        self._gravity = np.array([0.0, -9.81, 0.0])
+        self.constraints = []
+        self.state_version = 0
+        self.legacy_contacts = False
+        self.contacts = ContactSummary()
+        self.step_times = dict((collision.COLLISION_DETECTORS[name], t)
+                               for name, t in (step_times or {}).items())
+        self.detector = None
+        self.frame = 0
+        self.steps = 0
+        self.restored = 0
+        self.resets = 0
+        self.destroyed = False
+
+    def set_collision_detector(self, detector):
+        # pydart2 asserts that the detector was set
+        assert detector in self.step_times
+        self.detector = detector
+
+    def collision_detector(self):
+        return self.detector
+
+    def gravity(self):
+        return self._gravity.copy()
+
+    def set_gravity(self, gravity):
+        self._gravity = np.array(gravity, dtype=np.float64)
+
+    def remove_all_constraints(self):
+        del self.constraints[:]
+
+    def time(self):
+        return self.frame * self.dt
+
+    def states(self):
+        return np.concatenate([skel.x for skel in self.skeletons] or [[]])
+
+    def set_states(self, x):
+        for skel in self.skeletons:
+            skel.set_positions(x[:skel.ndofs])
+            skel.set_velocities(x[skel.ndofs:2 * skel.ndofs])
+            x = x[2 * skel.ndofs:]
+        self.state_version += 1
+
+    def clone_state(self):
+        return DartWorldState(self.time(), self.frame, freeze(self.states()))
+
+    def restore_state(self, state):
+        self.set_states(state.x)
+        self.frame = state.frame
+        self.restored += 1
+
+    def reset(self):
+        self.frame = 0
+        self.resets += 1
+
+    def step(self):
+        self.steps += 1
+        if self.step_times:
+            time.sleep(self.step_times[self.detector])
+        self.step_frames(1)
+
+    def step_frames(self, n_frames, skel=None, tau=None, hook=None,
+                    stats=None, guard=None, guard_every=1):
+        frames = 0
+        while frames < n_frames:
+            if tau is not None:
+                skel.set_forces(tau)
+            if hook is not None:
+                hook()
+            for s in self.skeletons:
+                s.set_velocities(s.dq + s.forces)
+                s.set_positions(s.q + s.dq)
+                s.forces = np.zeros(s.ndofs)
+            self.frame += 1
+            frames += 1
+            if guard is not None and (frames % guard_every == 0 or
+                                      frames == n_frames) and guard():
+                break
+        return frames
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def contact(skel_id1, bodynode_id1, skel_id2, bodynode_id2, force):
+    """Row of `ContactSummary.raw`, at the origin."""
+    return [0.0, 0.0, 0.0] + list(force) + [skel_id1, bodynode_id1,
+                                            skel_id2, bodynode_id2]
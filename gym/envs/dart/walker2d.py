@@ -1,45 +1,30 @@
 import numpy as np
 from gym import utils
 from gym.envs.dart import dart_env
+from gym.envs.dart.observation import ObservationSpec
 
 
 class DartWalker2dEnv(dart_env.DartEnv, utils.EzPickle):
-    def __init__(self):
+    collision_profile = 'fast'
+
+    def __init__(self, **kwargs):
         self.control_bounds = np.array([[1.0]*6,[-1.0]*6])
         self.action_scale = np.array([100, 100, 20, 100, 100, 20])
         obs_dim = 17
 
-        dart_env.DartEnv.__init__(self, 'walker2d.skel', 4, obs_dim, self.control_bounds, disableViewer=False)
-
-        try:
-            self.dart_world.set_collision_detector(3)
-        except Exception as e:
-            print('Does not have ODE collision detector, reverted to bullet collision detector')
-            self.dart_world.set_collision_detector(2)
+        dart_env.DartEnv.__init__(self, 'walker2d.skel', 4, obs_dim, self.control_bounds, disableViewer=False, **kwargs)
+        self.set_action_map(dofs=slice(3, None), scale=self.action_scale)
+        self.set_observation_spec(ObservationSpec().com(self.robot_skeleton.bodynodes[2]).q(2).dq(clip=10))
 
-        utils.EzPickle.__init__(self)
+        utils.EzPickle.__init__(self, **kwargs)
 
     def step(self, a):
-        pre_state = [self.state_vector()]
-
-        clamped_control = np.array(a)
-        for i in range(len(clamped_control)):
-            if clamped_control[i] > self.control_bounds[0][i]:
-                clamped_control[i] = self.control_bounds[0][i]
-            if clamped_control[i] < self.control_bounds[1][i]:
-                clamped_control[i] = self.control_bounds[1][i]
-        tau = np.zeros(self.robot_skeleton.ndofs)
-        tau[3:] = clamped_control * self.action_scale
+        tau = self.action_map(a)
         posbefore = self.robot_skeleton.q[0]
         self.do_simulation(tau, self.frame_skip)
         posafter,ang = self.robot_skeleton.q[0,2]
         height = self.robot_skeleton.bodynodes[2].com()[1]
 
-        contacts = self.dart_world.collision_result.contacts
-        total_force_mag = 0
-        for contact in contacts:
-            total_force_mag += np.square(contact.force).sum()
-
         alive_bonus = 1.0
         vel = (posafter - posbefore) / self.dt
         reward = vel
@@ -62,16 +47,7 @@ class DartWalker2dEnv(dart_env.DartEnv, utils.EzPickle):
 
         ob = self._get_obs()
 
-        return ob, reward, done, {}
-
-    def _get_obs(self):
-        state =  np.concatenate([
-            self.robot_skeleton.q[1:],
-            np.clip(self.robot_skeleton.dq,-10,10)
-        ])
-        state[0] = self.robot_skeleton.bodynodes[2].com()[1]
-
-        return state
+        return self._finish_step(ob, reward, done, {})
 
     def reset_model(self):
         self.dart_world.reset()
@@ -2,16 +2,22 @@ import numpy as np
 import multiprocessing as mp
 import time
 import sys
+from ctypes import c_bool
+from collections import OrderedDict
 from enum import Enum
 from copy import deepcopy
 
-from gym import logger
+from gym import error, logger
+from gym.spaces import Tuple, Dict
 from gym.vector.vector_env import VectorEnv
 from gym.error import (AlreadyPendingCallError, NoAsyncCallError,
                        ClosedEnvironmentError)
 from gym.vector.utils import (create_shared_memory, create_empty_array,
                               write_to_shared_memory, read_from_shared_memory,
-                              concatenate, CloudpickleWrapper, clear_mpi_env_vars)
+                              concatenate, CloudpickleWrapper, clear_mpi_env_vars,
+                              _BaseGymSpaces, normalize_info_schema,
+                              create_info_columns, read_info_columns,
+                              write_info, collect_infos)
 
 __all__ = ['AsyncVectorEnv']
 
@@ -22,6 +28,15 @@ class AsyncState(Enum):
     WAITING_STEP = 'step'
 
 
+# status of a worker with `ipc='shared'`, set by the parent before waking the
+# worker up, and by the worker before signalling completion
+_PIPE = 0           # a command is waiting in the pipe
+_STEP = 1           # step the slice with the actions in shared memory
+_DONE = 2           # step done, no infos
+_DONE_INFOS = 3     # step done, the infos follow through the pipe
+_ERROR = 4
+
+
 class AsyncVectorEnv(VectorEnv):
     """Vectorized environment that runs multiple environments in parallel. It
     uses `multiprocessing` processes, and pipes for communication.
@@ -65,9 +80,46 @@ class AsyncVectorEnv(VectorEnv):
         degree of flexibility and a high chance to shoot yourself in the foot; thus,
         if you are writing your own worker, it is recommended to start from the code
         for `_worker` (or `_worker_shared_memory`) method below, and add changes
+
+    envs_per_worker : int (default: 1)
+        Number of environments run by each worker process. Each worker owns a
+        contiguous slice of `env_fns`, steps its environments one after the
+        other and answers with a single message per step; with
+        `shared_memory=True`, the rewards and dones of the slice are also
+        written to shared memory. Useful to run many cheap environments on
+        few cores. If workers run slices (with `envs_per_worker > 1` or an
+        batched infos), a custom `worker` is started as `worker(index, env_fn,
+        pipe, parent_pipe, buffers, bounds, error_queue)` (see
+        `_batch_worker`).
+
+    ipc : str (default: `'pipe'`)
+        How steps are communicated with the workers. With `'pipe'`, actions
+        and results are pickled through pipes. With `'shared'` (which
+        requires `shared_memory=True`), actions, observations, rewards and
+        dones live in shared memory, the parent wakes the workers up and
+        waits for them with semaphores, and only non-empty infos are
+        pickled. This cuts the latency of steps of environments with small
+        observations. Other commands (e.g. `reset`, `seed`) still go through
+        the pipes. A custom `worker` gets the semaphores as an extra
+        `signals` argument (see `_shared_worker`).
+
+    batch_infos : bool (default: `False`)
+        If `True`, then `step` returns the infos as a dict of arrays (see
+        `collect_infos`) instead of a tuple of dicts. The entries of
+        `info_schema` are batched into arrays with their masks, and with
+        `shared_memory=True` they are written by the workers to shared
+        memory; only the other entries are pickled.
+
+    info_schema : dict or list, optional
+        Entries of the infos of a single environment to batch into arrays
+        with `batch_infos=True`, given as a dict mapping keys to `(dtype,
+        shape)` or a list of `(key, dtype, shape)`. If `None`, then the
+        `info_schema` attribute of the first environment is taken, if any.
     """
     def __init__(self, env_fns, observation_space=None, action_space=None,
-                 shared_memory=True, copy=True, context=None, daemon=True, worker=None):
+                 shared_memory=True, copy=True, context=None, daemon=True, worker=None,
+                 envs_per_worker=1, ipc='pipe', batch_infos=False,
+                 info_schema=None):
         try:
             ctx = mp.get_context(context)
         except AttributeError:
@@ -77,11 +129,27 @@ class AsyncVectorEnv(VectorEnv):
         self.env_fns = env_fns
         self.shared_memory = shared_memory
         self.copy = copy
-
-        if (observation_space is None) or (action_space is None):
+        assert envs_per_worker >= 1
+        if ipc not in ('pipe', 'shared'):
+            raise error.Error('Unknown `ipc` mode `{0}`, must be `pipe` or '
+                '`shared`.'.format(ipc))
+        if ipc == 'shared' and not shared_memory:
+            raise error.Error('`ipc=\'shared\'` requires `shared_memory=True`.')
+        if info_schema is not None and not batch_infos:
+            raise error.Error('`info_schema` requires `batch_infos=True`.')
+        self.envs_per_worker = envs_per_worker
+        self.ipc = ipc
+        # set when a call times out while the workers may still be writing
+        # its results: the environment can then only be closed
+        self._broken = False
+
+        if ((observation_space is None) or (action_space is None) or
+                (batch_infos and info_schema is None)):
             dummy_env = env_fns[0]()
             observation_space = observation_space or dummy_env.observation_space
             action_space = action_space or dummy_env.action_space
+            if batch_infos and info_schema is None:
+                info_schema = getattr(dummy_env, 'info_schema', None) or {}
             dummy_env.close()
             del dummy_env
         super(AsyncVectorEnv, self).__init__(num_envs=len(env_fns),
@@ -97,17 +165,79 @@ class AsyncVectorEnv(VectorEnv):
             self.observations = create_empty_array(
             	self.single_observation_space, n=self.num_envs, fn=np.zeros)
 
+        # each worker runs the environments `lo:hi`
+        self._slices = [(lo, min(lo + envs_per_worker, self.num_envs))
+                        for lo in range(0, self.num_envs, envs_per_worker)]
+        self._worker_of = np.repeat(np.arange(len(self._slices)),
+            [hi - lo for (lo, hi) in self._slices])
+        # indices of the environments of the pending steps, per worker
+        self._requests = {}
+        self._partial = False
+        # the infos of a schema are batched by workers running slices
+        self._info_schema = self._info_columns = None
+        if info_schema is not None:
+            self._info_schema = normalize_info_schema(info_schema)
+        self._batched = (envs_per_worker > 1 or ipc == 'shared' or
+                         self._info_schema is not None)
+
+        # shared observations, rewards, dones, actions (`ipc='shared'`) and
+        # info columns (with an info schema)
+        self._rewards = self._dones = self._actions = self._signals = None
+        if self._batched and self.shared_memory:
+            _buffers = [_obs_buffer, ctx.Array('d', self.num_envs),
+                        ctx.Array(c_bool, self.num_envs), None, None]
+            self._rewards, self._dones = _read_step_buffers(_buffers)
+            if self._info_schema is not None:
+                _buffers[4] = (self._info_schema, create_info_columns(
+                    self._info_schema, n=self.num_envs, ctx=ctx))
+                self._info_columns = read_info_columns(_buffers[4][1],
+                    self._info_schema, n=self.num_envs)
+        else:
+            _buffers = _obs_buffer
+            if self._info_schema is not None:
+                self._info_columns = create_info_columns(self._info_schema,
+                    n=self.num_envs)
+        if ipc == 'shared':
+            _buffers[3] = create_shared_memory(self.single_action_space,
+                n=self.num_envs, ctx=ctx)
+            self._action_buffer = _buffers[3]
+            self._actions = read_from_shared_memory(_buffers[3],
+                self.single_action_space, n=self.num_envs)
+            # one semaphore per worker to wake it up, one counting the
+            # completed steps, the status of the workers, and the
+            # environments to step
+            self._signals = ([ctx.Semaphore(0) for _ in self._slices],
+                ctx.Semaphore(0), ctx.RawArray('b', len(self._slices)),
+                ctx.RawArray(c_bool, self.num_envs))
+            self._status = np.frombuffer(self._signals[2], dtype=np.int8)
+            self._active = np.frombuffer(self._signals[3], dtype=np.bool_)
+
+        if isinstance(_buffers, list):
+            _buffers = tuple(_buffers)
+
         self.parent_pipes, self.processes = [], []
         self.error_queue = ctx.Queue()
-        target = _worker_shared_memory if self.shared_memory else _worker
+        if ipc == 'shared':
+            target = _shared_worker
+        elif self._batched:
+            target = _batch_worker
+        else:
+            target = _worker_shared_memory if self.shared_memory else _worker
         target = worker or target
         with clear_mpi_env_vars():
-            for idx, env_fn in enumerate(self.env_fns):
+            for idx, (lo, hi) in enumerate(self._slices):
                 parent_pipe, child_pipe = ctx.Pipe()
+                args = (idx, CloudpickleWrapper(_make_envs_fn(
+                    self.env_fns[lo:hi])), child_pipe, parent_pipe, _buffers,
+                    (lo, hi), self.error_queue)
+                if ipc == 'shared':
+                    args += (self._signals,)
+                elif not self._batched:
+                    args = (idx, CloudpickleWrapper(self.env_fns[lo]),
+                        child_pipe, parent_pipe, _buffers, self.error_queue)
                 process = ctx.Process(target=target,
                     name='Worker<{0}>-{1}'.format(type(self).__name__, idx),
-                    args=(idx, CloudpickleWrapper(env_fn), child_pipe,
-                    parent_pipe, _obs_buffer, self.error_queue))
+                    args=args)
 
                 self.parent_pipes.append(parent_pipe)
                 self.processes.append(process)
@@ -132,8 +262,10 @@ class AsyncVectorEnv(VectorEnv):
                 'for a pending call to `{0}` to complete.'.format(
                 self._state.value), self._state.value)
 
-        for pipe, seed in zip(self.parent_pipes, seeds):
-            pipe.send(('seed', seed))
+        if self._batched:
+            seeds = [seeds[lo:hi] for (lo, hi) in self._slices]
+        for index, seed in enumerate(seeds):
+            self._send(index, ('seed', seed))
         _, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
         self._raise_if_errors(successes)
 
@@ -144,8 +276,8 @@ class AsyncVectorEnv(VectorEnv):
                 'for a pending call to `{0}` to complete'.format(
                 self._state.value), self._state.value)
 
-        for pipe in self.parent_pipes:
-            pipe.send(('reset', None))
+        for index in range(len(self.parent_pipes)):
+            self._send(index, ('reset', None))
         self._state = AsyncState.WAITING_RESET
 
     def reset_wait(self, timeout=None):
@@ -167,12 +299,9 @@ class AsyncVectorEnv(VectorEnv):
                 'call to `reset_async`.', AsyncState.WAITING_RESET.value)
 
         if not self._poll(timeout):
-            self._state = AsyncState.DEFAULT
-            raise mp.TimeoutError('The call to `reset_wait` has timed out after '
-                '{0} second{1}.'.format(timeout, 's' if timeout > 1 else ''))
+            raise self._timed_out('reset_wait', timeout)
 
-        results, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
-        self._raise_if_errors(successes)
+        results = self._receive()
         self._state = AsyncState.DEFAULT
 
         if not self.shared_memory:
@@ -180,24 +309,79 @@ class AsyncVectorEnv(VectorEnv):
 
         return deepcopy(self.observations) if self.copy else self.observations
 
-    def step_async(self, actions):
+    def step_async(self, actions, indices=None):
         """
         Parameters
         ----------
         actions : iterable of samples from `action_space`
             List of actions.
+
+        indices : iterable of int, optional
+            Indices of the environments to step, with one action per index in
+            `actions`. If given, the other environments keep running their
+            pending steps, and `step_wait` returns the indices of the
+            environments whose results it returns. Environments are busy
+            until their results are returned by `step_wait`; with
+            `envs_per_worker > 1`, so are the other environments of their
+            worker.
         """
         self._assert_is_running()
-        if self._state != AsyncState.DEFAULT:
+        if (self._state == AsyncState.WAITING_RESET) or ((indices is None)
+                and (self._state != AsyncState.DEFAULT)):
             raise AlreadyPendingCallError('Calling `step_async` while waiting '
                 'for a pending call to `{0}` to complete.'.format(
                 self._state.value), self._state.value)
 
-        for pipe, action in zip(self.parent_pipes, actions):
-            pipe.send(('step', action))
+        actions = list(actions)
+        if indices is None:
+            indices = np.arange(self.num_envs)
+        else:
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            assert len(indices) == len(actions)
+            if len(np.unique(indices)) != len(indices):
+                raise ValueError('Duplicate indices in `{0}`.'.format(
+                    indices.tolist()))
+            if len(indices) and ((indices.min() < 0) or
+                                 (indices.max() >= self.num_envs)):
+                raise ValueError('Indices `{0}` out of range for {1} '
+                    'environments.'.format(indices.tolist(), self.num_envs))
+            self._partial = True
+        workers = np.unique(self._worker_of[indices])
+        busy = [worker for worker in workers if worker in self._requests]
+        if busy:
+            raise AlreadyPendingCallError('Calling `step_async` on the '
+                'environments of workers {0}, which are still running a '
+                'pending call to `step`.'.format(busy), 'step')
+        for worker in workers:
+            lo, hi = self._slices[worker]
+            # in increasing order, the order in which the worker steps them
+            self._requests[worker] = np.sort(
+                indices[(indices >= lo) & (indices < hi)])
+
+        if self._signals is not None:
+            self._write_actions(actions, indices)
+            # only touch the slices of idle workers, the others may not have
+            # read theirs yet
+            for worker in workers:
+                lo, hi = self._slices[worker]
+                self._active[lo:hi] = False
+            self._active[indices] = True
+            for worker in workers:
+                self._status[worker] = _STEP
+                self._signals[0][worker].release()
+        elif self._batched:
+            by_index = dict(zip(indices.tolist(), actions))
+            for worker in workers:
+                lo, _ = self._slices[worker]
+                requested = self._requests[worker]
+                self.parent_pipes[worker].send(('step', (requested - lo,
+                    [by_index[index] for index in requested.tolist()])))
+        else:
+            for worker, action in zip(indices, actions):
+                self.parent_pipes[worker].send(('step', action))
         self._state = AsyncState.WAITING_STEP
 
-    def step_wait(self, timeout=None):
+    def step_wait(self, timeout=None, min_ready=None):
         """
         Parameters
         ----------
@@ -205,6 +389,12 @@ class AsyncVectorEnv(VectorEnv):
             Number of seconds before the call to `step_wait` times out. If
             `None`, the call to `step_wait` never times out.
 
+        min_ready : int, optional
+            If given, return as soon as the results of at least `min_ready`
+            environments are available (or of all the pending environments,
+            if fewer), rather than waiting for all of them. With
+            `envs_per_worker > 1`, the results of a worker come together.
+
         Returns
         -------
         observations : sample from `observation_space`
@@ -216,22 +406,36 @@ class AsyncVectorEnv(VectorEnv):
         dones : `np.ndarray` instance (dtype `np.bool_`)
             A vector whose entries indicate whether the episode has ended.
 
-        infos : list of dict
-            A list of auxiliary diagnostic informations.
+        infos : list of dict, or dict
+            A list of auxiliary diagnostic informations, or a dict of batched
+            entries with an info schema.
+
+        indices : `np.ndarray` instance (dtype `np.int64`)
+            Only if `min_ready` is given, or `step_async` was called with
+            `indices`: the indices of the environments in the batch, in the
+            order in which they became ready. The results of the other
+            environments are returned by the next calls to `step_wait`.
         """
         self._assert_is_running()
         if self._state != AsyncState.WAITING_STEP:
             raise NoAsyncCallError('Calling `step_wait` without any prior call '
                 'to `step_async`.', AsyncState.WAITING_STEP.value)
+        if self._partial or (min_ready is not None):
+            return self._step_wait_ready(timeout, min_ready)
 
-        if not self._poll(timeout):
-            self._state = AsyncState.DEFAULT
-            raise mp.TimeoutError('The call to `step_wait` has timed out after '
-                '{0} second{1}.'.format(timeout, 's' if timeout > 1 else ''))
-
-        results, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
-        self._raise_if_errors(successes)
+        if self._signals is not None:
+            results = self._wait_shared(timeout)
+        elif not self._poll(timeout):
+            raise self._timed_out('step_wait', timeout)
+        else:
+            results = self._receive()
         self._state = AsyncState.DEFAULT
+        self._requests.clear()
+        if self._rewards is not None:
+            # rewards and dones are in shared memory, only infos were sent
+            return (deepcopy(self.observations) if self.copy else self.observations,
+                    np.copy(self._rewards), np.copy(self._dones),
+                    self._collect_infos(results))
         observations_list, rewards, dones, infos = zip(*results)
 
         if not self.shared_memory:
@@ -239,7 +443,70 @@ class AsyncVectorEnv(VectorEnv):
                 self.single_observation_space)
 
         return (deepcopy(self.observations) if self.copy else self.observations,
-                np.array(rewards), np.array(dones, dtype=np.bool_), infos)
+                np.array(rewards), np.array(dones, dtype=np.bool_),
+                self._collect_infos(infos))
+
+    def _step_wait_ready(self, timeout=None, min_ready=None):
+        pending = sum(len(indices) for indices in self._requests.values())
+        min_ready = pending if min_ready is None else min(min_ready, pending)
+        end_time = None if timeout is None else time.time() + timeout
+        ready, results = [], []
+        while sum(len(indices) for indices in ready) < min_ready:
+            worker, worker_results = self._receive_any(end_time, timeout)
+            ready.append(self._requests.pop(worker))
+            results.extend(worker_results)
+        if not self._requests:
+            self._state = AsyncState.DEFAULT
+            self._partial = False
+        indices = np.concatenate(ready) if ready else np.zeros((0,), np.int64)
+
+        if self._rewards is not None:
+            return (_gather(self.observations, self.single_observation_space,
+                indices), self._rewards[indices], self._dones[indices],
+                self._collect_infos(results, indices), indices)
+        observations_list, rewards, dones, infos = zip(*results) if results \
+            else ((), (), (), ())
+        if self.shared_memory:
+            observations = _gather(self.observations,
+                self.single_observation_space, indices)
+        else:
+            observations = create_empty_array(self.single_observation_space,
+                n=len(indices), fn=np.zeros)
+            concatenate(observations_list, observations,
+                self.single_observation_space)
+        return (observations, np.array(rewards, dtype=np.float64),
+                np.array(dones, dtype=np.bool_),
+                self._collect_infos(infos, indices), indices)
+
+    def _receive_any(self, end_time, timeout):
+        # the results of the first pending worker to be ready
+        def timed_out():
+            return mp.TimeoutError('The call to `step_wait` has timed out '
+                'after {0} second{1}.'.format(timeout, 's' if timeout > 1 else ''))
+        if self._signals is not None:
+            completed = self._signals[1]
+            if end_time is None:
+                completed.acquire()
+            elif not completed.acquire(True, max(end_time - time.time(), 0)):
+                raise timed_out()
+            # a completion was signalled, by one of the pending workers
+            worker = next(worker for worker in sorted(self._requests)
+                if self._status[worker] in (_DONE, _DONE_INFOS, _ERROR))
+            self._raise_if_errors([self._status[worker] != _ERROR])
+            if self._status[worker] == _DONE_INFOS:
+                return worker, self.parent_pipes[worker].recv()
+            return worker, [{} for _ in self._requests[worker]]
+
+        pipes = dict((self.parent_pipes[worker], worker)
+                     for worker in self._requests)
+        delta = None if end_time is None else max(end_time - time.time(), 0)
+        ready = _wait_pipes(list(pipes), delta)
+        if not ready:
+            raise timed_out()
+        worker = pipes[ready[0]]
+        result, success = ready[0].recv()
+        self._raise_if_errors([success])
+        return worker, result if self._batched else [result]
 
     def close_extras(self, timeout=None, terminate=False):
         """
@@ -254,6 +521,8 @@ class AsyncVectorEnv(VectorEnv):
             If `True`, then the `close` operation is forced and all processes
             are terminated.
         """
+        # the workers of a call that timed out may never answer
+        terminate = terminate or self._broken
         timeout = 0 if terminate else timeout
         try:
             if self._state != AsyncState.DEFAULT:
@@ -269,9 +538,9 @@ class AsyncVectorEnv(VectorEnv):
                 if process.is_alive():
                     process.terminate()
         else:
-            for pipe in self.parent_pipes:
+            for index, pipe in enumerate(self.parent_pipes):
                 if (pipe is not None) and (not pipe.closed):
-                    pipe.send(('close', None))
+                    self._send(index, ('close', None))
             for pipe in self.parent_pipes:
                 if (pipe is not None) and (not pipe.closed):
                     pipe.recv()
@@ -296,10 +565,74 @@ class AsyncVectorEnv(VectorEnv):
                 return False
         return True
 
+    def _send(self, index, message):
+        self.parent_pipes[index].send(message)
+        if self._signals is not None:
+            self._status[index] = _PIPE
+            self._signals[0][index].release()
+
+    def _write_actions(self, actions, indices):
+        space = self.single_action_space
+        if isinstance(space, _BaseGymSpaces):
+            self._actions[indices] = np.asarray(actions,
+                dtype=self._actions.dtype).reshape((len(indices),) +
+                self._actions.shape[1:])
+        else:
+            for index, action in zip(indices, actions):
+                write_to_shared_memory(index, action, self._action_buffer, space)
+
+    def _wait_shared(self, timeout=None):
+        # wait until every worker has signalled the end of its step
+        completed = self._signals[1]
+        end_time = None if timeout is None else time.time() + timeout
+        for _ in self._requests:
+            if end_time is None:
+                completed.acquire()
+            elif not completed.acquire(True, max(end_time - time.time(), 0)):
+                # the late workers still signal their completion, which
+                # the next step would take for its own
+                raise self._timed_out('step_wait', timeout)
+        self._raise_if_errors([status != _ERROR for status in self._status])
+        results = []
+        for (lo, hi), status, pipe in zip(self._slices, self._status,
+                                          self.parent_pipes):
+            if status == _DONE_INFOS:
+                results.extend(pipe.recv())
+            else:
+                results.extend({} for _ in range(lo, hi))
+        return results
+
+    def _collect_infos(self, infos, indices=None):
+        # `infos` holds the infos of the environments (or of `indices`), or,
+        # if the workers write the info columns, the entries outside them
+        if self._info_columns is None:
+            return tuple(infos)
+        columns = self._info_columns
+        if not self.shared_memory:
+            rows = range(self.num_envs) if indices is None else indices
+            infos = [write_info(row, info, columns)
+                     for (row, info) in zip(rows, infos)]
+        if indices is None:
+            columns = [(key, np.copy(column) if self.copy else column)
+                       for (key, column) in columns.items()]
+        else:
+            columns = [(key, column[indices])
+                       for (key, column) in columns.items()]
+        return collect_infos(columns, infos)
+
+    def _receive(self):
+        # one result per environment, from the replies of all the workers
+        results, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
+        self._raise_if_errors(successes)
+        if self._batched:
+            results = [result for batch in results for result in batch]
+        return results
+
     def _check_observation_spaces(self):
         self._assert_is_running()
-        for pipe in self.parent_pipes:
-            pipe.send(('_check_observation_space', self.single_observation_space))
+        for index in range(len(self.parent_pipes)):
+            self._send(index, ('_check_observation_space',
+                               self.single_observation_space))
         same_spaces, successes = zip(*[pipe.recv() for pipe in self.parent_pipes])
         self._raise_if_errors(successes)
         if not all(same_spaces):
@@ -312,12 +645,25 @@ class AsyncVectorEnv(VectorEnv):
         if self.closed:
             raise ClosedEnvironmentError('Trying to operate on `{0}`, after a '
                 'call to `close()`.'.format(type(self).__name__))
+        if self._broken:
+            raise error.Error('Trying to operate on `{0}`, after a call '
+                'timed out; it can only be closed.'.format(type(self).__name__))
+
+    def _timed_out(self, call, timeout):
+        # the workers may still be writing the results of the call, in the
+        # pipes or in shared memory: later calls would read them as theirs
+        self._state = AsyncState.DEFAULT
+        self._requests.clear()
+        self._partial = False
+        self._broken = True
+        return mp.TimeoutError('The call to `{0}` has timed out after {1} '
+            'second{2}.'.format(call, timeout, 's' if timeout > 1 else ''))
 
     def _raise_if_errors(self, successes):
         if all(successes):
             return
 
-        num_errors = self.num_envs - sum(successes)
+        num_errors = len(successes) - sum(successes)
         assert num_errors > 0
         for _ in range(num_errors):
             index, exctype, value = self.error_queue.get()
@@ -402,3 +748,199 @@ def _worker_shared_memory(index, env_fn, pipe, parent_pipe, shared_memory, error
         pipe.send((None, False))
     finally:
         env.close()
+
+
+class _EnvSlice(object):
+    """Runs the environments `lo:hi` of an `AsyncVectorEnv` in a worker. With
+    shared `buffers` (observations, rewards and dones of all the
+    environments), the results of the slice are written there, and only the
+    infos are returned. If `buffers` also holds the actions, `step` reads
+    them from there, and if it holds info columns, only the entries of the
+    infos outside them are returned."""
+    def __init__(self, envs, bounds, buffers=None):
+        self.envs = envs
+        self.lo, self.hi = bounds
+        self.observation_space = envs[0].observation_space
+        self.action_space = envs[0].action_space
+        self.buffers = buffers
+        if buffers is not None:
+            rewards, dones = _read_step_buffers(buffers)
+            self.rewards, self.dones = rewards[self.lo:self.hi], dones[self.lo:self.hi]
+            self.info_columns = None
+            if buffers[3] is not None:
+                self.actions = read_from_shared_memory(buffers[3],
+                    self.action_space, n=len(rewards))
+            if buffers[4] is not None:
+                schema, shared_columns = buffers[4]
+                self.info_columns = read_info_columns(shared_columns, schema,
+                    n=len(rewards))
+
+    def seed(self, seeds):
+        for env, seed in zip(self.envs, seeds):
+            env.seed(seed)
+
+    def check_observation_space(self, space):
+        return all(space == env.observation_space for env in self.envs)
+
+    def reset(self):
+        observations = [env.reset() for env in self.envs]
+        if self.buffers is None:
+            return observations
+        for i, observation in enumerate(observations, self.lo):
+            write_to_shared_memory(i, observation, self.buffers[0],
+                                   self.observation_space)
+        return [None for _ in observations]
+
+    def step(self, positions=None, actions=None):
+        """Step the environments at `positions` in the slice (defaults to
+        all of them) with `actions` (defaults to the actions in shared
+        memory)."""
+        if positions is None:
+            positions = range(len(self.envs))
+        if actions is None:
+            actions = [_take(self.actions, self.action_space, self.lo + i)
+                       for i in positions]
+        results = []
+        for i, action in zip(positions, actions):
+            env = self.envs[i]
+            observation, reward, done, info = env.step(action)
+            if done:
+                observation = env.reset()
+            if self.buffers is None:
+                results.append((observation, reward, done, info))
+                continue
+            write_to_shared_memory(self.lo + i, observation, self.buffers[0],
+                                   self.observation_space)
+            self.rewards[i], self.dones[i] = reward, done
+            if self.info_columns is not None:
+                info = write_info(self.lo + i, info, self.info_columns)
+            results.append(info)
+        return results
+
+
+def _read_step_buffers(buffers):
+    rewards, dones = buffers[1:3]
+    return (np.frombuffer(rewards.get_obj(), dtype=np.float64),
+            np.frombuffer(dones.get_obj(), dtype=np.bool_))
+
+
+def _take(batch, space, index):
+    # the sample of environment `index` in a batch read from shared memory
+    if isinstance(space, Tuple):
+        return tuple(_take(items, subspace, index)
+                     for (items, subspace) in zip(batch, space.spaces))
+    elif isinstance(space, Dict):
+        return OrderedDict([(key, _take(batch[key], subspace, index))
+                            for (key, subspace) in space.spaces.items()])
+    return batch[index].copy()
+
+
+def _gather(batch, space, indices):
+    # the samples of the environments `indices` in a batch, as a new batch
+    if isinstance(space, Tuple):
+        return tuple(_gather(items, subspace, indices)
+                     for (items, subspace) in zip(batch, space.spaces))
+    elif isinstance(space, Dict):
+        return OrderedDict([(key, _gather(batch[key], subspace, indices))
+                            for (key, subspace) in space.spaces.items()])
+    return batch[indices]
+
+
+def _wait_pipes(pipes, timeout=None):
+    # the pipes with data to read, waiting up to `timeout` seconds for one
+    try:
+        from multiprocessing.connection import wait
+    except ImportError:
+        # Python 2
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            ready = [pipe for pipe in pipes if pipe.poll()]
+            if ready or ((end_time is not None) and (time.time() >= end_time)):
+                return ready
+            time.sleep(1e-4)
+    return wait(pipes, timeout)
+
+
+def _make_envs_fn(env_fns):
+    def _make_envs():
+        return [env_fn() for env_fn in env_fns]
+    return _make_envs
+
+
+def _batch_worker(index, env_fn, pipe, parent_pipe, buffers, bounds, error_queue):
+    envs = env_fn()
+    batch = _EnvSlice(envs, bounds, buffers)
+    parent_pipe.close()
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                pipe.send((batch.reset(), True))
+            elif command == 'step':
+                pipe.send((batch.step(*data), True))
+            elif command == 'seed':
+                batch.seed(data)
+                pipe.send((None, True))
+            elif command == 'close':
+                pipe.send((None, True))
+                break
+            elif command == '_check_observation_space':
+                pipe.send((batch.check_observation_space(data), True))
+            else:
+                raise RuntimeError('Received unknown command `{0}`. Must '
+                    'be one of {{`reset`, `step`, `seed`, `close`, '
+                    '`_check_observation_space`}}.'.format(command))
+    except (KeyboardInterrupt, Exception):
+        error_queue.put((index,) + sys.exc_info()[:2])
+        pipe.send((None, False))
+    finally:
+        [env.close() for env in envs]
+
+
+def _shared_worker(index, env_fn, pipe, parent_pipe, buffers, bounds,
+                   error_queue, signals):
+    envs = env_fn()
+    batch = _EnvSlice(envs, bounds, buffers)
+    wakes, completed, status, active = signals
+    wake = wakes[index]
+    lo, hi = bounds
+    active = np.frombuffer(active, dtype=np.bool_)[lo:hi]
+    parent_pipe.close()
+    stepping = False
+    try:
+        while True:
+            wake.acquire()
+            if status[index] == _STEP:
+                stepping = True
+                infos = batch.step(np.flatnonzero(active))
+                stepping = False
+                has_infos = any(infos)
+                status[index] = _DONE_INFOS if has_infos else _DONE
+                completed.release()
+                if has_infos:
+                    pipe.send(infos)
+                continue
+            command, data = pipe.recv()
+            if command == 'reset':
+                pipe.send((batch.reset(), True))
+            elif command == 'seed':
+                batch.seed(data)
+                pipe.send((None, True))
+            elif command == 'close':
+                pipe.send((None, True))
+                break
+            elif command == '_check_observation_space':
+                pipe.send((batch.check_observation_space(data), True))
+            else:
+                raise RuntimeError('Received unknown command `{0}`. Must '
+                    'be one of {{`reset`, `seed`, `close`, '
+                    '`_check_observation_space`}}.'.format(command))
+    except (KeyboardInterrupt, Exception):
+        error_queue.put((index,) + sys.exc_info()[:2])
+        if stepping:
+            status[index] = _ERROR
+            completed.release()
+        else:
+            pipe.send((None, False))
+    finally:
+        [env.close() for env in envs]
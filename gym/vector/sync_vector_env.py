@@ -1,9 +1,11 @@
 import numpy as np
 from copy import deepcopy
 
-from gym import logger
+from gym import logger, error
 from gym.vector.vector_env import VectorEnv
-from gym.vector.utils import concatenate, create_empty_array
+from gym.vector.utils import (concatenate, create_empty_array,
+                              normalize_info_schema, create_info_columns,
+                              write_info, collect_infos)
 
 __all__ = ['SyncVectorEnv']
 
@@ -27,9 +29,22 @@ class SyncVectorEnv(VectorEnv):
     copy : bool (default: `True`)
         If `True`, then the `reset` and `step` methods return a copy of the
         observations.
+
+    batch_infos : bool (default: `False`)
+        If `True`, then `step` returns the infos as a dict of arrays (see
+        `collect_infos`) instead of a list of dicts. The entries of
+        `info_schema` are batched into arrays with their masks.
+
+    info_schema : dict or list, optional
+        Entries of the infos of a single environment to batch into arrays
+        with `batch_infos=True`, given as a dict mapping keys to `(dtype,
+        shape)` or a list of `(key, dtype, shape)`. If `None`, then the
+        `info_schema` attribute of the first environment is taken, if any.
     """
     def __init__(self, env_fns, observation_space=None, action_space=None,
-                 copy=True):
+                 copy=True, batch_infos=False, info_schema=None):
+        if info_schema is not None and not batch_infos:
+            raise error.Error('`info_schema` requires `batch_infos=True`.')
         self.env_fns = env_fns
         self.envs = [env_fn() for env_fn in env_fns]
         self.copy = copy
@@ -47,6 +62,13 @@ class SyncVectorEnv(VectorEnv):
         self._dones = np.zeros((self.num_envs,), dtype=np.bool_)
         self._actions = None
 
+        self._info_columns = None
+        if batch_infos:
+            if info_schema is None:
+                info_schema = getattr(self.envs[0], 'info_schema', None) or {}
+            self._info_columns = create_info_columns(
+                normalize_info_schema(info_schema), n=self.num_envs)
+
     def seed(self, seeds=None):
         if seeds is None:
             seeds = [None for _ in range(self.num_envs)]
@@ -77,8 +99,13 @@ class SyncVectorEnv(VectorEnv):
             if self._dones[i]:
                 observation = env.reset()
             observations.append(observation)
+            if self._info_columns is not None:
+                info = write_info(i, info, self._info_columns)
             infos.append(info)
         concatenate(observations, self.observations, self.single_observation_space)
+        if self._info_columns is not None:
+            infos = collect_infos([(key, np.copy(column) if self.copy else column)
+                for (key, column) in self._info_columns.items()], infos)
 
         return (deepcopy(self.observations) if self.copy else self.observations,
             np.copy(self._rewards), np.copy(self._dones), infos)
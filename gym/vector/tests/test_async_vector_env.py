@@ -1,13 +1,16 @@
+import time
+
 import pytest
 import numpy as np
 
 from multiprocessing import TimeoutError
 from gym.spaces import Box
 from gym.error import (AlreadyPendingCallError, NoAsyncCallError,
-                       ClosedEnvironmentError)
-from gym.vector.tests.utils import make_env, make_slow_env
+                       ClosedEnvironmentError, Error)
+from gym.vector.tests.utils import make_env, make_slow_env, UnittestInfoEnv
 
 from gym.vector.async_vector_env import AsyncVectorEnv
+from gym.vector.sync_vector_env import SyncVectorEnv
 
 @pytest.mark.parametrize('shared_memory', [True, False])
 def test_create_async_vector_env(shared_memory):
@@ -194,3 +197,201 @@ def test_check_observations_async_vector_env(shared_memory):
     with pytest.raises(RuntimeError):
         env = AsyncVectorEnv(env_fns, shared_memory=shared_memory)
         env.close(terminate=True)
+
+
+@pytest.mark.parametrize('shared_memory,ipc,envs_per_worker', [
+    (True, 'pipe', 3), (False, 'pipe', 3), (True, 'shared', 1),
+    (True, 'shared', 3)])
+def test_envs_per_worker_async_vector_env(shared_memory, ipc, envs_per_worker):
+    env_fns = [make_env('CartPole-v1', i) for i in range(8)]
+    try:
+        env = AsyncVectorEnv(env_fns, shared_memory=shared_memory,
+                             envs_per_worker=envs_per_worker, ipc=ipc)
+        sync_env = SyncVectorEnv(env_fns)
+        assert len(env.processes) == -(-8 // envs_per_worker)
+        env.seed(0)
+        sync_env.seed(0)
+        np.testing.assert_allclose(env.reset(), sync_env.reset())
+        for _ in range(20):
+            actions = env.action_space.sample()
+            observations, rewards, dones, infos = env.step(actions)
+            sync_observations, sync_rewards, sync_dones, _ = sync_env.step(actions)
+            np.testing.assert_allclose(observations, sync_observations)
+            np.testing.assert_array_equal(rewards, sync_rewards)
+            np.testing.assert_array_equal(dones, sync_dones)
+            assert dones.dtype == np.bool_
+            assert len(infos) == 8
+    finally:
+        env.close()
+        sync_env.close()
+
+
+def test_shared_ipc_timeout_async_vector_env():
+    env_fns = [make_slow_env(0., i) for i in range(4)]
+    with pytest.raises(TimeoutError):
+        try:
+            env = AsyncVectorEnv(env_fns, ipc='shared', envs_per_worker=2)
+            observations = env.reset()
+            env.step_async([0.1, 0.1, 0.3, 0.1])
+            observations, rewards, dones, _ = env.step_wait(timeout=0.1)
+        finally:
+            env.close(terminate=True)
+
+
+@pytest.mark.parametrize('ipc', ['pipe', 'shared'])
+def test_timeout_breaks_async_vector_env(ipc):
+    env_fns = [make_slow_env(0., i) for i in range(4)]
+    env = AsyncVectorEnv(env_fns, ipc=ipc, envs_per_worker=2)
+    try:
+        env.reset()
+        env.step_async([0.1, 0.1, 0.3, 0.1])
+        with pytest.raises(TimeoutError):
+            env.step_wait(timeout=0.05)
+        # the late worker still finishes its step, whose results must not be
+        # taken for the ones of the next step
+        time.sleep(0.4)
+        with pytest.raises(Error):
+            env.step([0., 0., 0., 0.])
+        with pytest.raises(Error):
+            env.reset()
+    finally:
+        # terminates the workers without waiting for them
+        env.close()
+    assert env.closed
+
+
+def test_shared_ipc_requires_shared_memory():
+    env_fns = [make_env('CartPole-v1', i) for i in range(2)]
+    with pytest.raises(Error):
+        AsyncVectorEnv(env_fns, shared_memory=False, ipc='shared')
+
+
+@pytest.mark.parametrize('shared_memory,ipc,envs_per_worker', [
+    (True, 'pipe', 1), (False, 'pipe', 1), (True, 'shared', 1),
+    (True, 'pipe', 2), (True, 'shared', 2)])
+def test_step_wait_min_ready_async_vector_env(shared_memory, ipc,
+                                              envs_per_worker):
+    env_fns = [make_slow_env(0., i) for i in range(4)]
+    try:
+        env = AsyncVectorEnv(env_fns, shared_memory=shared_memory, ipc=ipc,
+                             envs_per_worker=envs_per_worker)
+        env.reset()
+        env.step_async([0., 0., 0.5, 0.5])
+        observations, rewards, dones, infos, indices = env.step_wait(min_ready=2)
+        assert sorted(indices) == [0, 1]
+        assert observations.shape == (2,) + env.single_observation_space.shape
+        assert rewards.shape == dones.shape == (2,)
+        assert len(infos) == 2
+
+        # the slow environments are still running
+        with pytest.raises(AlreadyPendingCallError):
+            env.step_async([0.], indices=[3])
+        env.step_async([0., 0.], indices=indices)
+        _, _, _, _, indices = env.step_wait(min_ready=2)
+        assert sorted(indices) == [0, 1]
+
+        observations, rewards, dones, infos, indices = env.step_wait()
+        assert sorted(indices) == [2, 3]
+        assert observations.shape == (2,) + env.single_observation_space.shape
+        with pytest.raises(NoAsyncCallError):
+            env.step_wait()
+
+        # back to full batches
+        observations, rewards, dones, infos = env.step([0.] * 4)
+        assert observations.shape == env.observation_space.shape
+    finally:
+        env.close()
+
+
+@pytest.mark.parametrize('shared_memory,ipc,envs_per_worker', [
+    (True, 'pipe', 1), (False, 'pipe', 1), (True, 'shared', 1),
+    (True, 'pipe', 2)])
+def test_info_schema_async_vector_env(shared_memory, ipc, envs_per_worker):
+    env_fns = [UnittestInfoEnv for _ in range(4)]
+    try:
+        env = AsyncVectorEnv(env_fns, shared_memory=shared_memory, ipc=ipc,
+                             envs_per_worker=envs_per_worker, batch_infos=True)
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0, 1])
+        assert set(infos) == {'step', '_step', 'position', '_position'}
+        np.testing.assert_array_equal(infos['step'], [1, 1, 1, 1])
+        assert np.all(infos['_step']) and np.all(infos['_position'])
+        assert infos['position'].dtype == np.float32
+        np.testing.assert_array_equal(infos['position'][:, 0], [0, 1, 0, 1])
+
+        _, _, _, infos = env.step([1, 1, 1, 1])
+        np.testing.assert_array_equal(infos['step'], [2, 2, 2, 2])
+        # entries outside the schema take the slow path
+        assert list(infos['even']) == [True] * 4
+
+        env.step_async([0, 1], indices=[1, 2])
+        _, _, _, infos, indices = env.step_wait()
+        # indices come in the order in which the environments finished
+        order = np.argsort(indices)
+        assert list(indices[order]) == [1, 2]
+        np.testing.assert_array_equal(infos['step'], [3, 3])
+        np.testing.assert_array_equal(infos['position'][order, 0], [0, 1])
+        assert 'even' not in infos
+    finally:
+        env.close()
+
+
+@pytest.mark.parametrize('ipc,envs_per_worker', [('pipe', 1), ('shared', 2)])
+def test_batch_infos_opt_in_async_vector_env(ipc, envs_per_worker):
+    env_fns = [UnittestInfoEnv for _ in range(4)]
+    try:
+        # the schema of the environments is only used with `batch_infos`
+        env = AsyncVectorEnv(env_fns, ipc=ipc, envs_per_worker=envs_per_worker)
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0, 1])
+        assert isinstance(infos, tuple) and len(infos) == 4
+        assert [info['step'] for info in infos] == [1, 1, 1, 1]
+    finally:
+        env.close()
+
+    # read from the environments even when the spaces are given
+    env = AsyncVectorEnv(env_fns, observation_space=env.single_observation_space,
+                         action_space=env.single_action_space, ipc=ipc,
+                         envs_per_worker=envs_per_worker, batch_infos=True)
+    try:
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0, 1])
+        assert infos['step'].dtype == np.int64
+    finally:
+        env.close()
+
+    with pytest.raises(Error):
+        AsyncVectorEnv(env_fns, info_schema=UnittestInfoEnv.info_schema)
+
+
+@pytest.mark.parametrize('shared_memory,ipc,envs_per_worker', [
+    (True, 'pipe', 1), (True, 'pipe', 2), (True, 'shared', 1),
+    (True, 'shared', 2)])
+def test_step_indices_order_async_vector_env(shared_memory, ipc,
+                                             envs_per_worker):
+    class UnbatchedInfoEnv(UnittestInfoEnv):
+        # the infos are pickled by the workers, in the order they step
+        info_schema = None
+    env_fns = [UnbatchedInfoEnv for _ in range(4)]
+    try:
+        env = AsyncVectorEnv(env_fns, shared_memory=shared_memory, ipc=ipc,
+                             envs_per_worker=envs_per_worker)
+        env.reset()
+        actions = {0: 0, 1: 1, 3: 1}
+        env.step_async([actions[i] for i in (1, 3, 0)], indices=[1, 3, 0])
+        _, _, _, infos, indices = env.step_wait()
+        assert sorted(indices) == [0, 1, 3]
+        # the infos are in the order of `indices`
+        assert [info['position'][0] for info in infos] == \
+            [actions[i] for i in indices]
+
+        with pytest.raises(ValueError):
+            env.step_async([0, 0], indices=[2, 2])
+        with pytest.raises(ValueError):
+            env.step_async([0], indices=[4])
+        with pytest.raises(ValueError):
+            env.step_async([0], indices=[-1])
+        # nothing was sent to the workers
+        _, _, _, _ = env.step([0, 0, 0, 0])
+    finally:
+        env.close()
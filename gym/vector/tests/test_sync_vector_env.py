@@ -1,8 +1,9 @@
 import pytest
 import numpy as np
 
+from gym.error import Error
 from gym.spaces import Box
-from gym.vector.tests.utils import make_env
+from gym.vector.tests.utils import make_env, UnittestInfoEnv
 
 from gym.vector.sync_vector_env import SyncVectorEnv
 
@@ -70,3 +71,50 @@ def test_check_observations_sync_vector_env():
     with pytest.raises(RuntimeError):
         env = SyncVectorEnv(env_fns)
         env.close()
+
+
+def test_info_schema_sync_vector_env():
+    env = SyncVectorEnv([UnittestInfoEnv for _ in range(3)], batch_infos=True)
+    try:
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0])
+        np.testing.assert_array_equal(infos['step'], [1, 1, 1])
+        np.testing.assert_array_equal(infos['position'][:, 1], [0, 1, 0])
+        _, _, _, infos = env.step([0, 1, 0])
+        assert list(infos['even']) == [True] * 3
+    finally:
+        env.close()
+
+    # the masks tell missing entries from zeros
+    schema = dict(UnittestInfoEnv.info_schema, even=(np.bool_, ()))
+    env = SyncVectorEnv([UnittestInfoEnv for _ in range(3)], batch_infos=True,
+                        info_schema=schema)
+    try:
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0])
+        assert not np.any(infos['even']) and not np.any(infos['_even'])
+        assert np.all(infos['_position'])
+        _, _, _, infos = env.step([0, 1, 0])
+        assert np.all(infos['even']) and np.all(infos['_even'])
+    finally:
+        env.close()
+
+    # without `batch_infos`, the infos are not batched
+    env = SyncVectorEnv([UnittestInfoEnv for _ in range(3)])
+    try:
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0])
+        assert [info['step'] for info in infos] == [1, 1, 1]
+    finally:
+        env.close()
+    with pytest.raises(Error):
+        SyncVectorEnv([UnittestInfoEnv for _ in range(3)], info_schema=[])
+
+    env = SyncVectorEnv([UnittestInfoEnv for _ in range(3)], batch_infos=True,
+                        info_schema=[])
+    try:
+        env.reset()
+        _, _, _, infos = env.step([0, 1, 0])
+        np.testing.assert_array_equal(infos['step'], [1, 1, 1])
+    finally:
+        env.close()
@@ -42,11 +42,32 @@ class UnittestSlowEnv(gym.Env):
         return self.observation_space.sample()
 
     def step(self, action):
-        time.sleep(action)
+        time.sleep(float(action))
         observation = self.observation_space.sample()
         reward, done = 0., False
         return observation, reward, done, {}
 
+class UnittestInfoEnv(gym.Env):
+    info_schema = {'step': (np.int64, ()), 'position': (np.float32, (2,))}
+
+    def __init__(self):
+        super(UnittestInfoEnv, self).__init__()
+        self.observation_space = Box(low=-1., high=1., shape=(2,), dtype=np.float32)
+        self.action_space = Discrete(2)
+        self.t = 0
+
+    def reset(self):
+        self.t = 0
+        return self.observation_space.low
+
+    def step(self, action):
+        self.t += 1
+        info = {'step': self.t, 'position': np.full((2,), action, dtype=np.float32)}
+        if self.t % 2 == 0:
+            # not in the schema
+            info['even'] = True
+        return self.observation_space.low, 0., False, info
+
 def make_env(env_name, seed):
     def _make():
         env = gym.make(env_name)
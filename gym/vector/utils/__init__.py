@@ -1,3 +1,5 @@
+from gym.vector.utils.infos import (normalize_info_schema, create_info_columns,
+                                    read_info_columns, write_info, collect_infos)
 from gym.vector.utils.misc import CloudpickleWrapper, clear_mpi_env_vars
 from gym.vector.utils.numpy_utils import concatenate, create_empty_array
 from gym.vector.utils.shared_memory import create_shared_memory, read_from_shared_memory, write_to_shared_memory
@@ -12,5 +14,10 @@ __all__ = [
     'read_from_shared_memory',
     'write_to_shared_memory',
     '_BaseGymSpaces',
-    'batch_space'
+    'batch_space',
+    'normalize_info_schema',
+    'create_info_columns',
+    'read_info_columns',
+    'write_info',
+    'collect_infos'
 ]
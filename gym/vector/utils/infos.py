@@ -0,0 +1,113 @@
+import numpy as np
+from ctypes import c_bool
+from collections import OrderedDict
+
+__all__ = [
+    'normalize_info_schema',
+    'create_info_columns',
+    'read_info_columns',
+    'write_info',
+    'collect_infos'
+]
+
+def normalize_info_schema(schema):
+    """Normalize an info schema, the declaration of the entries of the infos
+    of an environment that vectorized environments batch into arrays.
+
+    Parameters
+    ----------
+    schema : dict or list
+        Either a dict mapping keys to `(dtype, shape)`, or a list of
+        `(key, dtype, shape)`.
+
+    Returns
+    -------
+    schema : `OrderedDict` instance
+        Maps keys to `(np.dtype, shape)`, sorted by key. The key `'_' + key`
+        of an entry is taken by its mask (see `collect_infos`), and cannot
+        be an entry itself.
+
+    Example
+    -------
+    >>> normalize_info_schema({'vel_rew': (np.float64, ())})
+    OrderedDict([('vel_rew', (dtype('float64'), ()))])
+    """
+    if isinstance(schema, dict):
+        schema = [(key,) + tuple(value) for (key, value) in schema.items()]
+    schema = OrderedDict(sorted((key, (np.dtype(dtype), tuple(shape)))
+        for (key, dtype, shape) in schema))
+    for key in schema:
+        if _mask_key(key) in schema:
+            raise ValueError('The info schema has both `{0}` and its mask '
+                '`{1}`.'.format(key, _mask_key(key)))
+    return schema
+
+def _mask_key(key):
+    return '_' + key
+
+def _column_specs(schema):
+    # the column of each entry, followed by its mask
+    for key, (dtype, shape) in schema.items():
+        yield key, dtype, shape
+        yield _mask_key(key), np.dtype(np.bool_), ()
+
+def create_info_columns(schema, n=1, ctx=None):
+    """Create the columns of the info entries of `schema` for `n`
+    environments, each with the column of its mask: numpy arrays, or shared
+    objects (to be read with `read_info_columns`) if a `multiprocessing`
+    context `ctx` is given."""
+    columns = OrderedDict()
+    for key, dtype, shape in _column_specs(schema):
+        size = n * int(np.prod(shape))
+        if ctx is None:
+            columns[key] = np.zeros((n,) + shape, dtype=dtype)
+        else:
+            columns[key] = ctx.Array(c_bool if dtype.char == '?' else
+                                     dtype.char, size)
+    return columns
+
+def read_info_columns(shared_columns, schema, n=1):
+    """The shared columns of `create_info_columns` as numpy arrays, sharing
+    their memory."""
+    return OrderedDict([(key, np.frombuffer(shared_columns[key].get_obj(),
+        dtype=dtype).reshape((n,) + shape))
+        for (key, dtype, shape) in _column_specs(schema)])
+
+def write_info(index, info, columns):
+    """Write the entries of `info` (the info of environment `index`) that
+    have a column into `columns`, and whether `info` has them into their
+    masks; missing entries are written as zeros.
+
+    Returns
+    -------
+    extra : dict
+        The entries of `info` without a column.
+    """
+    for key, column in columns.items():
+        mask = columns.get(_mask_key(key))
+        if mask is None:
+            # a mask
+            continue
+        mask[index] = key in info
+        column[index] = info.get(key, 0)
+    if len(info) and any(key not in columns for key in info):
+        return dict((key, value) for (key, value) in info.items()
+                    if key not in columns)
+    return {}
+
+def collect_infos(columns, extras):
+    """Batched infos, as a dict: the arrays of `columns`, and the entries of
+    `extras` (the entries without a column, one dict per environment) as
+    arrays of objects, with `None` for the environments without them.
+
+    The entries of a schema come with their mask: `infos['_' + key][i]` is
+    `True` if environment `i` gave entry `key`, so that a missing entry
+    (written as zero) can be told from a zero.
+    """
+    infos = OrderedDict(columns)
+    for i, extra in enumerate(extras):
+        for key, value in extra.items():
+            if key not in infos:
+                infos[key] = np.full((len(extras),), None, dtype=object)
+            infos[key][i] = value
+    return infos
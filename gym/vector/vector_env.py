@@ -84,8 +84,10 @@ class VectorEnv(gym.Env):
         dones : `np.ndarray` instance (dtype `np.bool_`)
             A vector whose entries indicate whether the episode has ended.
 
-        infos : list of dict
-            A list of auxiliary diagnostic information dicts from sub-environments.
+        infos : list of dict, or dict
+            A list of auxiliary diagnostic information dicts from sub-environments,
+            or, with `batch_infos=True`, a dict of batched entries (see
+            `gym.vector.utils.collect_infos`).
         """
 
         self.step_async(actions)